@@ -13,6 +13,10 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 import asyncio
+import os
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import AsyncMock, MagicMock
 
@@ -24,15 +28,20 @@ from uprotocol.client.usubscription.v3.inmemoryusubcriptionclient import (
 from uprotocol.client.usubscription.v3.subscriptionchangehandler import (
     SubscriptionChangeHandler,
 )
+from uprotocol.client.usubscription.v3.subscriptionsnapshotstore import SubscriptionSnapshotStore
 from uprotocol.communication.calloptions import CallOptions
 from uprotocol.communication.inmemoryrpcclient import InMemoryRpcClient
 from uprotocol.communication.simplenotifier import SimpleNotifier
 from uprotocol.communication.upayload import UPayload
 from uprotocol.communication.ustatuserror import UStatusError
 from uprotocol.core.usubscription.v3.usubscription_pb2 import (
+    FetchSubscribersRequest,
     FetchSubscribersResponse,
     FetchSubscriptionsRequest,
     FetchSubscriptionsResponse,
+    SubscriberInfo,
+    Subscription,
+    SubscriptionRequest,
     SubscriptionResponse,
     SubscriptionStatus,
     UnsubscribeResponse,
@@ -49,6 +58,27 @@ from uprotocol.v1.uri_pb2 import UUri
 from uprotocol.v1.ustatus_pb2 import UStatus
 
 
+class SlowSnapshotStore(SubscriptionSnapshotStore):
+    def __init__(self, path, fail=False):
+        super().__init__(path, interval=10)
+        self.fail = fail
+        self.saving = threading.Event()
+        self.saved = []
+        self.threads = []
+
+    def save(self, subscriptions):
+        if self.fail:
+            raise OSError("Disk full")
+        # Only the first save is slow, a later save would otherwise complete before it
+        first = not self.saving.is_set()
+        self.saving.set()
+        if first:
+            time.sleep(0.1)
+        super().save(subscriptions)
+        self.saved.append(set(subscriptions))
+        self.threads.append(threading.current_thread())
+
+
 class MyListener(UListener):
     async def on_receive(self, umsg: UMessage) -> None:
         pass
@@ -59,6 +89,7 @@ class TestInMemoryUSubscriptionClient(unittest.IsolatedAsyncioTestCase):
         self.transport = MagicMock(spec=UTransport)
         self.rpc_client = MagicMock(spec=InMemoryRpcClient)
         self.notifier = MagicMock(spec=SimpleNotifier)
+        self.notifier.register_notification_listener.return_value = UStatus(code=UCode.OK)
 
         self.topic = UUri(authority_name="neelam", ue_id=3, ue_version_major=1, resource_id=0x8000)
         self.source = UUri(authority_name="source_auth", ue_id=4, ue_version_major=1)
@@ -235,11 +266,11 @@ class TestInMemoryUSubscriptionClient(unittest.IsolatedAsyncioTestCase):
         result = await subscriber.subscribe(self.topic, self.listener, CallOptions.DEFAULT, handler)
         self.assertEqual(result.status.state, SubscriptionStatus.State.SUBSCRIBED)
 
-        # Second subscription attempt
+        # Second subscription attempt is served from the known subscription status
         result = await subscriber.subscribe(self.topic, self.listener, CallOptions.DEFAULT, handler)
         self.assertEqual(result.status.state, SubscriptionStatus.State.SUBSCRIBED)
 
-        self.assertEqual(self.rpc_client.invoke_method.call_count, 2)
+        self.assertEqual(self.rpc_client.invoke_method.call_count, 1)
         self.notifier.register_notification_listener.assert_called_once()
 
     async def test_subscribe_when_we_try_to_subscribe_to_the_same_topic_twice_with_different_notification_handler(self):
@@ -261,15 +292,170 @@ class TestInMemoryUSubscriptionClient(unittest.IsolatedAsyncioTestCase):
         # First subscription attempt
         result = await subscriber.subscribe(self.topic, self.listener, CallOptions.DEFAULT, handler)
         self.assertEqual(result.status.state, SubscriptionStatus.State.SUBSCRIBED)
-        # Second subscription attempt should raise an exception
-        with self.assertRaises(UStatusError) as context:
-            await subscriber.subscribe(self.topic, self.listener, CallOptions.DEFAULT, handler1)
-        self.assertEqual("Handler already registered", context.exception.status.message)
-        self.assertEqual(UCode.ALREADY_EXISTS, context.exception.status.code)
+        # Second subscription attempt adds the handler
+        result = await subscriber.subscribe(self.topic, self.listener, CallOptions.DEFAULT, handler1)
+        self.assertEqual(result.status.state, SubscriptionStatus.State.SUBSCRIBED)
+        self.assertEqual(subscriber.handlers[UriSerializer.serialize(self.topic)], [handler, handler1])
 
-        self.assertEqual(2, self.rpc_client.invoke_method.call_count)
+        self.assertEqual(1, self.rpc_client.invoke_method.call_count)
         self.notifier.register_notification_listener.assert_called_once()
 
+    async def test_subscribe_with_multiple_listeners_is_reference_counted(self):
+        self.transport.register_listener.return_value = UStatus(code=UCode.OK)
+        self.transport.unregister_listener.return_value = UStatus(code=UCode.OK)
+        self.notifier.register_notification_listener.return_value = UStatus(code=UCode.OK)
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        listener2 = MyListener()
+
+        self.rpc_client.invoke_method.return_value = UPayload.pack(
+            SubscriptionResponse(topic=self.topic, status=SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBED))
+        )
+        await subscriber.subscribe(self.topic, self.listener)
+        await subscriber.subscribe(self.topic, self.listener)
+        await subscriber.subscribe(self.topic, listener2)
+        self.rpc_client.invoke_method.assert_called_once()
+        self.assertEqual(self.transport.register_listener.call_count, 2)
+
+        # Releasing the subscriptions other than the last one does not call the USubscription service
+        self.assertEqual((await subscriber.unsubscribe(self.topic, self.listener)).code, UCode.OK)
+        self.transport.unregister_listener.assert_not_called()
+        self.assertEqual((await subscriber.unsubscribe(self.topic, self.listener)).code, UCode.OK)
+        self.transport.unregister_listener.assert_called_once_with(self.topic, self.listener)
+        self.rpc_client.invoke_method.assert_called_once()
+
+        self.rpc_client.invoke_method.return_value = UPayload.pack(UnsubscribeResponse())
+        self.assertEqual((await subscriber.unsubscribe(self.topic, listener2)).code, UCode.OK)
+        self.assertEqual(self.rpc_client.invoke_method.call_count, 2)
+        self.assertIsNone(subscriber.get_subscription_status(self.topic))
+        self.assertEqual(subscriber.listeners, {})
+
+    async def test_concurrent_subscriptions_share_the_request_and_the_listener(self):
+        registered = asyncio.Event()
+
+        async def register_listener(topic, listener):
+            await registered.wait()
+            return UStatus(code=UCode.OK)
+
+        async def invoke_method(method_uri, request_payload, options=None):
+            await asyncio.sleep(0.01)
+            return UPayload.pack(
+                SubscriptionResponse(
+                    topic=self.topic, status=SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBED)
+                )
+            )
+
+        self.transport.register_listener = AsyncMock(side_effect=register_listener)
+        self.rpc_client.invoke_method = AsyncMock(side_effect=invoke_method)
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        topic_str = UriSerializer.serialize(self.topic)
+        tasks = [asyncio.ensure_future(subscriber.subscribe(self.topic, self.listener)) for _ in range(2)]
+        tasks.append(asyncio.ensure_future(subscriber.subscribe_many([self.topic], {topic_str: self.listener})))
+        await asyncio.sleep(0.05)
+        registered.set()
+        await asyncio.gather(*tasks)
+
+        self.rpc_client.invoke_method.assert_called_once()
+        self.transport.register_listener.assert_called_once_with(self.topic, self.listener)
+        self.assertEqual(subscriber.listeners[topic_str][self.listener], 3)
+        self.assertEqual(subscriber.pending_subscriptions, {})
+
+    async def test_failed_listener_registration_is_retried(self):
+        self.transport.register_listener.return_value = UStatus(code=UCode.INTERNAL)
+        self.rpc_client.invoke_method.return_value = UPayload.pack(
+            SubscriptionResponse(topic=self.topic, status=SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBED))
+        )
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        await subscriber.subscribe(self.topic, self.listener)
+        self.assertEqual(subscriber.listeners, {})
+
+        self.transport.register_listener.return_value = UStatus(code=UCode.OK)
+        await subscriber.subscribe(self.topic, self.listener)
+        self.assertEqual(self.transport.register_listener.call_count, 2)
+        self.assertEqual(subscriber.listeners[UriSerializer.serialize(self.topic)][self.listener], 1)
+
+    async def test_subscription_status_kept_up_to_date_by_notifications(self):
+        self.transport.register_listener.return_value = UStatus(code=UCode.OK)
+        self.notifier.register_notification_listener.return_value = UStatus(code=UCode.OK)
+        self.rpc_client.invoke_method.return_value = UPayload.pack(
+            SubscriptionResponse(
+                topic=self.topic, status=SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBE_PENDING)
+            )
+        )
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        await subscriber.subscribe(self.topic, self.listener)
+        self.assertEqual(
+            subscriber.get_subscription_status(self.topic).state, SubscriptionStatus.State.SUBSCRIBE_PENDING
+        )
+
+        for state in (SubscriptionStatus.State.SUBSCRIBED, SubscriptionStatus.State.UNSUBSCRIBED):
+            update = Update(topic=self.topic, status=SubscriptionStatus(state=state))
+            message = UMessageBuilder.notification(self.topic, self.source).build_from_upayload(UPayload.pack(update))
+            await subscriber.notification_handler.on_receive(message)
+            if state == SubscriptionStatus.State.SUBSCRIBED:
+                self.assertEqual(subscriber.get_subscription_status(self.topic).state, state)
+                result = await subscriber.subscribe(self.topic, self.listener)
+                self.assertEqual(result.status.state, state)
+                self.rpc_client.invoke_method.assert_called_once()
+
+        # Unsubscribed by the service, subscribing again calls the USubscription service
+        self.assertIsNone(subscriber.get_subscription_status(self.topic))
+        await subscriber.subscribe(self.topic, self.listener)
+        self.assertEqual(self.rpc_client.invoke_method.call_count, 2)
+
+    async def test_subscribe_many(self):
+        self.transport.register_listener.return_value = UStatus(code=UCode.OK)
+        self.notifier.register_notification_listener.return_value = UStatus(code=UCode.OK)
+        topics = [UUri(authority_name="neelam", ue_id=3, ue_version_major=1, resource_id=0x8000 + i) for i in range(10)]
+        in_flight = 0
+        max_in_flight = 0
+
+        async def invoke_method(method_uri, request_payload, options=None):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            request = UPayload.unpack(request_payload, SubscriptionRequest)
+            if request.topic.resource_id == 0x8009:
+                raise UStatusError.from_code_message(UCode.PERMISSION_DENIED, "Denied")
+            return UPayload.pack(
+                SubscriptionResponse(
+                    topic=request.topic, status=SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBED)
+                )
+            )
+
+        self.rpc_client.invoke_method = AsyncMock(side_effect=invoke_method)
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        await subscriber.subscribe(topics[0], self.listener)
+        listener_map = {UriSerializer.serialize(topic): self.listener for topic in topics}
+
+        results = await subscriber.subscribe_many(topics, listener_map, max_in_flight=4)
+
+        self.assertEqual(list(results), list(listener_map))
+        for topic in topics[:9]:
+            result = results[UriSerializer.serialize(topic)]
+            self.assertTrue(result.is_success())
+            self.assertEqual(result.success_value().status.state, SubscriptionStatus.State.SUBSCRIBED)
+        self.assertEqual(results[UriSerializer.serialize(topics[9])].failure_value().code, UCode.PERMISSION_DENIED)
+        # The first topic was already subscribed, the other ones are requested 4 at a time
+        self.assertEqual(self.rpc_client.invoke_method.call_count, 10)
+        self.assertEqual(max_in_flight, 4)
+        self.assertEqual(self.transport.register_listener.call_count, 9)
+        self.assertEqual(subscriber.listeners[UriSerializer.serialize(topics[0])][self.listener], 2)
+        self.assertIsNone(subscriber.get_subscription_status(topics[9]))
+        self.notifier.register_notification_listener.assert_called_once()
+
+    async def test_subscribe_many_invalid_arguments(self):
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        with self.assertRaises(ValueError):
+            await subscriber.subscribe_many(None, {})
+        with self.assertRaises(ValueError):
+            await subscriber.subscribe_many([self.topic], None)
+        with self.assertRaises(ValueError):
+            await subscriber.subscribe_many([self.topic], {})
+        with self.assertRaises(ValueError):
+            await subscriber.subscribe_many([], {}, max_in_flight=0)
+
     async def test_unsubscribe_using_mock_rpcclient_and_simplernotifier(self):
         self.transport.get_source.return_value = self.source
         self.transport.register_listener.return_value = UStatus(code=UCode.OK)
@@ -556,11 +742,10 @@ class TestInMemoryUSubscriptionClient(unittest.IsolatedAsyncioTestCase):
         handler1.handle_subscription_change.return_value = NotImplementedError(
             "Unimplemented method 'handle_subscription_change'"
         )
-        # Second register_for_notifications attempt
-        with self.assertRaises(UStatusError) as context:
-            await subscriber.register_for_notifications(self.topic, handler1, CallOptions.DEFAULT)
-        self.assertEqual(UCode.ALREADY_EXISTS, context.exception.status.code)
-        self.assertEqual("Handler already registered", context.exception.status.message)
+        # Second register_for_notifications attempt adds the handler
+        result = await subscriber.register_for_notifications(self.topic, handler1, CallOptions.DEFAULT)
+        self.assertTrue(result is not None)
+        self.assertEqual(subscriber.handlers[UriSerializer.serialize(self.topic)], [handler, handler1])
 
         self.assertEqual(self.rpc_client.invoke_method.call_count, 2)
 
@@ -619,7 +804,7 @@ class TestInMemoryUSubscriptionClient(unittest.IsolatedAsyncioTestCase):
     async def test_my_notification_listener_dispatches_correctly(self):
         mock_handler = MagicMock(spec=SubscriptionChangeHandler)
         topic_str = UriSerializer.serialize(self.topic)
-        handlers = {topic_str: mock_handler}
+        handlers = {topic_str: [mock_handler]}
         listener = MyNotificationListener(handlers)
         update = Update(topic=self.topic, status=SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBED))
         umsg = UMessageBuilder.notification(self.topic, self.source).build_from_upayload(UPayload.pack(update))
@@ -629,7 +814,7 @@ class TestInMemoryUSubscriptionClient(unittest.IsolatedAsyncioTestCase):
     async def test_my_notification_listener_ignores_wrong_message_type(self):
         mock_handler = MagicMock(spec=SubscriptionChangeHandler)
         topic_str = UriSerializer.serialize(self.topic)
-        handlers = {topic_str: mock_handler}
+        handlers = {topic_str: [mock_handler]}
         listener = MyNotificationListener(handlers)
         umsg = UMessage()
         umsg.attributes.type = uattributes_pb2.UMESSAGE_TYPE_REQUEST
@@ -640,7 +825,7 @@ class TestInMemoryUSubscriptionClient(unittest.IsolatedAsyncioTestCase):
         mock_handler = MagicMock(spec=SubscriptionChangeHandler)
         mock_handler.handle_subscription_change.side_effect = RuntimeError("Simulated handler error")
         topic_str = UriSerializer.serialize(self.topic)
-        handlers = {topic_str: mock_handler}
+        handlers = {topic_str: [mock_handler]}
         listener = MyNotificationListener(handlers)
         update = Update(topic=self.topic, status=SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBED))
         umsg = UMessageBuilder.notification(self.topic, self.source).build_from_upayload(UPayload.pack(update))
@@ -707,6 +892,188 @@ class TestInMemoryUSubscriptionClient(unittest.IsolatedAsyncioTestCase):
         except Exception as e:
             self.fail(f"Exception occurred: {e}")
 
+    def create_paging_rpc_client(self, total, page_size, fail_at_offset=None):
+        requested_offsets = []
+
+        async def invoke_method(method_uri, request_payload, options=None):
+            request_cls = FetchSubscribersRequest if method_uri.resource_id == 8 else FetchSubscriptionsRequest
+            offset = UPayload.unpack(request_payload, request_cls).offset
+            requested_offsets.append(offset)
+            if offset == fail_at_offset:
+                raise UStatusError.from_code_message(UCode.UNAVAILABLE, "Unavailable")
+            end = min(offset + page_size, total)
+            subscribers = [SubscriberInfo(uri=UUri(ue_id=i)) for i in range(offset, end)]
+            if request_cls is FetchSubscribersRequest:
+                response = FetchSubscribersResponse(subscribers=subscribers, has_more_records=end < total)
+            else:
+                subscriptions = [Subscription(topic=self.topic, subscriber=subscriber) for subscriber in subscribers]
+                response = FetchSubscriptionsResponse(subscriptions=subscriptions, has_more_records=end < total)
+            return UPayload.pack(response)
+
+        self.rpc_client.invoke_method = AsyncMock(side_effect=invoke_method)
+        return requested_offsets
+
+    async def test_iter_subscribers_pages_through_results(self):
+        requested_offsets = self.create_paging_rpc_client(25, 10)
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        subscribers = [info.uri.ue_id async for info in subscriber.iter_subscribers(self.topic)]
+        self.assertEqual(subscribers, list(range(25)))
+        self.assertEqual(requested_offsets, [0, 10, 20])
+
+    async def test_iter_subscriptions_starts_from_request_offset(self):
+        requested_offsets = self.create_paging_rpc_client(25, 10)
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        request = FetchSubscriptionsRequest(topic=self.topic, offset=5)
+        subscriptions = [s.subscriber.uri.ue_id async for s in subscriber.iter_subscriptions(request)]
+        self.assertEqual(subscriptions, list(range(5, 25)))
+        self.assertEqual(requested_offsets, [5, 15])
+        self.assertEqual(request.offset, 5)
+
+    async def test_iter_subscribers_prefetches_bounded_number_of_pages(self):
+        requested_offsets = self.create_paging_rpc_client(100, 10)
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        iterator = subscriber.iter_subscribers(self.topic, prefetch_pages=2)
+        first = await iterator.__anext__()
+        self.assertEqual(first.uri.ue_id, 0)
+        await asyncio.sleep(0.01)
+        # The page being consumed, 2 pages in the queue and one waiting to be queued
+        self.assertEqual(requested_offsets, [0, 10, 20, 30])
+        await iterator.aclose()
+
+    async def test_iter_subscribers_raises_page_failure(self):
+        self.create_paging_rpc_client(30, 10, fail_at_offset=10)
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        received = []
+        with self.assertRaises(RuntimeError) as context:
+            async for info in subscriber.iter_subscribers(self.topic):
+                received.append(info)
+        self.assertEqual(context.exception.__cause__.get_code(), UCode.UNAVAILABLE)
+        self.assertEqual(len(received), 10)
+
+    def test_iter_invalid_arguments(self):
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        with self.assertRaises(ValueError):
+            subscriber.iter_subscribers(None)
+        with self.assertRaises(ValueError):
+            subscriber.iter_subscribers(self.topic, None)
+        with self.assertRaises(ValueError):
+            subscriber.iter_subscriptions(None)
+        with self.assertRaises(ValueError):
+            subscriber.iter_subscriptions(FetchSubscriptionsRequest(), prefetch_pages=0)
+
+    async def test_multiple_handlers_receive_subscription_changes(self):
+        self.rpc_client.invoke_method.return_value = UPayload.pack(None)
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        handler = MagicMock(spec=SubscriptionChangeHandler)
+        handler1 = MagicMock(spec=SubscriptionChangeHandler)
+        await subscriber.register_for_notifications(self.topic, handler)
+        await subscriber.register_for_notifications(self.topic, handler1)
+
+        update = Update(topic=self.topic, status=SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBED))
+        message = UMessageBuilder.notification(self.topic, self.source).build_from_upayload(UPayload.pack(update))
+        await subscriber.notification_handler.on_receive(message)
+        await subscriber.dispatcher.drain()
+        handler.handle_subscription_change.assert_called_once_with(update.topic, update.status)
+        handler1.handle_subscription_change.assert_called_once_with(update.topic, update.status)
+
+        # Unregistering one handler keeps the other one
+        await subscriber.unregister_for_notifications(self.topic, handler)
+        self.assertEqual(subscriber.handlers[UriSerializer.serialize(self.topic)], [handler1])
+        await subscriber.unregister_for_notifications(self.topic, handler1)
+        self.assertEqual(subscriber.handlers, {})
+
+    async def test_restore_subscriptions_from_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SubscriptionSnapshotStore(os.path.join(directory, "subscriptions.snapshot"), interval=10)
+            topic2 = UUri(authority_name="neelam", ue_id=3, ue_version_major=1, resource_id=0x8001)
+            topic_str = UriSerializer.serialize(self.topic)
+            topic2_str = UriSerializer.serialize(topic2)
+            self.transport.register_listener.return_value = UStatus(code=UCode.OK)
+            self.transport.unregister_listener.return_value = UStatus(code=UCode.OK)
+            self.notifier.register_notification_listener.return_value = UStatus(code=UCode.OK)
+            self.notifier.unregister_notification_listener.return_value = UStatus(code=UCode.OK)
+            self.rpc_client.invoke_method.return_value = UPayload.pack(
+                SubscriptionResponse(
+                    topic=self.topic, status=SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBE_PENDING)
+                )
+            )
+
+            # Subscriptions are saved periodically and when closing
+            subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier, store)
+            await subscriber.subscribe(self.topic, self.listener)
+            await asyncio.sleep(0.05)
+            self.assertIn(topic_str, store.load())
+            await subscriber.subscribe(topic2, self.listener)
+            await subscriber.close()
+            self.assertEqual(set(store.load()), {topic_str, topic2_str})
+
+            # On restart the listeners are registered from the snapshot before hearing from the service
+            rpc_response = asyncio.Future()
+
+            async def invoke_method(method_uri, request_payload, options=None):
+                request = UPayload.unpack(request_payload, SubscriptionRequest)
+                state = await rpc_response
+                return UPayload.pack(SubscriptionResponse(topic=request.topic, status=SubscriptionStatus(state=state)))
+
+            self.rpc_client.invoke_method = AsyncMock(side_effect=invoke_method)
+            self.transport.register_listener.reset_mock()
+            handler = MagicMock(spec=SubscriptionChangeHandler)
+            subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier, store)
+            restored = await subscriber.restore({topic_str: self.listener}, {topic_str: handler})
+            self.assertEqual(list(restored), [topic_str])
+            self.transport.register_listener.assert_called_once_with(self.topic, self.listener)
+            self.assertEqual(subscriber.handlers[topic_str], [handler])
+            self.assertEqual(
+                subscriber.get_subscription_status(self.topic).state, SubscriptionStatus.State.SUBSCRIBE_PENDING
+            )
+
+            # Reconciled in the background, the service no longer knows the subscription
+            rpc_response.set_result(SubscriptionStatus.State.UNSUBSCRIBED)
+            await subscriber.reconcile_task
+            self.assertIsNone(subscriber.get_subscription_status(self.topic))
+            self.transport.unregister_listener.assert_called_with(self.topic, self.listener)
+            self.assertNotIn(topic_str, subscriber.handlers)
+            await subscriber.close()
+
+    async def test_close_waits_for_the_snapshot_being_saved(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SlowSnapshotStore(os.path.join(directory, "subscriptions.snapshot"))
+            topic2 = UUri(authority_name="neelam", ue_id=3, ue_version_major=1, resource_id=0x8001)
+            self.transport.register_listener.return_value = UStatus(code=UCode.OK)
+            self.notifier.unregister_notification_listener.return_value = UStatus(code=UCode.OK)
+            self.rpc_client.invoke_method.return_value = UPayload.pack(
+                SubscriptionResponse(status=SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBED))
+            )
+            subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier, store)
+            await subscriber.subscribe(self.topic, self.listener)
+            await asyncio.get_running_loop().run_in_executor(None, store.saving.wait)
+            await subscriber.subscribe(topic2, self.listener)
+            await subscriber.close()
+            # The periodic save completed before the final one
+            expected = {UriSerializer.serialize(self.topic), UriSerializer.serialize(topic2)}
+            self.assertEqual(store.saved, [{UriSerializer.serialize(self.topic)}, expected])
+            self.assertEqual(set(store.load()), expected)
+            # No save blocks the loop, the final one included
+            self.assertNotIn(threading.current_thread(), store.threads)
+            self.assertEqual(os.listdir(directory), ["subscriptions.snapshot"])
+
+    async def test_failed_snapshot_save_is_logged(self):
+        store = SlowSnapshotStore("subscriptions.snapshot", fail=True)
+        self.rpc_client.invoke_method.return_value = UPayload.pack(
+            SubscriptionResponse(status=SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBED))
+        )
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier, store)
+        with self.assertLogs("uprotocol.client.usubscription.v3.inmemoryusubcriptionclient", "ERROR") as logs:
+            await subscriber.subscribe(self.topic, self.listener)
+            await asyncio.gather(subscriber.snapshot_task, return_exceptions=True)
+            await asyncio.sleep(0)
+        self.assertIn("Disk full", logs.output[0])
+
+    async def test_restore_without_snapshot_store(self):
+        subscriber = InMemoryUSubscriptionClient(self.transport, self.rpc_client, self.notifier)
+        with self.assertRaises(ValueError):
+            await subscriber.restore({})
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,151 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import threading
+import unittest
+
+from uprotocol.client.usubscription.v3.subscriptionchangedispatcher import (
+    DispatchMode,
+    SubscriptionChangeDispatcher,
+)
+from uprotocol.client.usubscription.v3.subscriptionchangehandler import SubscriptionChangeHandler
+from uprotocol.core.usubscription.v3.usubscription_pb2 import SubscriptionStatus
+from uprotocol.v1.uri_pb2 import UUri
+
+SUBSCRIBED = SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBED)
+PENDING = SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBE_PENDING)
+
+
+class RecordingHandler(SubscriptionChangeHandler):
+    def __init__(self):
+        self.changes = []
+        self.threads = []
+
+    def handle_subscription_change(self, topic: UUri, status: SubscriptionStatus) -> None:
+        self.threads.append(threading.get_ident())
+        self.changes.append((topic.resource_id, status.state))
+
+
+class SlowHandler(SubscriptionChangeHandler):
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.changes = []
+
+    async def handle_subscription_change(self, topic: UUri, status: SubscriptionStatus) -> None:
+        await self.release.wait()
+        self.changes.append(status.state)
+
+
+class FailingHandler(SubscriptionChangeHandler):
+    def handle_subscription_change(self, topic: UUri, status: SubscriptionStatus) -> None:
+        raise RuntimeError("Simulated handler error")
+
+
+class TestSubscriptionChangeDispatcher(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.topic1 = UUri(authority_name="neelam", ue_id=3, ue_version_major=1, resource_id=0x8000)
+        self.topic2 = UUri(authority_name="neelam", ue_id=3, ue_version_major=1, resource_id=0x8001)
+
+    async def test_slow_topic_does_not_stall_other_topics(self):
+        dispatcher = SubscriptionChangeDispatcher(DispatchMode.TASK)
+        slow = SlowHandler()
+        handler = RecordingHandler()
+        await dispatcher.dispatch("topic1", [slow], self.topic1, PENDING)
+        await dispatcher.dispatch("topic1", [slow], self.topic1, SUBSCRIBED)
+        await dispatcher.dispatch("topic2", [handler], self.topic2, SUBSCRIBED)
+        await asyncio.sleep(0.01)
+        self.assertEqual(handler.changes, [(0x8001, SubscriptionStatus.State.SUBSCRIBED)])
+        self.assertEqual(slow.changes, [])
+
+        # The changes of the slow topic are handled in order once it catches up
+        slow.release.set()
+        await dispatcher.drain()
+        self.assertEqual(
+            slow.changes, [SubscriptionStatus.State.SUBSCRIBE_PENDING, SubscriptionStatus.State.SUBSCRIBED]
+        )
+        self.assertEqual(dispatcher.metrics["topic1"].dispatched, 2)
+        self.assertGreater(dispatcher.metrics["topic1"].max_latency, 0)
+        self.assertEqual(dispatcher.tails, {})
+
+    async def test_failures_are_counted_and_do_not_stop_other_handlers(self):
+        dispatcher = SubscriptionChangeDispatcher(DispatchMode.INLINE)
+        handler = RecordingHandler()
+        await dispatcher.dispatch("topic1", [FailingHandler(), handler], self.topic1, SUBSCRIBED)
+        self.assertEqual(handler.changes, [(0x8000, SubscriptionStatus.State.SUBSCRIBED)])
+        self.assertEqual(dispatcher.metrics["topic1"].dispatched, 2)
+        self.assertEqual(dispatcher.metrics["topic1"].failures, 1)
+
+    async def test_executor_mode_runs_sync_handlers_off_the_loop(self):
+        dispatcher = SubscriptionChangeDispatcher(DispatchMode.EXECUTOR)
+        handler = RecordingHandler()
+        slow = SlowHandler()
+        slow.release.set()
+        await dispatcher.dispatch("topic1", [handler, slow], self.topic1, SUBSCRIBED)
+        await dispatcher.drain()
+        self.assertEqual(handler.changes, [(0x8000, SubscriptionStatus.State.SUBSCRIBED)])
+        self.assertNotEqual(handler.threads, [threading.get_ident()])
+        self.assertEqual(slow.changes, [SubscriptionStatus.State.SUBSCRIBED])
+
+    async def test_close_cancels_pending_dispatches(self):
+        dispatcher = SubscriptionChangeDispatcher()
+        slow = SlowHandler()
+        await dispatcher.dispatch("topic1", [slow], self.topic1, SUBSCRIBED)
+        await dispatcher.dispatch("topic1", [], self.topic1, SUBSCRIBED)
+        await dispatcher.close()
+        self.assertEqual(dispatcher.tasks, set())
+        self.assertEqual(slow.changes, [])
+
+    async def test_coalesce_updates_within_window(self):
+        dispatcher = SubscriptionChangeDispatcher(DispatchMode.INLINE, coalesce_window=20)
+        handler = RecordingHandler()
+        for _ in range(5):
+            await dispatcher.dispatch("topic1", [handler], self.topic1, PENDING)
+            await dispatcher.dispatch("topic1", [handler], self.topic1, SUBSCRIBED)
+        await dispatcher.dispatch("topic2", [handler], self.topic2, PENDING)
+        self.assertEqual(handler.changes, [])
+
+        # Only the latest state of each topic is delivered once the window elapsed
+        await asyncio.sleep(0.05)
+        await dispatcher.drain()
+        self.assertEqual(
+            handler.changes,
+            [(0x8000, SubscriptionStatus.State.SUBSCRIBED), (0x8001, SubscriptionStatus.State.SUBSCRIBE_PENDING)],
+        )
+        self.assertEqual(dispatcher.metrics["topic1"].suppressed, 9)
+        self.assertEqual(dispatcher.metrics["topic1"].dispatched, 1)
+        self.assertEqual(dispatcher.metrics["topic2"].suppressed, 0)
+
+        # A new window starts with the next update, drain does not wait for it to elapse
+        await dispatcher.dispatch("topic1", [handler], self.topic1, PENDING)
+        await dispatcher.drain()
+        self.assertEqual(handler.changes[-1], (0x8000, SubscriptionStatus.State.SUBSCRIBE_PENDING))
+        self.assertEqual(dispatcher.timers, {})
+
+    async def test_close_drops_coalesced_updates(self):
+        dispatcher = SubscriptionChangeDispatcher(coalesce_window=10)
+        handler = RecordingHandler()
+        await dispatcher.dispatch("topic1", [handler], self.topic1, SUBSCRIBED)
+        await dispatcher.close()
+        await asyncio.sleep(0.02)
+        self.assertEqual(handler.changes, [])
+        self.assertEqual(dispatcher.pending, {})
+
+    def test_negative_coalesce_window(self):
+        with self.assertRaises(ValueError):
+            SubscriptionChangeDispatcher(coalesce_window=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import os
+import tempfile
+import unittest
+
+from uprotocol.client.usubscription.v3.subscriptionsnapshotstore import SubscriptionSnapshotStore
+from uprotocol.core.usubscription.v3.usubscription_pb2 import SubscriptionStatus
+
+
+class TestSubscriptionSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "subscriptions.snapshot")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_constructor_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            SubscriptionSnapshotStore("")
+        with self.assertRaises(ValueError):
+            SubscriptionSnapshotStore(self.path, interval=0)
+
+    def test_save_and_load(self):
+        store = SubscriptionSnapshotStore(self.path)
+        subscriptions = {
+            "//neelam/3/1/8000": SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBED),
+            "//neelam/3/1/8001": SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBE_PENDING, message="wait"),
+        }
+        store.save(subscriptions)
+        self.assertEqual(store.load(), subscriptions)
+        store.save({})
+        self.assertEqual(store.load(), {})
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_load_missing_or_corrupt_snapshot(self):
+        store = SubscriptionSnapshotStore(self.path)
+        self.assertEqual(store.load(), {})
+        with open(self.path, "wb") as file:
+            file.write(b"\xff\xff\xff")
+        self.assertEqual(store.load(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,12 +12,15 @@ terms of the Apache License Version 2.0 which is available at
 SPDX-License-Identifier: Apache-2.0
 """
 
+import asyncio
 import threading
 from abc import ABC
 from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
+from uprotocol.communication.rpcclient import RpcClient
 from uprotocol.communication.upayload import UPayload
+from uprotocol.communication.ustatuserror import UStatusError
 from uprotocol.core.usubscription.v3.usubscription_pb2 import (
     SubscriptionRequest,
     SubscriptionResponse,
@@ -149,3 +152,35 @@ class EchoUTransport(MockUTransport):
 
         await self._notify_listeners(response)
         return UStatus(code=UCode.OK)
+
+
+class FakeRpcClient(RpcClient):
+    """
+    RpcClient echoing the request payload, for the tests of the RpcClient decorators. The outcome of the
+    invocations is set through the attributes: the delay before responding, the error raised or the code of the
+    UStatusError raised, and whether the invocations wait for the release event.
+    """
+
+    def __init__(self, code=UCode.OK, error=None, delay=0, blocking=False):
+        self.code = code
+        self.error = error
+        self.delay = delay
+        self.release = asyncio.Event() if blocking else None
+        self.invocations = 0
+        self.invoked = []
+
+    async def invoke_method(self, method_uri, request_payload, options=None):
+        self.invocations += 1
+        self.invoked.append((method_uri, options))
+        await asyncio.sleep(self.delay)
+        if self.release is not None:
+            await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        if self.code != UCode.OK:
+            raise UStatusError.from_code_message(self.code, "failed")
+        return request_payload
+
+
+def create_method_uri(resource_id=3):
+    return UUri(authority_name="neelam", ue_id=10, ue_version_major=1, resource_id=resource_id)
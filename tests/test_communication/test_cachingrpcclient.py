@@ -0,0 +1,150 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import unittest
+
+from tests.test_communication.mock_utransport import FakeRpcClient, create_method_uri
+from uprotocol.communication.cachingrpcclient import CacheInvalidationListener, CachingRpcClient
+from uprotocol.communication.calloptions import CallOptions
+from uprotocol.communication.upayload import UPayload
+from uprotocol.communication.ustatuserror import UStatusError
+from uprotocol.core.usubscription.v3.usubscription_pb2 import FetchSubscribersRequest, Update
+from uprotocol.transport.builder.umessagebuilder import UMessageBuilder
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.uri_pb2 import UUri
+
+
+class TestCachingRpcClient(unittest.IsolatedAsyncioTestCase):
+    def test_constructor_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            CachingRpcClient(None, [])
+        with self.assertRaises(ValueError):
+            CachingRpcClient(FakeRpcClient(), None)
+        with self.assertRaises(ValueError):
+            CachingRpcClient(FakeRpcClient(), [], ttl=0)
+        with self.assertRaises(ValueError):
+            CachingRpcClient(FakeRpcClient(), [], max_entries=0)
+        with self.assertRaises(ValueError):
+            CacheInvalidationListener(None)
+
+    async def test_response_is_served_from_cache(self):
+        delegate = FakeRpcClient()
+        rpc_client = CachingRpcClient(delegate, [create_method_uri()])
+        payload = UPayload.pack(UUri(authority_name="neelam"))
+        for _ in range(3):
+            self.assertEqual(await rpc_client.invoke_method(create_method_uri(), payload), payload)
+        self.assertEqual(delegate.invocations, 1)
+        self.assertEqual(rpc_client.stats.hits, 2)
+        self.assertEqual(rpc_client.stats.misses, 1)
+
+    async def test_methods_not_opted_in_are_not_cached(self):
+        delegate = FakeRpcClient()
+        rpc_client = CachingRpcClient(delegate, [create_method_uri()])
+        await rpc_client.invoke_method(create_method_uri(4), None)
+        await rpc_client.invoke_method(create_method_uri(4), None)
+        self.assertEqual(delegate.invocations, 2)
+        self.assertEqual(rpc_client.stats.misses, 0)
+
+    async def test_different_payloads_and_tokens_are_cached_separately(self):
+        delegate = FakeRpcClient()
+        rpc_client = CachingRpcClient(delegate, [create_method_uri()])
+        await rpc_client.invoke_method(create_method_uri(), UPayload.pack(UUri(authority_name="a")))
+        await rpc_client.invoke_method(create_method_uri(), UPayload.pack(UUri(authority_name="b")))
+        await rpc_client.invoke_method(
+            create_method_uri(), UPayload.pack(UUri(authority_name="b")), CallOptions(token="t")
+        )
+        self.assertEqual(delegate.invocations, 3)
+        self.assertEqual(len(rpc_client.entries), 3)
+
+    async def test_failures_are_not_cached(self):
+        delegate = FakeRpcClient(error=UStatusError.from_code_message(UCode.UNAVAILABLE, "down"))
+        rpc_client = CachingRpcClient(delegate, [create_method_uri()])
+        for _ in range(2):
+            with self.assertRaises(UStatusError):
+                await rpc_client.invoke_method(create_method_uri(), None)
+        self.assertEqual(delegate.invocations, 2)
+        self.assertEqual(len(rpc_client.entries), 0)
+
+    async def test_expired_response_is_refreshed(self):
+        delegate = FakeRpcClient()
+        rpc_client = CachingRpcClient(delegate, [create_method_uri()], ttl=10)
+        await rpc_client.invoke_method(create_method_uri(), None)
+        await asyncio.sleep(0.02)
+        await rpc_client.invoke_method(create_method_uri(), None)
+        self.assertEqual(delegate.invocations, 2)
+        self.assertEqual(rpc_client.stats.expirations, 1)
+
+    async def test_least_recently_used_response_is_evicted(self):
+        delegate = FakeRpcClient()
+        rpc_client = CachingRpcClient(delegate, [create_method_uri()], max_entries=2)
+        payloads = [UPayload.pack(UUri(resource_id=i)) for i in range(1, 4)]
+        await rpc_client.invoke_method(create_method_uri(), payloads[0])
+        await rpc_client.invoke_method(create_method_uri(), payloads[1])
+        await rpc_client.invoke_method(create_method_uri(), payloads[0])
+        await rpc_client.invoke_method(create_method_uri(), payloads[2])
+        self.assertEqual(rpc_client.stats.evictions, 1)
+        await rpc_client.invoke_method(create_method_uri(), payloads[0])
+        self.assertEqual(delegate.invocations, 3)
+        await rpc_client.invoke_method(create_method_uri(), payloads[1])
+        self.assertEqual(delegate.invocations, 4)
+
+    async def test_invalidate(self):
+        delegate = FakeRpcClient()
+        rpc_client = CachingRpcClient(delegate, [create_method_uri(), create_method_uri(4)])
+        payload = UPayload.pack(UUri(authority_name="a"))
+        await rpc_client.invoke_method(create_method_uri(), payload)
+        await rpc_client.invoke_method(create_method_uri(), payload, CallOptions(token="t"))
+        await rpc_client.invoke_method(create_method_uri(), None)
+        await rpc_client.invoke_method(create_method_uri(4), None)
+        self.assertEqual(rpc_client.invalidate(create_method_uri(), payload), 2)
+        self.assertEqual(rpc_client.invalidate(create_method_uri()), 1)
+        self.assertEqual(rpc_client.invalidate(), 1)
+        self.assertEqual(rpc_client.stats.invalidations, 4)
+
+    async def test_response_requested_before_invalidation_is_not_cached(self):
+        delegate = FakeRpcClient(delay=0.01)
+        rpc_client = CachingRpcClient(delegate, [create_method_uri()])
+        invocation = asyncio.ensure_future(rpc_client.invoke_method(create_method_uri(), None))
+        await asyncio.sleep(0)
+        rpc_client.invalidate()
+        await invocation
+        self.assertEqual(len(rpc_client.entries), 0)
+
+    async def test_invalidation_listener_driven_by_subscription_update(self):
+        delegate = FakeRpcClient()
+        fetch_subscribers_uri = create_method_uri(8)
+        rpc_client = CachingRpcClient(delegate, [fetch_subscribers_uri])
+        topic_a = UUri(ue_id=4, ue_version_major=1, resource_id=0x8000)
+        topic_b = UUri(ue_id=4, ue_version_major=1, resource_id=0x8001)
+        await rpc_client.invoke_method(fetch_subscribers_uri, UPayload.pack(FetchSubscribersRequest(topic=topic_a)))
+        await rpc_client.invoke_method(fetch_subscribers_uri, UPayload.pack(FetchSubscribersRequest(topic=topic_b)))
+
+        def request_for(message):
+            update = UPayload.unpack_data_format(message.payload, message.attributes.payload_format, Update)
+            return UPayload.pack(FetchSubscribersRequest(topic=update.topic))
+
+        listener = CacheInvalidationListener(rpc_client, fetch_subscribers_uri, request_for)
+        notification = UMessageBuilder.notification(create_method_uri(0x8000), UUri(ue_id=4)).build_from_upayload(
+            UPayload.pack(Update(topic=topic_a))
+        )
+        await listener.on_receive(notification)
+        self.assertEqual(len(rpc_client.entries), 1)
+
+        await CacheInvalidationListener(rpc_client).on_receive(notification)
+        self.assertEqual(len(rpc_client.entries), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
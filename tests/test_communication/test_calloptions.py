@@ -15,6 +15,7 @@ SPDX-License-Identifier: Apache-2.0
 import unittest
 
 from uprotocol.communication.calloptions import CallOptions
+from uprotocol.communication.hedgingpolicy import HedgingPolicy
 from uprotocol.v1.uattributes_pb2 import (
     UPriority,
 )
@@ -100,6 +101,16 @@ class TestCallOptions(unittest.TestCase):
         uri = UUri()
         self.assertNotEqual(options, uri)
 
+    def test_build_call_options_with_hedging(self):
+        """Test building a CallOptions with a hedging policy"""
+        options = CallOptions(timeout=1000, hedging=HedgingPolicy(delay=50, alternate_authority="replica"))
+        self.assertIsNone(CallOptions.DEFAULT.hedging)
+        self.assertEqual(50, options.hedging.delay)
+        self.assertNotEqual(options, CallOptions(timeout=1000))
+        self.assertEqual(
+            hash(options), hash(CallOptions(timeout=1000, hedging=HedgingPolicy(50, alternate_authority="replica")))
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
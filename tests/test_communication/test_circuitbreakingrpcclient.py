@@ -0,0 +1,145 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import unittest
+
+from tests.test_communication.mock_utransport import FakeRpcClient, create_method_uri
+from uprotocol.communication.circuitbreakingrpcclient import CircuitBreaker, CircuitBreakingRpcClient, CircuitState
+from uprotocol.communication.upayload import UPayload
+from uprotocol.communication.ustatuserror import UStatusError
+from uprotocol.v1.ucode_pb2 import UCode
+
+
+class TestCircuitBreakingRpcClient(unittest.IsolatedAsyncioTestCase):
+    async def invoke(self, rpc_client, times, resource_id=3):
+        for _ in range(times):
+            try:
+                await rpc_client.invoke_method(create_method_uri(resource_id), UPayload.EMPTY)
+            except UStatusError:
+                pass
+
+    def test_constructor_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            CircuitBreakingRpcClient(None)
+        with self.assertRaises(ValueError):
+            CircuitBreakingRpcClient(FakeRpcClient(), failure_rate_threshold=0)
+        with self.assertRaises(ValueError):
+            CircuitBreakingRpcClient(FakeRpcClient(), window_size=5, minimum_calls=10)
+        with self.assertRaises(ValueError):
+            CircuitBreakingRpcClient(FakeRpcClient(), open_duration=-1)
+        with self.assertRaises(ValueError):
+            CircuitBreakingRpcClient(FakeRpcClient(), half_open_calls=0)
+
+    async def test_circuit_opens_and_fails_fast(self):
+        delegate = FakeRpcClient(code=UCode.UNAVAILABLE)
+        transitions = []
+        rpc_client = CircuitBreakingRpcClient(
+            delegate, window_size=4, minimum_calls=4, on_transition=lambda *args: transitions.append(args)
+        )
+        await self.invoke(rpc_client, 4)
+        self.assertEqual(rpc_client.get_state(create_method_uri()), CircuitState.OPEN)
+        with self.assertRaises(UStatusError) as context:
+            await rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY)
+        self.assertEqual(UCode.UNAVAILABLE, context.exception.get_code())
+        self.assertEqual(delegate.invocations, 4)
+        self.assertEqual(transitions, [("//neelam/A/1/3", CircuitState.CLOSED, CircuitState.OPEN)])
+        # Other methods are not affected
+        self.assertEqual(rpc_client.get_state(create_method_uri(4)), CircuitState.CLOSED)
+        await self.invoke(rpc_client, 1, resource_id=4)
+        self.assertEqual(delegate.invocations, 5)
+
+    async def test_application_errors_do_not_open_circuit(self):
+        delegate = FakeRpcClient(code=UCode.INVALID_ARGUMENT)
+        rpc_client = CircuitBreakingRpcClient(delegate, window_size=4, minimum_calls=4)
+        await self.invoke(rpc_client, 10)
+        self.assertEqual(rpc_client.get_state(create_method_uri()), CircuitState.CLOSED)
+
+    async def test_slow_calls_open_circuit(self):
+        delegate = FakeRpcClient(delay=0.02)
+        rpc_client = CircuitBreakingRpcClient(delegate, window_size=2, minimum_calls=2, slow_call_duration=10)
+        await self.invoke(rpc_client, 2)
+        self.assertEqual(rpc_client.get_state(create_method_uri()), CircuitState.OPEN)
+
+    async def test_circuit_closes_after_successful_trial(self):
+        delegate = FakeRpcClient(code=UCode.DEADLINE_EXCEEDED)
+        rpc_client = CircuitBreakingRpcClient(delegate, window_size=2, minimum_calls=2, open_duration=0)
+        await self.invoke(rpc_client, 2)
+        self.assertEqual(rpc_client.get_state(create_method_uri()), CircuitState.OPEN)
+
+        # The trial call fails and the circuit opens again
+        await self.invoke(rpc_client, 1)
+        self.assertEqual(rpc_client.get_state(create_method_uri()), CircuitState.OPEN)
+
+        delegate.code = UCode.OK
+        await rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY)
+        self.assertEqual(rpc_client.get_state(create_method_uri()), CircuitState.CLOSED)
+        self.assertEqual(rpc_client.breakers["//neelam/A/1/3"].transitions, 5)
+
+    async def test_half_open_rejects_beyond_trial_calls(self):
+        delegate = FakeRpcClient(code=UCode.UNAVAILABLE)
+        rpc_client = CircuitBreakingRpcClient(delegate, window_size=1, minimum_calls=1, open_duration=0)
+        await self.invoke(rpc_client, 1)
+        delegate.code = UCode.OK
+        delegate.delay = 0.05
+        trial = asyncio.ensure_future(rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY))
+        await asyncio.sleep(0.01)
+        self.assertEqual(rpc_client.get_state(create_method_uri()), CircuitState.HALF_OPEN)
+        with self.assertRaises(UStatusError):
+            await rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY)
+        self.assertEqual(rpc_client.breakers["//neelam/A/1/3"].rejected, 1)
+
+        # A cancelled trial call gives back its slot
+        trial.cancel()
+        await asyncio.gather(trial, return_exceptions=True)
+        delegate.delay = 0
+        await rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY)
+        self.assertEqual(rpc_client.get_state(create_method_uri()), CircuitState.CLOSED)
+
+    async def test_unexpected_error_ends_trial_call(self):
+        delegate = FakeRpcClient(code=UCode.UNAVAILABLE)
+        rpc_client = CircuitBreakingRpcClient(delegate, window_size=1, minimum_calls=1, open_duration=0)
+        await self.invoke(rpc_client, 1)
+        delegate.error = RuntimeError("broken")
+        with self.assertRaises(RuntimeError):
+            await rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY)
+        self.assertEqual(rpc_client.get_state(create_method_uri()), CircuitState.OPEN)
+
+        # The circuit is not stuck half-open, the next trial call goes through
+        delegate.error = None
+        delegate.code = UCode.OK
+        await rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY)
+        self.assertEqual(rpc_client.get_state(create_method_uri()), CircuitState.CLOSED)
+
+    def test_outcome_of_call_permitted_in_previous_state_is_ignored(self):
+        breaker = CircuitBreaker(0.5, 2, 2, 0, 1, None)
+        stale = breaker.try_acquire()
+        for _ in range(2):
+            breaker.on_result(breaker.try_acquire(), True, 0)
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+        trial = breaker.try_acquire()
+        self.assertEqual(breaker.state, CircuitState.HALF_OPEN)
+
+        # The call permitted while closed is not the trial call, neither its success nor its cancellation
+        # end the trial
+        breaker.on_result(stale, False, 0)
+        breaker.release(stale)
+        self.assertEqual(breaker.state, CircuitState.HALF_OPEN)
+        self.assertIsNone(breaker.try_acquire())
+        breaker.on_result(trial, False, 0)
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
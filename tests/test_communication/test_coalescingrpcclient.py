@@ -0,0 +1,98 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import unittest
+
+from tests.test_communication.mock_utransport import FakeRpcClient, MockUTransport, create_method_uri
+from uprotocol.communication.calloptions import CallOptions
+from uprotocol.communication.coalescingrpcclient import CoalescingRpcClient
+from uprotocol.communication.inmemoryrpcclient import InMemoryRpcClient
+from uprotocol.communication.upayload import UPayload
+from uprotocol.communication.ustatuserror import UStatusError
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.uri_pb2 import UUri
+
+
+class TestCoalescingRpcClient(unittest.IsolatedAsyncioTestCase):
+    def test_constructor_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            CoalescingRpcClient(None, [])
+        with self.assertRaises(ValueError):
+            CoalescingRpcClient(FakeRpcClient(), None)
+
+    async def test_concurrent_identical_invocations_are_coalesced(self):
+        delegate = FakeRpcClient(delay=0.01)
+        rpc_client = CoalescingRpcClient(delegate, [create_method_uri()])
+        payload = UPayload.pack(UUri(authority_name="neelam"))
+        responses = await asyncio.gather(*[rpc_client.invoke_method(create_method_uri(), payload) for _ in range(10)])
+        self.assertEqual(responses, [payload] * 10)
+        self.assertEqual(delegate.invocations, 1)
+        self.assertEqual(rpc_client.coalesced, 9)
+        self.assertEqual(len(rpc_client.in_flight), 0)
+
+    async def test_sequential_invocations_are_not_coalesced(self):
+        delegate = FakeRpcClient(delay=0.01)
+        rpc_client = CoalescingRpcClient(delegate, [create_method_uri()])
+        await rpc_client.invoke_method(create_method_uri(), None)
+        await rpc_client.invoke_method(create_method_uri(), None)
+        self.assertEqual(delegate.invocations, 2)
+
+    async def test_different_payloads_and_tokens_are_not_coalesced(self):
+        delegate = FakeRpcClient(delay=0.01)
+        rpc_client = CoalescingRpcClient(delegate, [create_method_uri()])
+        await asyncio.gather(
+            rpc_client.invoke_method(create_method_uri(), UPayload.pack(UUri(authority_name="a"))),
+            rpc_client.invoke_method(create_method_uri(), UPayload.pack(UUri(authority_name="b"))),
+            rpc_client.invoke_method(
+                create_method_uri(), UPayload.pack(UUri(authority_name="b")), CallOptions(token="t")
+            ),
+        )
+        self.assertEqual(delegate.invocations, 3)
+
+    async def test_methods_not_opted_in_are_passed_through(self):
+        delegate = FakeRpcClient(delay=0.01)
+        rpc_client = CoalescingRpcClient(delegate, [create_method_uri(1)])
+        await asyncio.gather(*[rpc_client.invoke_method(create_method_uri(2), None) for _ in range(3)])
+        self.assertEqual(delegate.invocations, 3)
+
+    async def test_failure_is_shared(self):
+        error = UStatusError.from_code_message(UCode.UNAVAILABLE, "Service unavailable")
+        delegate = FakeRpcClient(error=error, delay=0.01)
+        rpc_client = CoalescingRpcClient(delegate, [create_method_uri()])
+        results = await asyncio.gather(
+            *[rpc_client.invoke_method(create_method_uri(), None) for _ in range(3)], return_exceptions=True
+        )
+        self.assertEqual(results, [error] * 3)
+        self.assertEqual(delegate.invocations, 1)
+
+    async def test_cancelled_caller_does_not_cancel_shared_request(self):
+        delegate = FakeRpcClient(delay=0.01)
+        rpc_client = CoalescingRpcClient(delegate, [create_method_uri()])
+        first = asyncio.ensure_future(rpc_client.invoke_method(create_method_uri(), None))
+        second = asyncio.ensure_future(rpc_client.invoke_method(create_method_uri(), None))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertIsNone(await second)
+        self.assertEqual(delegate.invocations, 1)
+
+    async def test_with_in_memory_rpc_client(self):
+        payload = UPayload.pack_to_any(UUri())
+        rpc_client = CoalescingRpcClient(InMemoryRpcClient(MockUTransport()), [create_method_uri()])
+        responses = await asyncio.gather(*[rpc_client.invoke_method(create_method_uri(), payload) for _ in range(3)])
+        self.assertEqual(responses, [payload] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
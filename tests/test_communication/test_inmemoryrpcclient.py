@@ -12,25 +12,74 @@ terms of the Apache License Version 2.0 which is available at
 SPDX-License-Identifier: Apache-2.0
 """
 
+import asyncio
 import unittest
 
 from tests.test_communication.mock_utransport import (
     CommStatusTransport,
     CommStatusUCodeOKTransport,
+    ErrorUTransport,
     MockUTransport,
     TimeoutUTransport,
 )
 from uprotocol.communication.calloptions import CallOptions
+from uprotocol.communication.hedgingpolicy import HedgingPolicy
 from uprotocol.communication.inmemoryrpcclient import InMemoryRpcClient
+from uprotocol.communication.retrypolicy import RetryBudget, RetryPolicy
+from uprotocol.communication.streamcredit import StreamCredit
 from uprotocol.communication.upayload import UPayload
 from uprotocol.communication.ustatuserror import UStatusError
 from uprotocol.transport.utransport import UTransport
-from uprotocol.v1.uattributes_pb2 import UPriority
+from uprotocol.uri.serializer.uriserializer import UriSerializer
+from uprotocol.uuid.serializer.uuidserializer import UuidSerializer
+from uprotocol.v1.uattributes_pb2 import UAttributes, UMessageType, UPriority
 from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.umessage_pb2 import UMessage
 from uprotocol.v1.uri_pb2 import UUri
 from uprotocol.v1.ustatus_pb2 import UStatus
 
 
+class SlowReplicaUTransport(MockUTransport):
+    def __init__(self, delays):
+        super().__init__()
+        self.delays = delays
+        self.requests = []
+
+    async def send(self, message):
+        self.requests.append(message)
+        delay = self.delays.get(message.attributes.sink.authority_name)
+        if delay is not None:
+            asyncio.get_running_loop().call_later(
+                delay, lambda: asyncio.ensure_future(self._notify_listeners(self.build_response(message)))
+            )
+        return UStatus(code=UCode.OK)
+
+
+class FlakyUTransport(MockUTransport):
+    def __init__(self, failures, code=UCode.UNAVAILABLE):
+        super().__init__()
+        self.failures = failures
+        self.code = code
+        self.attempts = 0
+
+    async def send(self, message):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            return UStatus(code=self.code)
+        return await super().send(message)
+
+
+class SlowRegistrationUTransport(MockUTransport):
+    def __init__(self):
+        super().__init__()
+        self.registrations = 0
+
+    async def register_listener(self, source, listener, sink=None):
+        self.registrations += 1
+        await asyncio.sleep(0.01)
+        return await super().register_listener(source, listener, sink)
+
+
 class TestInMemoryRpcClient(unittest.IsolatedAsyncioTestCase):
     @staticmethod
     def create_method_uri():
@@ -98,6 +147,108 @@ class TestInMemoryRpcClient(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(payload, response2)
         rpc_client.close()
 
+    async def test_concurrent_first_invocations_share_registration(self):
+        transport = SlowRegistrationUTransport()
+        rpc_client = InMemoryRpcClient(transport)
+        payload = UPayload.pack_to_any(UUri())
+        responses = await asyncio.gather(
+            *[rpc_client.invoke_method(self.create_method_uri(), payload) for _ in range(5)]
+        )
+        self.assertEqual(responses, [payload] * 5)
+        self.assertEqual(transport.registrations, 1)
+        self.assertEqual(len(transport.listeners), 1)
+
+    async def test_start_registers_listener_before_first_invocation(self):
+        transport = SlowRegistrationUTransport()
+        rpc_client = InMemoryRpcClient(transport)
+        await asyncio.gather(rpc_client.start(), rpc_client.start())
+        self.assertTrue(rpc_client.is_listener_registered)
+        self.assertEqual(rpc_client.source, transport.get_source())
+        await rpc_client.invoke_method(self.create_method_uri(), None)
+        self.assertEqual(transport.registrations, 1)
+
+    async def test_start_failure_can_be_retried(self):
+        transport = ErrorUTransport()
+        rpc_client = InMemoryRpcClient(transport)
+        for _ in range(2):
+            with self.assertRaises(UStatusError) as context:
+                await rpc_client.start()
+            self.assertEqual(UCode.FAILED_PRECONDITION, context.exception.get_code())
+        self.assertFalse(rpc_client.is_listener_registered)
+        self.assertIsNone(rpc_client.registration)
+
+    async def test_async_context_manager(self):
+        transport = MockUTransport()
+        async with InMemoryRpcClient(transport) as rpc_client:
+            self.assertEqual(len(transport.listeners), 1)
+            await rpc_client.invoke_method(self.create_method_uri(), None)
+        await asyncio.sleep(0)
+        self.assertEqual(len(transport.listeners), 0)
+        self.assertFalse(rpc_client.is_listener_registered)
+
+    async def test_aclose_drains_invocations_in_flight(self):
+        transport = SlowReplicaUTransport({"neelam": 0.02})
+        rpc_client = InMemoryRpcClient(transport)
+        payload = UPayload.pack_to_any(UUri())
+        invocation = asyncio.ensure_future(rpc_client.invoke_method(self.create_method_uri(), payload))
+        await asyncio.sleep(0)
+        await rpc_client.aclose()
+        self.assertEqual(await invocation, payload)
+        self.assertEqual(len(transport.listeners), 0)
+        with self.assertRaises(UStatusError) as context:
+            await rpc_client.invoke_method(self.create_method_uri(), payload)
+        self.assertEqual(UCode.UNAVAILABLE, context.exception.get_code())
+
+    async def test_start_after_aclose(self):
+        transport = MockUTransport()
+        rpc_client = InMemoryRpcClient(transport)
+        async with rpc_client:
+            self.assertTrue(rpc_client.is_listener_registered)
+        # Closing is terminal, the client is not started again
+        with self.assertRaises(UStatusError) as context:
+            await rpc_client.start()
+        self.assertEqual(UCode.UNAVAILABLE, context.exception.get_code())
+        self.assertFalse(rpc_client.is_listener_registered)
+        self.assertEqual(len(transport.listeners), 0)
+
+    async def test_aclose_fails_invocations_still_in_flight_after_drain_timeout(self):
+        rpc_client = InMemoryRpcClient(TimeoutUTransport())
+        invocation = asyncio.ensure_future(rpc_client.invoke_method(self.create_method_uri(), None))
+        stream = rpc_client.invoke_streaming(self.create_method_uri(), None)
+        streamed = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.01)
+        await rpc_client.aclose(drain_timeout=10)
+        for pending in (invocation, streamed):
+            with self.assertRaises(UStatusError) as context:
+                await pending
+            self.assertEqual(UCode.UNAVAILABLE, context.exception.get_code())
+        self.assertEqual(rpc_client.pending, 0)
+
+    async def test_aclose_ends_stream_after_buffered_chunks(self):
+        transport = TimeoutUTransport()
+        rpc_client = InMemoryRpcClient(transport)
+        stream = rpc_client.invoke_streaming(self.create_method_uri(), None, max_buffered_chunks=1)
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.01)
+        request_id = UuidSerializer.deserialize(next(iter(rpc_client.streams)))
+        # More chunks than the window, none of them waits in the transport
+        for resource_id in range(1, 4):
+            response = UMessage(
+                attributes=UAttributes(
+                    type=UMessageType.UMESSAGE_TYPE_RESPONSE,
+                    source=StreamCredit.get_stream_uri(self.create_method_uri()),
+                    reqid=request_id,
+                ),
+                payload=UUri(resource_id=resource_id).SerializeToString(),
+            )
+            await asyncio.wait_for(rpc_client.response_handler.on_receive(response), 1)
+        await rpc_client.aclose(drain_timeout=10)
+        chunks = [await first, await stream.__anext__(), await stream.__anext__()]
+        self.assertEqual([UUri.FromString(chunk.data).resource_id for chunk in chunks], [1, 2, 3])
+        with self.assertRaises(UStatusError) as context:
+            await stream.__anext__()
+        self.assertEqual(UCode.UNAVAILABLE, context.exception.get_code())
+
     async def test_invoke_method_with_comm_status_transport(self):
         rpc_client = InMemoryRpcClient(CommStatusTransport())
         payload = UPayload.pack_to_any(UUri())
@@ -124,6 +275,175 @@ class TestInMemoryRpcClient(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(UCode.FAILED_PRECONDITION, context.exception.status.code)
 
+    async def test_invoke_streaming_with_timeout_transport(self):
+        options = CallOptions(100, UPriority.UPRIORITY_CS5, "token")
+        rpc_client = InMemoryRpcClient(TimeoutUTransport())
+        with self.assertRaises(UStatusError) as context:
+            async for _ in rpc_client.invoke_streaming(self.create_method_uri(), None, options):
+                pass
+        self.assertEqual(UCode.DEADLINE_EXCEEDED, context.exception.status.code)
+        self.assertEqual(len(rpc_client.streams), 0)
+
+    async def test_invoke_streaming_with_unary_comm_status_ok_response(self):
+        rpc_client = InMemoryRpcClient(CommStatusUCodeOKTransport())
+        responses = [payload async for payload in rpc_client.invoke_streaming(self.create_method_uri(), None)]
+        self.assertEqual(len(responses), 1)
+        self.assertEqual(UCode.OK, UPayload.unpack(responses[0], UStatus).code)
+
+    async def test_invoke_streaming_with_comm_status_transport(self):
+        rpc_client = InMemoryRpcClient(CommStatusTransport())
+        with self.assertRaises(UStatusError) as context:
+            async for _ in rpc_client.invoke_streaming(self.create_method_uri(), None):
+                pass
+        self.assertEqual(UCode.FAILED_PRECONDITION, context.exception.status.code)
+
+    async def test_invoke_streaming_with_error_transport(self):
+        class ErrorUTransport(MockUTransport):
+            async def send(self, message):
+                return UStatus(code=UCode.FAILED_PRECONDITION)
+
+        rpc_client = InMemoryRpcClient(ErrorUTransport())
+        with self.assertRaises(UStatusError) as context:
+            async for _ in rpc_client.invoke_streaming(self.create_method_uri(), None):
+                pass
+        self.assertEqual(UCode.FAILED_PRECONDITION, context.exception.status.code)
+
+    async def test_invoke_method_hedged_to_alternate_authority(self):
+        transport = SlowReplicaUTransport({"neelam": 1.0, "replica": 0.01})
+        rpc_client = InMemoryRpcClient(transport)
+        payload = UPayload.pack_to_any(UUri())
+        options = CallOptions(2000, hedging=HedgingPolicy(delay=20, alternate_authority="replica"))
+        response = await rpc_client.invoke_method(self.create_method_uri(), payload, options)
+        self.assertEqual(response, payload)
+        self.assertEqual([r.attributes.sink.authority_name for r in transport.requests], ["neelam", "replica"])
+        self.assertNotEqual(transport.requests[0].attributes.id, transport.requests[1].attributes.id)
+        self.assertLessEqual(transport.requests[1].attributes.ttl, 1980)
+        # The losing request was cancelled and cleaned up
+        self.assertEqual(len(rpc_client.requests), 0)
+
+    async def test_invoke_method_hedge_not_sent_when_primary_is_fast(self):
+        transport = SlowReplicaUTransport({"neelam": 0.0})
+        rpc_client = InMemoryRpcClient(transport)
+        options = CallOptions(2000, hedging=HedgingPolicy(delay=500, alternate_authority="replica"))
+        await rpc_client.invoke_method(self.create_method_uri(), None, options)
+        self.assertEqual(len(transport.requests), 1)
+        self.assertEqual(len(rpc_client.latencies[UriSerializer.serialize(self.create_method_uri())]), 1)
+
+    async def test_invoke_method_hedged_to_alternate_method_uri(self):
+        alternate = UUri(authority_name="replica", ue_id=11, ue_version_major=1, resource_id=3)
+        transport = SlowReplicaUTransport({"replica": 0.0})
+        rpc_client = InMemoryRpcClient(transport)
+        options = CallOptions(2000, hedging=HedgingPolicy(delay=10, alternate_method_uri=alternate))
+        await rpc_client.invoke_method(self.create_method_uri(), None, options)
+        self.assertEqual(transport.requests[1].attributes.sink, alternate)
+
+    async def test_invoke_method_hedged_both_time_out(self):
+        rpc_client = InMemoryRpcClient(SlowReplicaUTransport({}))
+        options = CallOptions(100, hedging=HedgingPolicy(delay=10, alternate_authority="replica"))
+        with self.assertRaises(UStatusError) as context:
+            await rpc_client.invoke_method(self.create_method_uri(), None, options)
+        self.assertEqual(UCode.DEADLINE_EXCEEDED, context.exception.status.code)
+        self.assertEqual(len(rpc_client.requests), 0)
+
+    async def test_invoke_method_hedged_after_percentile_delay(self):
+        transport = SlowReplicaUTransport({"neelam": 0.0015, "replica": 0.0})
+        rpc_client = InMemoryRpcClient(transport)
+        options = CallOptions(
+            2000, hedging=HedgingPolicy(1000, percentile=50, min_samples=5, alternate_authority="replica")
+        )
+        for _ in range(5):
+            await rpc_client.invoke_method(self.create_method_uri(), None, options)
+        self.assertEqual(len(transport.requests), 5)
+        # The primary becomes slower than the observed latencies, the hedge is sent after the percentile delay
+        transport.delays["neelam"] = 1.0
+        transport.requests.clear()
+        await asyncio.wait_for(rpc_client.invoke_method(self.create_method_uri(), None, options), 0.5)
+        self.assertEqual([r.attributes.sink.authority_name for r in transport.requests], ["neelam", "replica"])
+        self.assertLess(transport.requests[1].attributes.ttl, 2000)
+        self.assertEqual(len(rpc_client.requests), 0)
+
+    def test_hedging_delay_from_percentile(self):
+        rpc_client = InMemoryRpcClient(MockUTransport())
+        hedging = HedgingPolicy(delay=100, percentile=90, min_samples=10)
+        self.assertEqual(rpc_client._get_hedging_delay("method", hedging), 100)
+        for latency in range(1, 11):
+            rpc_client._record_latency("method", latency / 1000)
+        self.assertEqual(rpc_client._get_hedging_delay("method", hedging), 10)
+        # Fractions of milliseconds are rounded up
+        for _ in range(10):
+            rpc_client._record_latency("fractional", 0.0021)
+        self.assertEqual(rpc_client._get_hedging_delay("fractional", hedging), 3)
+
+    def test_hedging_policy_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            HedgingPolicy(delay=-1)
+        with self.assertRaises(ValueError):
+            HedgingPolicy(percentile=0)
+        with self.assertRaises(ValueError):
+            HedgingPolicy(min_samples=0)
+
+    async def test_invoke_method_retried_until_success(self):
+        transport = FlakyUTransport(2)
+        rpc_client = InMemoryRpcClient(transport)
+        payload = UPayload.pack_to_any(UUri())
+        options = CallOptions(2000, retry=RetryPolicy(max_attempts=3, initial_backoff=1))
+        self.assertEqual(await rpc_client.invoke_method(self.create_method_uri(), payload, options), payload)
+        self.assertEqual(transport.attempts, 3)
+
+    async def test_invoke_method_retry_gives_up_after_max_attempts(self):
+        transport = FlakyUTransport(5)
+        rpc_client = InMemoryRpcClient(transport)
+        options = CallOptions(2000, retry=RetryPolicy(max_attempts=2, initial_backoff=1))
+        with self.assertRaises(UStatusError) as context:
+            await rpc_client.invoke_method(self.create_method_uri(), None, options)
+        self.assertEqual(UCode.UNAVAILABLE, context.exception.get_code())
+        self.assertEqual(transport.attempts, 2)
+
+    async def test_invoke_method_non_retryable_code_is_not_retried(self):
+        transport = FlakyUTransport(1, UCode.PERMISSION_DENIED)
+        rpc_client = InMemoryRpcClient(transport)
+        options = CallOptions(2000, retry=RetryPolicy(initial_backoff=1))
+        with self.assertRaises(UStatusError) as context:
+            await rpc_client.invoke_method(self.create_method_uri(), None, options)
+        self.assertEqual(UCode.PERMISSION_DENIED, context.exception.get_code())
+        self.assertEqual(transport.attempts, 1)
+
+    async def test_invoke_method_retry_stops_when_budget_is_exhausted(self):
+        transport = FlakyUTransport(10)
+        rpc_client = InMemoryRpcClient(transport, retry_budget=RetryBudget(max_tokens=1, tokens_per_second=0))
+        options = CallOptions(2000, retry=RetryPolicy(max_attempts=5, initial_backoff=1))
+        with self.assertRaises(UStatusError):
+            await rpc_client.invoke_method(self.create_method_uri(), None, options)
+        self.assertEqual(transport.attempts, 2)
+        self.assertEqual(rpc_client.retry_budget.exhausted, 1)
+
+    async def test_invoke_method_retry_stops_before_deadline(self):
+        transport = FlakyUTransport(10)
+        rpc_client = InMemoryRpcClient(transport)
+        options = CallOptions(50, retry=RetryPolicy(max_attempts=5, initial_backoff=100, jitter=0))
+        with self.assertRaises(UStatusError):
+            await rpc_client.invoke_method(self.create_method_uri(), None, options)
+        self.assertEqual(transport.attempts, 1)
+
+    async def test_invoke_method_retry_after_attempt_timeout(self):
+        class SlowFirstUTransport(MockUTransport):
+            def __init__(self):
+                super().__init__()
+                self.attempts = 0
+
+            async def send(self, message):
+                self.attempts += 1
+                if self.attempts == 1:
+                    return UStatus(code=UCode.OK)
+                return await super().send(message)
+
+        transport = SlowFirstUTransport()
+        rpc_client = InMemoryRpcClient(transport)
+        payload = UPayload.pack_to_any(UUri())
+        options = CallOptions(2000, retry=RetryPolicy(attempt_timeout=20, initial_backoff=1))
+        self.assertEqual(await rpc_client.invoke_method(self.create_method_uri(), payload, options), payload)
+        self.assertEqual(transport.attempts, 2)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -12,8 +12,11 @@ terms of the Apache License Version 2.0 which is available at
 SPDX-License-Identifier: Apache-2.0
 """
 
+import asyncio
 import copy
+import tempfile
 import unittest
+import uuid
 from typing import Dict
 from unittest.mock import AsyncMock, MagicMock
 
@@ -22,12 +25,17 @@ from uprotocol.communication.calloptions import CallOptions
 from uprotocol.communication.inmemoryrpcclient import InMemoryRpcClient
 from uprotocol.communication.inmemoryrpcserver import InMemoryRpcServer
 from uprotocol.communication.requesthandler import RequestHandler
+from uprotocol.communication.streamcredit import StreamCredit
+from uprotocol.communication.streamingrequesthandler import StreamingRequestHandler
 from uprotocol.communication.upayload import UPayload
 from uprotocol.communication.ustatuserror import UStatusError
 from uprotocol.transport.builder.umessagebuilder import UMessageBuilder
+from uprotocol.transport.socketutransport import SocketUTransport
 from uprotocol.transport.ulistener import UListener
 from uprotocol.transport.utransport import UTransport
+from uprotocol.uri.factory.uri_factory import UriFactory
 from uprotocol.uri.serializer.uriserializer import UriSerializer
+from uprotocol.uri.validator.urivalidator import UriValidator
 from uprotocol.v1.ucode_pb2 import UCode
 from uprotocol.v1.umessage_pb2 import UMessage
 from uprotocol.v1.uri_pb2 import UUri
@@ -127,19 +135,19 @@ class TestInMemoryRpcServer(unittest.IsolatedAsyncioTestCase):
         listeners: Dict[str, UListener] = {}
 
         async def custom_register_listener_behavior(source: UUri, listener: UListener, sink: UUri = None) -> UStatus:
-            topic = UriSerializer().serialize(sink)
+            sink_filter = UriSerializer().serialize(sink)
 
-            if topic not in listeners:
-                listeners[topic] = listener
+            if sink_filter not in listeners:
+                listeners[sink_filter] = listener
             return UStatus(code=UCode.OK)
 
         self.mock_transport.register_listener = AsyncMock(side_effect=custom_register_listener_behavior)
         self.mock_transport.get_source.return_value = UUri(authority_name="Neelam", ue_id=4, ue_version_major=1)
 
         async def custom_send_behavior(message):
-            serialized_uri = UriSerializer().serialize(message.attributes.sink)
-            if serialized_uri in listeners:
-                await listeners[serialized_uri].on_receive(message)
+            for sink_filter, listener in listeners.items():
+                if UriValidator.matches(UriSerializer().deserialize(sink_filter), message.attributes.sink):
+                    await listener.on_receive(message)
             return UStatus(code=UCode.OK)
 
         self.mock_transport.send = AsyncMock(side_effect=custom_send_behavior)
@@ -168,6 +176,111 @@ class TestInMemoryRpcServer(unittest.IsolatedAsyncioTestCase):
         self.assertEqual((await self.mock_transport.send(request)).code, UCode.OK)
         mock_handler.handle_request.assert_called_once()
 
+    async def test_one_listener_per_entity(self):
+        self.mock_transport.register_listener = AsyncMock(return_value=UStatus(code=UCode.OK))
+        self.mock_transport.unregister_listener = AsyncMock(return_value=UStatus(code=UCode.OK))
+        server = InMemoryRpcServer(self.mock_transport)
+        methods = [UUri(authority_name="Neelam", ue_id=4, ue_version_major=1, resource_id=i) for i in range(1, 201)]
+        handlers = [MagicMock(spec=RequestHandler) for _ in methods]
+        for method, handler in zip(methods, handlers):
+            self.assertEqual((await server.register_request_handler(method, handler)).code, UCode.OK)
+        other_entity = UUri(authority_name="Neelam", ue_id=5, ue_version_major=1, resource_id=1)
+        self.assertEqual((await server.register_request_handler(other_entity, handlers[0])).code, UCode.OK)
+
+        self.assertEqual(self.mock_transport.register_listener.call_count, 2)
+        sink_filter = self.mock_transport.register_listener.call_args_list[0].args[2]
+        self.assertEqual(sink_filter, UUri(authority_name="Neelam", ue_id=4, ue_version_major=1, resource_id=0xFFFF))
+
+        for method, handler in zip(methods, handlers):
+            self.assertEqual((await server.unregister_request_handler(method, handler)).code, UCode.OK)
+        # The listener is unregistered with the last method of the entity
+        self.mock_transport.unregister_listener.assert_called_once_with(
+            UriFactory.ANY, server.request_handler, sink_filter
+        )
+
+    async def test_registering_request_handler_retried_after_transport_error(self):
+        self.mock_transport.register_listener = AsyncMock(return_value=UStatus(code=UCode.INTERNAL))
+        server = InMemoryRpcServer(self.mock_transport)
+        self.assertEqual(
+            (await server.register_request_handler(self.create_method_uri(), self.mock_handler)).code, UCode.INTERNAL
+        )
+        self.assertEqual(server.request_handlers, {})
+        self.mock_transport.register_listener = AsyncMock(return_value=UStatus(code=UCode.OK))
+        self.assertEqual(
+            (await server.register_request_handler(self.create_method_uri(), self.mock_handler)).code, UCode.OK
+        )
+
+    async def test_concurrent_registrations_share_the_entity_listener(self):
+        registered = asyncio.Event()
+
+        async def register_listener(source_filter, listener, sink_filter):
+            await registered.wait()
+            return UStatus(code=UCode.OK)
+
+        self.mock_transport.register_listener = AsyncMock(side_effect=register_listener)
+        server = InMemoryRpcServer(self.mock_transport)
+        methods = [UUri(authority_name="Neelam", ue_id=4, ue_version_major=1, resource_id=i) for i in range(1, 4)]
+        tasks = [
+            asyncio.ensure_future(server.register_request_handler(method, self.mock_handler)) for method in methods
+        ]
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.mock_transport.register_listener.call_count, 1)
+        # The handlers of the other methods are only added once the listener is registered
+        self.assertEqual(len(server.request_handlers[("Neelam", 4, 1)]), 1)
+        registered.set()
+        self.assertEqual([status.code for status in await asyncio.gather(*tasks)], [UCode.OK] * 3)
+        self.assertEqual(len(server.request_handlers[("Neelam", 4, 1)]), 3)
+        self.assertEqual(server.pending_registrations, {})
+
+    async def test_concurrent_registrations_fail_with_the_entity_listener(self):
+        registered = asyncio.Event()
+
+        async def register_listener(source_filter, listener, sink_filter):
+            await registered.wait()
+            return UStatus(code=UCode.INTERNAL, message="Listener rejected")
+
+        self.mock_transport.register_listener = AsyncMock(side_effect=register_listener)
+        server = InMemoryRpcServer(self.mock_transport)
+        methods = [UUri(authority_name="Neelam", ue_id=4, ue_version_major=1, resource_id=i) for i in range(1, 4)]
+        tasks = [
+            asyncio.ensure_future(server.register_request_handler(method, self.mock_handler)) for method in methods
+        ]
+        await asyncio.sleep(0.01)
+        registered.set()
+        self.assertEqual([status.code for status in await asyncio.gather(*tasks)], [UCode.INTERNAL] * 3)
+        self.assertEqual(self.mock_transport.register_listener.call_count, 1)
+        self.assertEqual(server.request_handlers, {})
+        self.assertEqual(server.pending_registrations, {})
+
+    async def test_unregistration_waits_for_the_entity_listener(self):
+        registered = asyncio.Event()
+        calls = []
+
+        async def register_listener(source_filter, listener, sink_filter):
+            await registered.wait()
+            calls.append("register")
+            return UStatus(code=UCode.OK)
+
+        async def unregister_listener(source_filter, listener, sink_filter):
+            calls.append("unregister")
+            return UStatus(code=UCode.OK)
+
+        self.mock_transport.register_listener = AsyncMock(side_effect=register_listener)
+        self.mock_transport.unregister_listener = AsyncMock(side_effect=unregister_listener)
+        server = InMemoryRpcServer(self.mock_transport)
+        method = self.create_method_uri()
+        registration = asyncio.ensure_future(server.register_request_handler(method, self.mock_handler))
+        await asyncio.sleep(0.01)
+        unregistration = asyncio.ensure_future(server.unregister_request_handler(method, self.mock_handler))
+        await asyncio.sleep(0.01)
+        self.assertEqual(calls, [])
+        registered.set()
+        self.assertEqual((await registration).code, UCode.OK)
+        self.assertEqual((await unregistration).code, UCode.OK)
+        # The listener is unregistered once it is registered rather than left behind without handlers
+        self.assertEqual(calls, ["register", "unregister"])
+        self.assertEqual(server.request_handlers, {})
+
     def test_rpcserver_constructor_transport_none(self):
         with self.assertRaises(ValueError) as context:
             InMemoryRpcServer(None)
@@ -199,6 +312,67 @@ class TestInMemoryRpcServer(unittest.IsolatedAsyncioTestCase):
         status = await transport.send(request)
         self.assertEqual(status.code, UCode.OK)
 
+    async def create_server_with_counting_handler(self, *args):
+        self.mock_transport.register_listener = AsyncMock(return_value=UStatus(code=UCode.OK))
+        self.mock_transport.send = AsyncMock(return_value=UStatus(code=UCode.OK))
+        self.mock_transport.get_source.return_value = UUri(authority_name="Neelam", ue_id=4, ue_version_major=1)
+        self.mock_handler.handle_request = MagicMock(side_effect=lambda message: UPayload.pack(UUri(resource_id=1)))
+        server = InMemoryRpcServer(self.mock_transport, *args)
+        await server.register_request_handler(self.create_method_uri(), self.mock_handler)
+        return server
+
+    def test_constructor_negative_max_cached_responses(self):
+        with self.assertRaises(ValueError):
+            InMemoryRpcServer(self.mock_transport, -1)
+
+    async def test_redelivered_request_replays_response(self):
+        server = await self.create_server_with_counting_handler(1000)
+        request = UMessageBuilder.request(self.mock_transport.get_source(), self.create_method_uri(), 1000).build()
+        await server.request_handler.on_receive(request)
+        await server.request_handler.on_receive(request)
+        self.mock_handler.handle_request.assert_called_once()
+        self.assertEqual(self.mock_transport.send.call_count, 2)
+        first, second = (call.args[0] for call in self.mock_transport.send.call_args_list)
+        self.assertEqual(first, second)
+        self.assertEqual(second.attributes.reqid, request.attributes.id)
+        self.assertEqual(server.request_handler.replayed, 1)
+
+        # A different request is handled
+        request = UMessageBuilder.request(self.mock_transport.get_source(), self.create_method_uri(), 1000).build()
+        await server.request_handler.on_receive(request)
+        self.assertEqual(self.mock_handler.handle_request.call_count, 2)
+
+    async def test_redelivered_request_handled_again_by_default(self):
+        server = await self.create_server_with_counting_handler()
+        request = UMessageBuilder.request(self.mock_transport.get_source(), self.create_method_uri(), 1000).build()
+        await server.request_handler.on_receive(request)
+        await server.request_handler.on_receive(request)
+        self.assertEqual(self.mock_handler.handle_request.call_count, 2)
+        self.assertEqual(len(server.request_handler.responses), 0)
+
+    async def test_redelivered_request_handled_again_after_ttl(self):
+        server = await self.create_server_with_counting_handler(1000)
+        request = UMessageBuilder.request(self.mock_transport.get_source(), self.create_method_uri(), 20).build()
+        await server.request_handler.on_receive(request)
+        await asyncio.sleep(0.03)
+        await server.request_handler.on_receive(request)
+        self.assertEqual(self.mock_handler.handle_request.call_count, 2)
+
+    async def test_cached_responses_are_bounded(self):
+        server = await self.create_server_with_counting_handler(2)
+        requests = [
+            UMessageBuilder.request(self.mock_transport.get_source(), self.create_method_uri(), 1000).build()
+            for _ in range(3)
+        ]
+        for request in requests:
+            await server.request_handler.on_receive(request)
+        self.assertEqual(len(server.request_handler.responses), 2)
+        # The oldest response was dropped, its request is handled again
+        await server.request_handler.on_receive(requests[0])
+        self.assertEqual(self.mock_handler.handle_request.call_count, 4)
+        await server.request_handler.on_receive(requests[2])
+        self.assertEqual(self.mock_handler.handle_request.call_count, 4)
+
     async def test_end_to_end_rpc_with_test_transport(self):
         class MyRequestHandler(RequestHandler):
             def handle_request(self, message: UMessage) -> UPayload:
@@ -215,6 +389,214 @@ class TestInMemoryRpcServer(unittest.IsolatedAsyncioTestCase):
         self.assertIsNotNone(response)
         self.assertEqual(response, UPayload.pack(UUri()))
 
+    async def test_end_to_end_streaming_rpc_with_test_transport(self):
+        class MyStreamingRequestHandler(StreamingRequestHandler):
+            async def handle_request(self, message: UMessage):
+                for resource_id in range(1, 6):
+                    yield UPayload.pack(UUri(resource_id=resource_id))
+
+        test_transport = EchoUTransport()
+        server = InMemoryRpcServer(test_transport)
+        method = self.create_method_uri()
+
+        self.assertEqual((await server.register_request_handler(method, MyStreamingRequestHandler())).code, UCode.OK)
+        rpc_client = InMemoryRpcClient(test_transport)
+        responses = [
+            UPayload.unpack(payload, UUri).resource_id
+            async for payload in rpc_client.invoke_streaming(method, None, CallOptions.DEFAULT, max_buffered_chunks=2)
+        ]
+        self.assertEqual(responses, [1, 2, 3, 4, 5])
+        self.assertEqual(len(rpc_client.streams), 0)
+
+    async def test_end_to_end_streaming_rpc_with_handler_exception(self):
+        class MyStreamingRequestHandler(StreamingRequestHandler):
+            async def handle_request(self, message: UMessage):
+                yield UPayload.pack(UUri(resource_id=1))
+                raise UStatusError.from_code_message(UCode.FAILED_PRECONDITION, "Not permitted")
+
+        test_transport = EchoUTransport()
+        server = InMemoryRpcServer(test_transport)
+        method = self.create_method_uri()
+
+        self.assertEqual((await server.register_request_handler(method, MyStreamingRequestHandler())).code, UCode.OK)
+        rpc_client = InMemoryRpcClient(test_transport)
+        responses = []
+        with self.assertRaises(UStatusError) as context:
+            async for payload in rpc_client.invoke_streaming(method, None, CallOptions.DEFAULT):
+                responses.append(payload)
+        self.assertEqual(len(responses), 1)
+        self.assertEqual(UCode.FAILED_PRECONDITION, context.exception.get_code())
+
+    async def test_streamed_response_follows_client_credits(self):
+        class MyStreamingRequestHandler(StreamingRequestHandler):
+            async def handle_request(self, message: UMessage):
+                for resource_id in range(20):
+                    yield UPayload.pack(UUri(resource_id=resource_id))
+
+        test_transport = EchoUTransport()
+        server = InMemoryRpcServer(test_transport)
+        method = self.create_method_uri()
+        await server.register_request_handler(method, MyStreamingRequestHandler())
+        rpc_client = InMemoryRpcClient(test_transport)
+        consumed = 0
+        async for _ in rpc_client.invoke_streaming(method, None, CallOptions.DEFAULT, max_buffered_chunks=4):
+            consumed += 1
+            await asyncio.sleep(0.001)
+            flows = list(server.request_handler.flows.values())
+            if flows:
+                # The server never runs more than the window ahead of the consumer
+                self.assertLessEqual(flows[0].sent, consumed + 4)
+        self.assertEqual(consumed, 20)
+        self.assertEqual(server.request_handler.flows, {})
+
+    async def test_slow_stream_consumer_does_not_block_other_responses(self):
+        class MyStreamingRequestHandler(StreamingRequestHandler):
+            async def handle_request(self, message: UMessage):
+                for resource_id in range(1, 11):
+                    yield UPayload.pack(UUri(resource_id=resource_id))
+
+        class MyRequestHandler(RequestHandler):
+            def handle_request(self, message: UMessage) -> UPayload:
+                return UPayload.pack_from_data_and_format(message.payload, message.attributes.payload_format)
+
+        with tempfile.TemporaryDirectory() as directory:
+            source = UUri(ue_id=4, ue_version_major=1)
+            transport = SocketUTransport(source, "test-" + uuid.uuid4().hex[:8], directory=directory)
+            try:
+                server = InMemoryRpcServer(transport)
+                streamed = UUri(ue_id=4, ue_version_major=1, resource_id=1)
+                unary = UUri(ue_id=4, ue_version_major=1, resource_id=2)
+                await server.register_request_handler(streamed, MyStreamingRequestHandler())
+                await server.register_request_handler(unary, MyRequestHandler())
+                rpc_client = InMemoryRpcClient(transport)
+                options = CallOptions(1000)
+                responses = []
+                # Every chunk waits for a unary call made on the same transport
+                async for payload in rpc_client.invoke_streaming(streamed, None, options, max_buffered_chunks=2):
+                    responses.append(await rpc_client.invoke_method(unary, payload, options))
+                self.assertEqual(
+                    [UPayload.unpack(response, UUri).resource_id for response in responses], list(range(1, 11))
+                )
+            finally:
+                await transport.close()
+
+    async def test_streaming_rpc_consumer_stops_early(self):
+        class MyStreamingRequestHandler(StreamingRequestHandler):
+            async def handle_request(self, message: UMessage):
+                for resource_id in range(100):
+                    yield UPayload.pack(UUri(resource_id=resource_id))
+
+        test_transport = EchoUTransport()
+        server = InMemoryRpcServer(test_transport)
+        method = self.create_method_uri()
+        await server.register_request_handler(method, MyStreamingRequestHandler())
+        rpc_client = InMemoryRpcClient(test_transport)
+        stream = rpc_client.invoke_streaming(method, None, CallOptions.DEFAULT, max_buffered_chunks=1)
+        async for _ in stream:
+            break
+        await stream.aclose()
+        self.assertEqual(len(rpc_client.streams), 0)
+        await asyncio.gather(*server.request_handler.streams)
+        self.assertEqual(len(server.request_handler.streams), 0)
+
+    async def test_streaming_rpc_with_unary_handler(self):
+        class MyRequestHandler(RequestHandler):
+            def __init__(self):
+                self.calls = 0
+
+            def handle_request(self, message: UMessage) -> UPayload:
+                self.calls += 1
+                return UPayload.pack(UUri(resource_id=1))
+
+        handler = MyRequestHandler()
+        test_transport = EchoUTransport()
+        server = InMemoryRpcServer(test_transport)
+        method = self.create_method_uri()
+        await server.register_request_handler(method, handler)
+        rpc_client = InMemoryRpcClient(test_transport)
+        # The credits are not requests of the method and its single response ends the stream
+        responses = [payload async for payload in rpc_client.invoke_streaming(method, None, CallOptions(1000))]
+        self.assertEqual(responses, [UPayload.pack(UUri(resource_id=1))])
+        self.assertEqual(handler.calls, 1)
+        self.assertEqual(len(rpc_client.streams), 0)
+
+    async def test_request_with_credit_payload_is_handled(self):
+        class MyRequestHandler(RequestHandler):
+            def handle_request(self, message: UMessage) -> UPayload:
+                return UPayload.pack_from_data_and_format(message.payload, message.attributes.payload_format)
+
+        class MyStreamingRequestHandler(StreamingRequestHandler):
+            async def handle_request(self, message: UMessage):
+                yield UPayload.pack_from_data_and_format(message.payload, message.attributes.payload_format)
+
+        test_transport = EchoUTransport()
+        server = InMemoryRpcServer(test_transport)
+        unary = self.create_method_uri()
+        streamed = UUri(authority_name="Neelam", ue_id=4, ue_version_major=1, resource_id=4)
+        await server.register_request_handler(unary, MyRequestHandler())
+        await server.register_request_handler(streamed, MyStreamingRequestHandler())
+        rpc_client = InMemoryRpcClient(test_transport)
+        # A request that looks like a credit is a request when it is sent to a method
+        payload = StreamCredit("stream", 0, 4).to_payload()
+        self.assertEqual(await rpc_client.invoke_method(unary, payload, CallOptions(1000)), payload)
+        responses = [chunk async for chunk in rpc_client.invoke_streaming(streamed, payload, CallOptions(1000))]
+        self.assertEqual(responses, [payload])
+
+    async def test_register_request_handler_for_stream_resource(self):
+        server = InMemoryRpcServer(self.mock_transport)
+        method = UUri(authority_name="Neelam", ue_id=4, ue_version_major=1, resource_id=StreamCredit.RESOURCE_ID)
+        status = await server.register_request_handler(method, self.mock_handler)
+        self.assertEqual(status.code, UCode.INVALID_ARGUMENT)
+        self.mock_transport.register_listener.assert_not_called()
+
+    async def test_aclose_rejects_new_requests_and_unregisters_listener(self):
+        transport = EchoUTransport()
+        server = InMemoryRpcServer(transport)
+        handler = MagicMock(spec=RequestHandler)
+        handler.handle_request = MagicMock(return_value=UPayload.EMPTY)
+        await server.register_request_handler(self.create_method_uri(), handler)
+        rpc_client = InMemoryRpcClient(transport)
+        await rpc_client.start()
+        server.request_handler.closing = True
+        with self.assertRaises(UStatusError) as context:
+            await rpc_client.invoke_method(self.create_method_uri(), None)
+        self.assertEqual(UCode.UNAVAILABLE, context.exception.get_code())
+        handler.handle_request.assert_not_called()
+        await server.aclose()
+        self.assertEqual(server.request_handlers, {})
+        self.assertNotIn(server.request_handler, transport.listeners)
+
+    async def test_aclose_drains_streamed_responses(self):
+        class MyStreamingRequestHandler(StreamingRequestHandler):
+            def __init__(self, delay):
+                self.delay = delay
+
+            async def handle_request(self, message: UMessage):
+                for resource_id in range(1, 4):
+                    await asyncio.sleep(self.delay)
+                    yield UPayload.pack(UUri(resource_id=resource_id))
+
+        for delay, drain_timeout, expected_code in ((0.001, 1000, None), (1, 10, UCode.UNAVAILABLE)):
+            test_transport = EchoUTransport()
+            server = InMemoryRpcServer(test_transport)
+            method = self.create_method_uri()
+            await server.register_request_handler(method, MyStreamingRequestHandler(delay))
+            rpc_client = InMemoryRpcClient(test_transport)
+
+            async def consume():
+                return [payload async for payload in rpc_client.invoke_streaming(method, None)]
+
+            stream = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.01)
+            await server.aclose(drain_timeout)
+            if expected_code is None:
+                self.assertEqual(len(await stream), 3)
+            else:
+                with self.assertRaises(UStatusError) as context:
+                    await stream
+                self.assertEqual(expected_code, context.exception.get_code())
+            self.assertEqual(len(server.request_handler.streams), 0)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,104 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import unittest
+
+from uprotocol.communication.latestvaluecache import LatestValueCache
+from uprotocol.transport.builder.umessagebuilder import UMessageBuilder
+from uprotocol.transport.localutransport import LocalBroker, LocalUTransport
+from uprotocol.uri.factory.uri_factory import UriFactory
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+from uprotocol.v1.ustatus_pb2 import UStatus
+
+SPEED = UUri(ue_id=4, ue_version_major=1, resource_id=0x8000)
+RPM = UUri(ue_id=4, ue_version_major=1, resource_id=0x8001)
+PUBLISHER = UUri(ue_id=4, ue_version_major=1)
+SUBSCRIBER = UUri(ue_id=10, ue_version_major=1)
+
+
+def publish(topic: UUri, value: int) -> UMessage:
+    message = UMessageBuilder.publish(topic).build()
+    message.payload = bytes([value])
+    return message
+
+
+class RejectingUTransport(LocalUTransport):
+    async def register_listener(self, source_filter, listener, sink_filter=UriFactory.ANY):
+        if source_filter.resource_id == RPM.resource_id:
+            return UStatus(code=UCode.PERMISSION_DENIED)
+        return await super().register_listener(source_filter, listener, sink_filter)
+
+
+class TestLatestValueCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.broker = LocalBroker()
+        self.publisher = LocalUTransport(self.broker, PUBLISHER)
+
+    async def test_keeps_latest_value_per_topic(self):
+        topics = UUri(ue_id=4, ue_version_major=1, resource_id=UriFactory.WILDCARD_RESOURCE_ID)
+        cache = LatestValueCache(LocalUTransport(self.broker, SUBSCRIBER), [topics, topics])
+        self.assertEqual((await cache.start()).code, UCode.OK)
+        self.assertEqual(len(self.broker.listeners), 1)
+        self.assertIsNone(cache.get(SPEED))
+
+        for value in range(100):
+            await self.publisher.send(publish(SPEED, value))
+        await self.publisher.send(publish(RPM, 7))
+        self.assertEqual(cache.get(SPEED).payload, bytes([99]))
+        self.assertEqual(cache.get(RPM).payload, bytes([7]))
+        self.assertEqual(len(cache), 2)
+
+        await cache.close()
+        self.assertEqual(len(self.broker.listeners), 0)
+        await self.publisher.send(publish(SPEED, 1))
+        self.assertEqual(cache.get(SPEED).payload, bytes([99]))
+
+    async def test_readers_wait_for_the_next_value(self):
+        cache = LatestValueCache(LocalUTransport(self.broker, SUBSCRIBER), [SPEED, RPM])
+        await cache.start()
+        await self.publisher.send(publish(SPEED, 1))
+        readers = [asyncio.ensure_future(cache.changed(SPEED)) for _ in range(10)]
+        rpm_reader = asyncio.ensure_future(cache.changed(RPM))
+        await asyncio.sleep(0)
+        self.assertFalse(any(reader.done() for reader in readers))
+
+        await self.publisher.send(publish(SPEED, 2))
+        for message in await asyncio.wait_for(asyncio.gather(*readers), 1):
+            self.assertEqual(message.payload, bytes([2]))
+        self.assertFalse(rpm_reader.done())
+        await self.publisher.send(publish(RPM, 3))
+        self.assertEqual((await asyncio.wait_for(rpm_reader, 1)).payload, bytes([3]))
+        self.assertEqual(cache.waiters, {})
+        await cache.close()
+
+    async def test_failed_registration(self):
+        cache = LatestValueCache(RejectingUTransport(self.broker, SUBSCRIBER), [SPEED, RPM])
+        self.assertEqual((await cache.start()).code, UCode.PERMISSION_DENIED)
+        self.assertEqual(len(self.broker.listeners), 0)
+        self.assertEqual(cache.registered, [])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            LatestValueCache(None, [SPEED])
+        with self.assertRaises(ValueError):
+            LatestValueCache(object(), [SPEED])
+        with self.assertRaises(ValueError):
+            LatestValueCache(self.publisher, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
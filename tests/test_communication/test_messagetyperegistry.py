@@ -0,0 +1,62 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import unittest
+
+from google.protobuf import descriptor_pool
+
+from uprotocol.communication.messagetyperegistry import MessageTypeRegistry
+from uprotocol.core.usubscription.v3 import usubscription_pb2
+from uprotocol.core.usubscription.v3.usubscription_pb2 import SubscriptionStatus
+from uprotocol.v1.uri_pb2 import UUri
+
+
+class TestMessageTypeRegistry(unittest.TestCase):
+    def test_register_null_class(self):
+        with self.assertRaises(ValueError) as context:
+            MessageTypeRegistry().register(None)
+        self.assertEqual(str(context.exception), "Message class missing")
+
+    def test_register_null_file(self):
+        with self.assertRaises(ValueError) as context:
+            MessageTypeRegistry().register_file(None)
+        self.assertEqual(str(context.exception), "File descriptor missing")
+
+    def test_register_class(self):
+        registry = MessageTypeRegistry(descriptor_pool.DescriptorPool())
+        registry.register(UUri)
+        self.assertIs(registry.get("type.googleapis.com/uprotocol.v1.UUri"), UUri)
+
+    def test_register_file_with_nested_types(self):
+        registry = MessageTypeRegistry(descriptor_pool.DescriptorPool())
+        registry.register_file(usubscription_pb2.DESCRIPTOR)
+        self.assertIs(
+            registry.get("type.googleapis.com/uprotocol.core.usubscription.v3.SubscriptionStatus"), SubscriptionStatus
+        )
+        self.assertIn("type.googleapis.com/uprotocol.core.usubscription.v3.SubscribeAttributes", registry.types)
+
+    def test_get_resolves_from_descriptor_pool(self):
+        registry = MessageTypeRegistry()
+        self.assertEqual(len(registry.types), 0)
+        self.assertIs(registry.get("type.googleapis.com/uprotocol.v1.UUri"), UUri)
+        self.assertIn("type.googleapis.com/uprotocol.v1.UUri", registry.types)
+
+    def test_get_unknown_type(self):
+        registry = MessageTypeRegistry()
+        self.assertIsNone(registry.get("type.googleapis.com/does.not.Exist"))
+        self.assertNotIn("type.googleapis.com/does.not.Exist", registry.types)
+
+
+if __name__ == '__main__':
+    unittest.main()
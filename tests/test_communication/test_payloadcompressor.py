@@ -0,0 +1,137 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import unittest
+import zlib
+
+from uprotocol.communication.payloadcompressor import CompressionAlgorithm, PayloadCompressor, zstandard
+from uprotocol.communication.upayload import UPayload
+from uprotocol.communication.ustatuserror import UStatusError
+from uprotocol.v1.uattributes_pb2 import UPayloadFormat
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.uri_pb2 import UUri
+
+
+class TestPayloadCompressor(unittest.TestCase):
+    @staticmethod
+    def create_large_uri():
+        return UUri(authority_name="neelam" * 500, ue_id=4, ue_version_major=1, resource_id=0x8000)
+
+    def test_constructor_with_null_algorithm(self):
+        with self.assertRaises(ValueError) as context:
+            PayloadCompressor(algorithm=None)
+        self.assertEqual(str(context.exception), "algorithm cannot be None")
+
+    def test_constructor_with_negative_threshold(self):
+        with self.assertRaises(ValueError) as context:
+            PayloadCompressor(threshold=-1)
+        self.assertEqual(str(context.exception), "threshold must be a non-negative number")
+        self.assertEqual(PayloadCompressor(threshold=0).threshold, 0)
+
+    def test_compress_below_threshold(self):
+        compressor = PayloadCompressor()
+        payload = UPayload.pack(UUri(authority_name="neelam"))
+        self.assertIs(UPayload.compress(payload, compressor), payload)
+
+    def test_compress_with_null_compressor(self):
+        payload = UPayload.pack(self.create_large_uri())
+        self.assertIs(UPayload.compress(payload, None), payload)
+
+    def test_compress_null_payload(self):
+        self.assertIsNone(UPayload.compress(None, PayloadCompressor()))
+
+    def test_compress_non_protobuf_format_is_skipped(self):
+        data = b"a" * 4096
+        self.assertEqual(PayloadCompressor().compress(data, UPayloadFormat.UPAYLOAD_FORMAT_TEXT), data)
+
+    def test_compress_and_unpack_zlib(self):
+        uri = self.create_large_uri()
+        payload = UPayload.compress(UPayload.pack(uri), PayloadCompressor(CompressionAlgorithm.ZLIB))
+        self.assertTrue(PayloadCompressor.is_compressed(payload.data))
+        self.assertLess(len(payload.data), len(uri.SerializeToString()))
+        self.assertEqual(payload.format, UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF)
+        self.assertEqual(UPayload.unpack(UPayload.decompress(payload), UUri), uri)
+
+    def test_compress_and_unpack_lzma_wrapped_in_any(self):
+        uri = self.create_large_uri()
+        compressor = PayloadCompressor(CompressionAlgorithm.LZMA, threshold=100, level=1)
+        payload = UPayload.compress(UPayload.pack_to_any(uri), compressor)
+        self.assertTrue(PayloadCompressor.is_compressed(payload.data))
+        self.assertEqual(payload.format, UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF_WRAPPED_IN_ANY)
+        self.assertEqual(UPayload.unpack(UPayload.decompress(payload), UUri), uri)
+
+    def test_unpack_compressed_payload_without_decompressing(self):
+        # Compression is opt-in on the receiving end, unpacking does not decompress
+        payload = UPayload.compress(UPayload.pack(self.create_large_uri()), PayloadCompressor())
+        self.assertIsNone(UPayload.unpack(payload, UUri))
+
+    def test_decompress_uncompressed_payload(self):
+        payload = UPayload.pack(UUri(authority_name="neelam"))
+        self.assertIs(UPayload.decompress(payload), payload)
+        self.assertIsNone(UPayload.decompress(None))
+        text = UPayload(b"\x00\x01text", UPayloadFormat.UPAYLOAD_FORMAT_TEXT)
+        self.assertIs(UPayload.decompress(text), text)
+
+    def test_compress_incompressible_data_is_not_wrapped(self):
+        data = bytes(range(1, 256))
+        compressor = PayloadCompressor(threshold=0)
+        self.assertEqual(compressor.compress(data, UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF), data)
+
+    def test_decompress_uncompressed_data(self):
+        data = UUri(authority_name="neelam").SerializeToString()
+        self.assertEqual(PayloadCompressor.decompress(data), data)
+
+    def test_decompress_corrupted_compressed_data(self):
+        for algorithm in (CompressionAlgorithm.ZLIB, CompressionAlgorithm.LZMA):
+            payload = UPayload(bytes((0, algorithm.value)) + b"corrupted", UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF)
+            with self.assertRaises(ValueError):
+                UPayload.decompress(payload)
+
+    def test_decompress_above_max_size(self):
+        data = UUri(authority_name="a" * 2000).SerializeToString()
+        for algorithm in (CompressionAlgorithm.ZLIB, CompressionAlgorithm.LZMA):
+            compressed = PayloadCompressor(algorithm).compress(data, UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF)
+            self.assertEqual(PayloadCompressor.decompress(compressed, len(data)), data)
+            with self.assertRaises(UStatusError) as context:
+                PayloadCompressor.decompress(compressed, len(data) - 1)
+            self.assertEqual(context.exception.get_code(), UCode.RESOURCE_EXHAUSTED)
+
+    def test_decompress_compression_bomb(self):
+        bomb = bytes((0, CompressionAlgorithm.ZLIB.value)) + zlib.compress(
+            b"\x00" * (PayloadCompressor.MAX_DECOMPRESSED_SIZE + 1)
+        )
+        self.assertLess(len(bomb), 64 * 1024)
+        with self.assertRaises(UStatusError) as context:
+            UPayload.decompress(UPayload(bomb, UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF))
+        self.assertEqual(context.exception.get_code(), UCode.RESOURCE_EXHAUSTED)
+
+    def test_decompress_truncated_data(self):
+        data = UUri(authority_name="a" * 2000).SerializeToString()
+        compressed = PayloadCompressor().compress(data, UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF)
+        with self.assertRaises(ValueError):
+            PayloadCompressor.decompress(compressed[:-4])
+
+    @unittest.skipIf(zstandard is None, "zstandard module is not installed")
+    def test_decompress_truncated_zstd_data(self):
+        data = UUri(authority_name="a" * 2000).SerializeToString()
+        compressed = PayloadCompressor(CompressionAlgorithm.ZSTD).compress(
+            data, UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF
+        )
+        self.assertEqual(PayloadCompressor.decompress(compressed), data)
+        with self.assertRaises(ValueError):
+            PayloadCompressor.decompress(compressed[:-4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import unittest
+
+from uprotocol.communication.retrypolicy import RetryBudget, RetryPolicy
+from uprotocol.v1.ucode_pb2 import UCode
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_default_retry_policy(self):
+        policy = RetryPolicy()
+        self.assertEqual(3, policy.max_attempts)
+        self.assertEqual(frozenset({UCode.UNAVAILABLE, UCode.DEADLINE_EXCEEDED}), policy.retryable_codes)
+        self.assertEqual(policy, RetryPolicy())
+        self.assertEqual(hash(policy), hash(RetryPolicy()))
+
+    def test_invalid_retry_policy(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_attempts=0)
+        with self.assertRaises(ValueError):
+            RetryPolicy(initial_backoff=200, max_backoff=100)
+        with self.assertRaises(ValueError):
+            RetryPolicy(multiplier=0.5)
+        with self.assertRaises(ValueError):
+            RetryPolicy(jitter=2)
+        with self.assertRaises(ValueError):
+            RetryPolicy(attempt_timeout=0)
+        with self.assertRaises(ValueError):
+            RetryPolicy(retryable_codes=None)
+
+    def test_exponential_backoff_without_jitter(self):
+        policy = RetryPolicy(initial_backoff=100, max_backoff=500, multiplier=2, jitter=0)
+        self.assertEqual([policy.get_backoff(attempt) for attempt in range(1, 5)], [100, 200, 400, 500])
+
+    def test_backoff_with_jitter(self):
+        policy = RetryPolicy(initial_backoff=100, jitter=0.5)
+        for _ in range(100):
+            self.assertTrue(50 <= policy.get_backoff(1) <= 100)
+
+
+class TestRetryBudget(unittest.TestCase):
+    def test_invalid_retry_budget(self):
+        with self.assertRaises(ValueError):
+            RetryBudget(max_tokens=0)
+        with self.assertRaises(ValueError):
+            RetryBudget(tokens_per_second=-1)
+
+    def test_budget_is_exhausted(self):
+        budget = RetryBudget(max_tokens=2, tokens_per_second=0)
+        self.assertTrue(budget.try_acquire())
+        self.assertTrue(budget.try_acquire())
+        self.assertFalse(budget.try_acquire())
+        self.assertEqual(1, budget.exhausted)
+
+    def test_budget_is_refilled(self):
+        budget = RetryBudget(max_tokens=1, tokens_per_second=1000)
+        self.assertTrue(budget.try_acquire())
+        budget.last_refill -= 0.01
+        self.assertTrue(budget.try_acquire())
+
+
+if __name__ == '__main__':
+    unittest.main()
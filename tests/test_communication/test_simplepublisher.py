@@ -15,6 +15,7 @@ SPDX-License-Identifier: Apache-2.0
 import unittest
 from unittest.mock import MagicMock
 
+from uprotocol.communication.payloadcompressor import PayloadCompressor
 from uprotocol.communication.simplepublisher import SimplePublisher
 from uprotocol.communication.upayload import UPayload
 from uprotocol.transport.utransport import UTransport
@@ -43,6 +44,17 @@ class TestSimplePublisher(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(status.code, UCode.OK)
         self.transport.send.assert_called_once()
 
+    async def test_send_publish_with_compressor(self):
+        self.transport.send.return_value = UStatus(code=UCode.OK)
+        uri = UUri(authority_name="Neelam" * 500)
+        publisher = SimplePublisher(self.transport, PayloadCompressor())
+        status = await publisher.publish(self.topic, payload=UPayload.pack(uri))
+        self.assertEqual(status.code, UCode.OK)
+        message = self.transport.send.call_args[0][0]
+        self.assertTrue(PayloadCompressor.is_compressed(message.payload))
+        payload = UPayload.pack_from_data_and_format(message.payload, message.attributes.payload_format)
+        self.assertEqual(UPayload.unpack(UPayload.decompress(payload), UUri), uri)
+
     def test_constructor_transport_none(self):
         with self.assertRaises(ValueError) as context:
             SimplePublisher(None)
@@ -0,0 +1,51 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import unittest
+
+from google.protobuf.struct_pb2 import Struct
+
+from uprotocol.communication.streamcredit import StreamCredit
+from uprotocol.communication.upayload import UPayload
+from uprotocol.v1.uri_pb2 import UUri
+
+
+class TestStreamCredit(unittest.TestCase):
+    def test_payload_round_trip(self):
+        credit = StreamCredit("stream", 5, 4)
+        payload = credit.to_payload()
+        self.assertEqual(StreamCredit.from_payload(payload.data, payload.format), credit)
+        self.assertEqual(credit.limit, 9)
+        self.assertFalse(credit.is_cancel())
+        self.assertTrue(StreamCredit("stream", 0, 0).is_cancel())
+
+    def test_get_stream_uri(self):
+        method_uri = UUri(authority_name="Neelam", ue_id=4, ue_version_major=1, resource_id=3)
+        self.assertEqual(
+            StreamCredit.get_stream_uri(method_uri),
+            UUri(authority_name="Neelam", ue_id=4, ue_version_major=1, resource_id=StreamCredit.RESOURCE_ID),
+        )
+
+    def test_other_payloads_are_not_credits(self):
+        for payload in (
+            UPayload.pack_to_any(UUri(ue_id=1)),
+            UPayload.pack_to_any(Struct()),
+            UPayload.pack(UUri(ue_id=1)),
+            UPayload.EMPTY,
+        ):
+            self.assertIsNone(StreamCredit.from_payload(payload.data, payload.format))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import unittest
+
+from tests.test_communication.mock_utransport import FakeRpcClient, MockUTransport, create_method_uri
+from uprotocol.communication.calloptions import CallOptions
+from uprotocol.communication.inmemoryrpcclient import InMemoryRpcClient
+from uprotocol.communication.throttlingrpcclient import ThrottlingRpcClient
+from uprotocol.communication.upayload import UPayload
+from uprotocol.communication.ustatuserror import UStatusError
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.uri_pb2 import UUri
+
+
+class TestThrottlingRpcClient(unittest.IsolatedAsyncioTestCase):
+    def test_constructor_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            ThrottlingRpcClient(None)
+        with self.assertRaises(ValueError):
+            ThrottlingRpcClient(FakeRpcClient(blocking=True), max_in_flight=0)
+        with self.assertRaises(ValueError):
+            ThrottlingRpcClient(FakeRpcClient(blocking=True), max_in_flight_per_method=0)
+        with self.assertRaises(ValueError):
+            ThrottlingRpcClient(FakeRpcClient(blocking=True), max_queued=-1)
+
+    async def test_invoke_method_with_in_memory_rpc_client(self):
+        payload = UPayload.pack_to_any(UUri())
+        rpc_client = ThrottlingRpcClient(InMemoryRpcClient(MockUTransport()), max_in_flight=1)
+        responses = await asyncio.gather(*[rpc_client.invoke_method(create_method_uri(), payload) for _ in range(5)])
+        self.assertEqual(responses, [payload] * 5)
+        self.assertEqual(rpc_client.metrics.in_flight, 0)
+
+    async def test_invoke_method_waits_for_window(self):
+        delegate = FakeRpcClient(blocking=True)
+        rpc_client = ThrottlingRpcClient(delegate, max_in_flight=2)
+        tasks = [asyncio.ensure_future(rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        self.assertEqual(len(delegate.invoked), 2)
+        self.assertEqual(rpc_client.metrics.in_flight, 2)
+        self.assertEqual(rpc_client.metrics.queued, 3)
+
+        delegate.release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(len(delegate.invoked), 5)
+        self.assertEqual(rpc_client.metrics.queued, 0)
+        self.assertEqual(rpc_client.metrics.queue_waits, 3)
+        self.assertGreater(rpc_client.metrics.max_queue_wait, 0)
+        # The time spent queued is taken from the timeout
+        self.assertLess(delegate.invoked[-1][1].timeout, CallOptions.DEFAULT.timeout)
+
+    async def test_invoke_method_per_method_window(self):
+        delegate = FakeRpcClient(blocking=True)
+        rpc_client = ThrottlingRpcClient(delegate, max_in_flight=10, max_in_flight_per_method=1)
+        tasks = [
+            asyncio.ensure_future(rpc_client.invoke_method(create_method_uri(resource_id), UPayload.EMPTY))
+            for resource_id in (1, 1, 2)
+        ]
+        await asyncio.sleep(0.01)
+        self.assertEqual([uri.resource_id for uri, _ in delegate.invoked], [1, 2])
+        self.assertEqual(rpc_client.metrics.queued, 1)
+        delegate.release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(len(delegate.invoked), 3)
+
+    async def test_invoke_method_fails_fast_when_queue_is_full(self):
+        delegate = FakeRpcClient(blocking=True)
+        rpc_client = ThrottlingRpcClient(delegate, max_in_flight=1, max_queued=1)
+        tasks = [asyncio.ensure_future(rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with self.assertRaises(UStatusError) as context:
+            await rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY)
+        self.assertEqual(UCode.RESOURCE_EXHAUSTED, context.exception.get_code())
+        self.assertEqual(rpc_client.metrics.rejected, 1)
+        delegate.release.set()
+        await asyncio.gather(*tasks)
+
+    async def test_invoke_method_times_out_while_queued(self):
+        delegate = FakeRpcClient(blocking=True)
+        rpc_client = ThrottlingRpcClient(delegate, max_in_flight=1, max_in_flight_per_method=1)
+        task = asyncio.ensure_future(rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY))
+        await asyncio.sleep(0.01)
+        with self.assertRaises(UStatusError) as context:
+            await rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY, CallOptions(timeout=10))
+        self.assertEqual(UCode.DEADLINE_EXCEEDED, context.exception.get_code())
+        self.assertEqual(rpc_client.metrics.queue_timeouts, 1)
+        self.assertEqual(rpc_client.metrics.queued, 0)
+        delegate.release.set()
+        await task
+        # All the slots were given back
+        await asyncio.wait_for(rpc_client.invoke_method(create_method_uri(), UPayload.EMPTY), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
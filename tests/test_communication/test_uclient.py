@@ -138,6 +138,13 @@ class UClientTest(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(UCode.DEADLINE_EXCEEDED, context.exception.status.code)
         self.assertEqual("Request timed out", context.exception.status.message)
 
+    async def test_invoke_streaming_with_timeout_transport(self):
+        options = CallOptions(10, "UPRIORITY_CS5", "token")
+        with self.assertRaises(UStatusError) as context:
+            async for _ in UClient(TimeoutUTransport()).invoke_streaming(create_method_uri(), None, options):
+                pass
+        self.assertEqual(UCode.DEADLINE_EXCEEDED, context.exception.status.code)
+
     async def test_invoke_method_with_multi_invoke_transport(self):
         rpc_client = UClient(MockUTransport())
         payload = UPayload.pack_to_any(UUri())
@@ -181,6 +188,26 @@ class UClientTest(unittest.IsolatedAsyncioTestCase):
         await client.register_request_handler(create_method_uri(), handler)
         self.assertEqual(await client.notify(create_topic(), transport.get_source()), UStatus(code=UCode.OK))
 
+    async def test_async_context_manager_starts_rpc_client(self):
+        transport = MockUTransport()
+        async with UClient(transport) as client:
+            self.assertTrue(client.rpc_client.is_listener_registered)
+            self.assertEqual(len(transport.listeners), 1)
+
+    async def test_aclose_unregisters_client_and_server_listeners(self):
+        transport = EchoUTransport()
+        client = UClient(transport)
+        handler = create_autospec(RequestHandler, instance=True)
+        handler.handle_request.return_value = UPayload.EMPTY
+        await client.register_request_handler(create_method_uri(), handler)
+        await client.invoke_method(create_method_uri(), None)
+        self.assertEqual(len(transport.listeners), 2)
+        await client.aclose(drain_timeout=100)
+        self.assertEqual(len(transport.listeners), 0)
+        with self.assertRaises(UStatusError) as context:
+            await client.invoke_method(create_method_uri(), None)
+        self.assertEqual(UCode.UNAVAILABLE, context.exception.get_code())
+
     async def test_happy_path_for_all_apis_async(self):
         client = UClient(MockUTransport())
 
@@ -14,8 +14,10 @@ SPDX-License-Identifier: Apache-2.0
 
 import unittest
 
-from google.protobuf import message
+from google.protobuf import any_pb2, message
 
+from uprotocol.communication.messagetyperegistry import MessageTypeRegistry
+from uprotocol.communication.payloadcompressor import PayloadCompressor
 from uprotocol.communication.upayload import UPayload
 from uprotocol.v1.uattributes_pb2 import (
     UPayloadFormat,
@@ -113,6 +115,44 @@ class TestUPayload(unittest.TestCase):
         payload = UPayload.pack_to_any(uri)
         self.assertEqual(payload.__hash__(), payload.__hash__())
 
+    def test_unpack_auto_a_google_protobuf_any_packed_upayload(self):
+        uri = UUri(authority_name="Neelam")
+        unpacked = UPayload.unpack_auto(UPayload.pack_to_any(uri))
+        self.assertTrue(isinstance(unpacked, UUri))
+        self.assertEqual(uri, unpacked)
+
+    def test_unpack_auto_with_custom_registry(self):
+        registry = MessageTypeRegistry()
+        registry.register(UUri)
+        uri = UUri(authority_name="Neelam")
+        self.assertEqual(uri, UPayload.unpack_auto(UPayload.pack_to_any(uri), registry))
+
+    def test_unpack_auto_a_compressed_upayload(self):
+        uri = UUri(authority_name="Neelam" * 500)
+        payload = UPayload.compress(UPayload.pack_to_any(uri), PayloadCompressor())
+        self.assertIsNone(UPayload.unpack_auto(payload))
+        self.assertEqual(uri, UPayload.unpack_auto(UPayload.decompress(payload)))
+
+    def test_unpack_auto_with_null_and_empty_upayload(self):
+        self.assertIsNone(UPayload.unpack_auto(None))
+        self.assertIsNone(UPayload.unpack_auto(UPayload.EMPTY))
+
+    def test_unpack_auto_a_protobuf_upayload(self):
+        self.assertIsNone(UPayload.unpack_auto(UPayload.pack(UUri(authority_name="Neelam"))))
+
+    def test_unpack_auto_an_unknown_type(self):
+        any_message = any_pb2.Any(type_url="type.googleapis.com/does.not.Exist", value=b"")
+        payload = UPayload.pack_from_data_and_format(
+            any_message.SerializeToString(), UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF_WRAPPED_IN_ANY
+        )
+        self.assertIsNone(UPayload.unpack_auto(payload))
+
+    def test_unpack_auto_corrupted_data(self):
+        payload = UPayload.pack_from_data_and_format(
+            b"corrupted", UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF_WRAPPED_IN_ANY
+        )
+        self.assertIsNone(UPayload.unpack_auto(payload))
+
 
 if __name__ == '__main__':
     unittest.main()
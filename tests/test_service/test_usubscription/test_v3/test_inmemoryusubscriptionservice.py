@@ -0,0 +1,230 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import unittest
+from typing import List, Tuple
+
+from uprotocol.client.usubscription.v3.inmemoryusubcriptionclient import InMemoryUSubscriptionClient
+from uprotocol.client.usubscription.v3.subscriptionchangehandler import SubscriptionChangeHandler
+from uprotocol.communication.calloptions import CallOptions
+from uprotocol.communication.ustatuserror import UStatusError
+from uprotocol.core.usubscription.v3.usubscription_pb2 import (
+    FetchSubscriptionsRequest,
+    NotificationsRequest,
+    SubscriberInfo,
+    SubscriptionRequest,
+    SubscriptionStatus,
+)
+from uprotocol.service.usubscription.v3.inmemoryusubscriptionservice import InMemoryUSubscriptionService
+from uprotocol.service.usubscription.v3.subscriptionindex import SubscriptionIndex
+from uprotocol.transport.ulistener import UListener
+from uprotocol.transport.utransport import UTransport
+from uprotocol.uri.factory.uri_factory import UriFactory
+from uprotocol.uri.validator.urivalidator import UriValidator
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+from uprotocol.v1.ustatus_pb2 import UStatus
+
+
+class LoopbackBus:
+    def __init__(self):
+        self.listeners: List[Tuple[UUri, UUri, UListener]] = []
+
+    async def send(self, message: UMessage) -> UStatus:
+        for source_filter, sink_filter, listener in list(self.listeners):
+            if UriValidator.matches(source_filter, message.attributes.source) and (
+                UriValidator.is_empty(sink_filter) or UriValidator.matches(sink_filter, message.attributes.sink)
+            ):
+                await listener.on_receive(message)
+        return UStatus(code=UCode.OK)
+
+
+class LoopbackUTransport(UTransport):
+    def __init__(self, bus: LoopbackBus, source: UUri):
+        self.bus = bus
+        self.source = source
+
+    async def send(self, message: UMessage) -> UStatus:
+        return await self.bus.send(message)
+
+    async def register_listener(self, source_filter: UUri, listener: UListener, sink_filter: UUri = None) -> UStatus:
+        self.bus.listeners.append((source_filter, sink_filter or UUri(), listener))
+        return UStatus(code=UCode.OK)
+
+    async def unregister_listener(self, source_filter: UUri, listener: UListener, sink_filter: UUri = None) -> UStatus:
+        entry = (source_filter, sink_filter or UUri(), listener)
+        if entry in self.bus.listeners:
+            self.bus.listeners.remove(entry)
+            return UStatus(code=UCode.OK)
+        return UStatus(code=UCode.NOT_FOUND)
+
+    def get_source(self) -> UUri:
+        return self.source
+
+    async def close(self) -> None:
+        pass
+
+
+class MyListener(UListener):
+    async def on_receive(self, umsg: UMessage) -> None:
+        pass
+
+
+class RecordingHandler(SubscriptionChangeHandler):
+    def __init__(self):
+        self.changes = []
+
+    def handle_subscription_change(self, topic: UUri, status: SubscriptionStatus) -> None:
+        self.changes.append((topic.resource_id, status.state))
+
+
+class TestSubscriptionIndex(unittest.TestCase):
+    def test_add_remove_and_page(self):
+        index = SubscriptionIndex()
+        for i in range(5):
+            self.assertTrue(index.add(str(i), i))
+        self.assertFalse(index.add("1", 10))
+        self.assertEqual(index.page(0, 2), ([0, 1], True))
+        self.assertEqual(index.page(4, 2), ([4], False))
+
+        # The last value takes the place of a removed one
+        self.assertEqual(index.remove("1"), 1)
+        self.assertIsNone(index.remove("1"))
+        self.assertEqual(index.page(0, 10), ([0, 4, 2, 3], False))
+        self.assertEqual(index.get("4"), 4)
+        self.assertEqual(index.remove("3"), 3)
+        self.assertEqual(len(index), 3)
+        self.assertNotIn("3", index)
+
+
+class TestInMemoryUSubscriptionService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bus = LoopbackBus()
+        self.service = InMemoryUSubscriptionService(
+            LoopbackUTransport(self.bus, UUri(ue_id=0, ue_version_major=3)), page_size=2
+        )
+        self.assertEqual((await self.service.start()).code, UCode.OK)
+        self.topic = UUri(ue_id=4, ue_version_major=1, resource_id=0x8000)
+        self.producer = InMemoryUSubscriptionClient(LoopbackUTransport(self.bus, UUri(ue_id=4, ue_version_major=1)))
+        self.subscribers = [
+            InMemoryUSubscriptionClient(LoopbackUTransport(self.bus, UUri(ue_id=10 + i, ue_version_major=1)))
+            for i in range(3)
+        ]
+
+    async def asyncTearDown(self):
+        await self.service.close()
+
+    async def test_subscribe_fetch_and_unsubscribe(self):
+        listener = MyListener()
+        for subscriber in self.subscribers:
+            response = await subscriber.subscribe(self.topic, listener)
+            self.assertEqual(response.status.state, SubscriptionStatus.State.SUBSCRIBED)
+
+        # Subscribing again is idempotent
+        response = await self.subscribers[0]._subscribe(self.topic, CallOptions.DEFAULT)
+        self.assertEqual(response.status.state, SubscriptionStatus.State.SUBSCRIBED)
+        self.assertEqual(len(self.service.topics["/4/1/8000"]), 3)
+
+        first_page = await self.producer.fetch_subscribers(self.topic)
+        self.assertEqual([info.uri.ue_id for info in first_page.subscribers], [10, 11])
+        self.assertTrue(first_page.has_more_records)
+        subscribers = [info.uri.ue_id async for info in self.producer.iter_subscribers(self.topic)]
+        self.assertEqual(subscribers, [10, 11, 12])
+
+        request = FetchSubscriptionsRequest(subscriber=SubscriberInfo(uri=UUri(ue_id=11, ue_version_major=1)))
+        subscriptions = await self.producer.fetch_subscriptions(request)
+        self.assertEqual([subscription.topic for subscription in subscriptions.subscriptions], [self.topic])
+        self.assertFalse(subscriptions.has_more_records)
+
+        self.assertEqual((await self.subscribers[0].unsubscribe(self.topic, listener)).code, UCode.OK)
+        subscribers = [info.uri.ue_id async for info in self.producer.iter_subscribers(self.topic)]
+        self.assertEqual(sorted(subscribers), [11, 12])
+        self.assertNotIn("/a/1", self.service.subscribers)
+
+        # Unknown topics and subscribers have no records
+        other_topic = UUri(ue_id=4, ue_version_major=1, resource_id=0x8001)
+        self.assertEqual(len((await self.producer.fetch_subscribers(other_topic)).subscribers), 0)
+        request = FetchSubscriptionsRequest(subscriber=SubscriberInfo(uri=UUri(ue_id=10, ue_version_major=1)))
+        self.assertEqual(len((await self.producer.fetch_subscriptions(request)).subscriptions), 0)
+
+    async def test_subscription_change_notifications(self):
+        producer_handler = RecordingHandler()
+        await self.producer.register_for_notifications(self.topic, producer_handler)
+        listener = MyListener()
+        await self.subscribers[0].subscribe(self.topic, listener)
+        await self.subscribers[0].unsubscribe(self.topic, listener)
+        await self.service.notifications.join()
+        await self.producer.dispatcher.drain()
+
+        expected = [(0x8000, SubscriptionStatus.State.SUBSCRIBED), (0x8000, SubscriptionStatus.State.UNSUBSCRIBED)]
+        self.assertEqual(producer_handler.changes, expected)
+
+        # No more notifications once unregistered
+        await self.producer.unregister_for_notifications(self.topic, producer_handler)
+        self.assertEqual(self.service.observers, {})
+        await self.subscribers[1].subscribe(self.topic, listener)
+        await self.service.notifications.join()
+        await self.producer.dispatcher.drain()
+        self.assertEqual(producer_handler.changes, expected)
+
+    async def test_invalid_requests(self):
+        with self.assertRaises(RuntimeError) as context:
+            await self.subscribers[0].subscribe(UUri(ue_id=4, ue_version_major=1, resource_id=1), MyListener())
+        self.assertEqual(context.exception.__cause__.get_code(), UCode.INVALID_ARGUMENT)
+
+        with self.assertRaises(RuntimeError) as context:
+            await self.subscribers[0].subscribe(UriFactory.ANY, MyListener())
+        self.assertEqual(context.exception.__cause__.get_code(), UCode.INVALID_ARGUMENT)
+        self.assertEqual(self.service.topics, {})
+
+        # Only the producer of a topic can register for its notifications
+        with self.assertRaises(RuntimeError) as context:
+            await self.subscribers[0].register_for_notifications(self.topic, RecordingHandler())
+        self.assertEqual(context.exception.__cause__.get_code(), UCode.PERMISSION_DENIED)
+
+    async def test_register_for_notifications_of_another_entity(self):
+        producer = UUri(ue_id=4, ue_version_major=1)
+        subscriber = UUri(ue_id=10, ue_version_major=1)
+        request = NotificationsRequest(topic=self.topic, subscriber=SubscriberInfo(uri=producer))
+        # A subscriber naming the producer is not authorized as the producer
+        for method in (self.service._register_for_notifications, self.service._unregister_for_notifications):
+            with self.assertRaises(UStatusError) as context:
+                method(request, subscriber)
+            self.assertEqual(context.exception.get_code(), UCode.PERMISSION_DENIED)
+        self.assertEqual(self.service.observers, {})
+
+        # The producer may name itself
+        self.service._register_for_notifications(request, producer)
+        self.assertEqual(list(self.service.observers["/4/1/8000"].values()), [producer])
+
+    async def test_many_subscribers(self):
+        for i in range(1000):
+            subscriber = UUri(ue_id=0x1000 + i, ue_version_major=1)
+            self.service._subscribe(self._subscription_request(subscriber), subscriber)
+        self.assertEqual(len(self.service.topics["/4/1/8000"]), 1000)
+        for i in range(0, 1000, 2):
+            subscriber = UUri(ue_id=0x1000 + i, ue_version_major=1)
+            self.service._unsubscribe(self._subscription_request(subscriber), subscriber)
+        self.assertEqual(len(self.service.topics["/4/1/8000"]), 500)
+        self.assertEqual(len(self.service.subscribers), 500)
+        await asyncio.wait_for(self.service.notifications.join(), 5)
+
+    def _subscription_request(self, subscriber: UUri):
+        return SubscriptionRequest(topic=self.topic, subscriber=SubscriberInfo(uri=subscriber))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import unittest
+
+from uprotocol.transport.listenerregistry import ListenerRegistry
+from uprotocol.transport.ulistener import UListener
+from uprotocol.uri.factory.uri_factory import UriFactory
+from uprotocol.v1.uattributes_pb2 import UAttributes
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+
+
+class MyListener(UListener):
+    def __init__(self, error=None):
+        self.error = error
+        self.messages = []
+
+    async def on_receive(self, message):
+        self.messages.append(message)
+        if self.error is not None:
+            raise self.error
+
+
+class TestListenerRegistry(unittest.TestCase):
+    def setUp(self):
+        self.topic = UUri(authority_name="neelam", ue_id=4, ue_version_major=1, resource_id=0x8000)
+        self.sink = UUri(authority_name="neelam", ue_id=10, ue_version_major=1)
+
+    def test_match_source_and_sink_filters(self):
+        registry = ListenerRegistry()
+        publish_listener = MyListener()
+        any_listener = MyListener()
+        sink_listener = MyListener()
+        self.assertTrue(registry.register(self.topic, publish_listener, None))
+        self.assertFalse(registry.register(self.topic, publish_listener, None))
+        registry.register(UriFactory.ANY, any_listener, UriFactory.ANY)
+        registry.register(UriFactory.ANY, sink_listener, self.sink)
+        self.assertEqual(len(registry), 3)
+
+        published = UAttributes(source=self.topic)
+        self.assertEqual(registry.match(published), [publish_listener, any_listener])
+        notification = UAttributes(source=self.topic, sink=self.sink)
+        self.assertEqual(registry.match(notification), [any_listener, sink_listener])
+        other_topic = UAttributes(source=UUri(authority_name="neelam", ue_id=5, ue_version_major=1, resource_id=1))
+        self.assertEqual(registry.match(other_topic), [any_listener])
+
+    def test_listener_registered_for_several_filters_is_matched_once(self):
+        registry = ListenerRegistry()
+        listener = MyListener()
+        registry.register(self.topic, listener, UriFactory.ANY)
+        registry.register(UriFactory.ANY, listener, UriFactory.ANY)
+        self.assertEqual(registry.match(UAttributes(source=self.topic)), [listener])
+
+        self.assertTrue(registry.unregister(self.topic, listener, UriFactory.ANY))
+        self.assertFalse(registry.unregister(self.topic, listener, UriFactory.ANY))
+        self.assertFalse(registry.unregister(self.topic, listener, None))
+        self.assertEqual(len(registry.registrations), 1)
+        registry.clear()
+        self.assertEqual(registry.match(UAttributes(source=self.topic)), [])
+
+    def test_dispatch_continues_after_a_failing_listener(self):
+        registry = ListenerRegistry()
+        failing = MyListener(RuntimeError("broken"))
+        listener = MyListener()
+        registry.register(self.topic, failing, None)
+        registry.register(self.topic, listener, None)
+        message = UMessage(attributes=UAttributes(source=self.topic))
+        asyncio.run(registry.dispatch(message))
+        self.assertEqual(failing.messages, [message])
+        self.assertEqual(listener.messages, [message])
+        self.assertFalse(asyncio.run(ListenerRegistry.deliver(failing, message)))
+        self.assertTrue(asyncio.run(ListenerRegistry.deliver(listener, message)))
+
+
+if __name__ == '__main__':
+    unittest.main()
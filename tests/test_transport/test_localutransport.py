@@ -0,0 +1,122 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import unittest
+
+from uprotocol.transport.builder.umessagebuilder import UMessageBuilder
+from uprotocol.transport.localutransport import FanOutPolicy, LocalBroker, LocalUTransport
+from uprotocol.transport.ulistener import UListener
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+
+TOPIC = UUri(ue_id=4, ue_version_major=1, resource_id=0x8000)
+PUBLISHER = UUri(ue_id=4, ue_version_major=1)
+SUBSCRIBER = UUri(ue_id=10, ue_version_major=1)
+
+
+class RecordingListener(UListener):
+    def __init__(self, release: asyncio.Event = None):
+        self.messages = []
+        self.release = release
+
+    async def on_receive(self, umsg: UMessage) -> None:
+        self.messages.append(umsg)
+        if self.release is not None:
+            await self.release.wait()
+
+
+class MutatingListener(UListener):
+    async def on_receive(self, umsg: UMessage) -> None:
+        umsg.payload = b"changed"
+
+
+class FailingListener(UListener):
+    async def on_receive(self, umsg: UMessage) -> None:
+        raise RuntimeError("failure")
+
+
+class TestLocalUTransport(unittest.IsolatedAsyncioTestCase):
+    async def test_fan_out_shares_the_message(self):
+        broker = LocalBroker()
+        publisher = LocalUTransport(broker, PUBLISHER)
+        subscriber = LocalUTransport(broker, SUBSCRIBER)
+        listeners = [RecordingListener() for _ in range(50)]
+        await subscriber.register_listener(TOPIC, FailingListener(), None)
+        for listener in listeners:
+            self.assertEqual((await subscriber.register_listener(TOPIC, listener, None)).code, UCode.OK)
+
+        message = UMessageBuilder.publish(TOPIC).build()
+        self.assertEqual((await publisher.send(message)).code, UCode.OK)
+        for listener in listeners:
+            self.assertIs(listener.messages[0], message)
+
+        # Messages to other sinks and unregistered listeners are not delivered
+        await publisher.send(UMessageBuilder.notification(TOPIC, PUBLISHER).build())
+        self.assertEqual((await subscriber.unregister_listener(TOPIC, listeners[0], None)).code, UCode.OK)
+        self.assertEqual((await subscriber.unregister_listener(TOPIC, listeners[0], None)).code, UCode.NOT_FOUND)
+        await publisher.send(message)
+        self.assertEqual(len(listeners[0].messages), 1)
+        self.assertEqual(len(listeners[1].messages), 2)
+
+        await subscriber.close()
+        self.assertEqual(len(broker.listeners), 0)
+        self.assertEqual((await publisher.send(UMessage())).code, UCode.INVALID_ARGUMENT)
+
+    async def test_concurrent_fan_out(self):
+        broker = LocalBroker(FanOutPolicy.CONCURRENT)
+        transport = LocalUTransport(broker, PUBLISHER)
+        release = asyncio.Event()
+        listeners = [RecordingListener(release) for _ in range(3)]
+        for listener in listeners:
+            await transport.register_listener(TOPIC, listener, None)
+
+        # All the listeners are called before any of them returns
+        send = asyncio.ensure_future(transport.send(UMessageBuilder.publish(TOPIC).build()))
+        await asyncio.sleep(0.01)
+        self.assertEqual([len(listener.messages) for listener in listeners], [1, 1, 1])
+        self.assertFalse(send.done())
+        release.set()
+        self.assertEqual((await send).code, UCode.OK)
+
+    async def test_verify_immutable(self):
+        for policy in FanOutPolicy:
+            broker = LocalBroker(policy, verify_immutable=True)
+            transport = LocalUTransport(broker, PUBLISHER)
+            listener = RecordingListener()
+            await transport.register_listener(TOPIC, listener, None)
+            self.assertEqual((await transport.send(UMessageBuilder.publish(TOPIC).build())).code, UCode.OK)
+
+            mutating = MutatingListener()
+            await transport.register_listener(TOPIC, mutating, None)
+            status = await transport.send(UMessageBuilder.publish(TOPIC).build())
+            self.assertEqual(status.code, UCode.INTERNAL)
+            self.assertIn(repr(mutating), status.message)
+
+        # Without verification a modified message goes unnoticed
+        broker = LocalBroker()
+        transport = LocalUTransport(broker, PUBLISHER)
+        await transport.register_listener(TOPIC, MutatingListener(), None)
+        self.assertEqual((await transport.send(UMessageBuilder.publish(TOPIC).build())).code, UCode.OK)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            LocalUTransport(None, PUBLISHER)
+        with self.assertRaises(ValueError):
+            LocalUTransport(LocalBroker(), UUri())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import unittest
+
+from uprotocol.transport.builder.umessagebuilder import UMessageBuilder
+from uprotocol.transport.queuedlistener import OverflowPolicy, QueuedListener
+from uprotocol.transport.ulistener import UListener
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+
+
+def publish(resource_id: int, payload: bytes) -> UMessage:
+    message = UMessageBuilder.publish(UUri(ue_id=4, ue_version_major=1, resource_id=resource_id)).build()
+    message.payload = payload
+    return message
+
+
+class GatedListener(UListener):
+    def __init__(self):
+        self.payloads = []
+        self.gate = asyncio.Event()
+
+    async def on_receive(self, umsg: UMessage) -> None:
+        await self.gate.wait()
+        if umsg.payload == b"fail":
+            raise RuntimeError("failure")
+        self.payloads.append(umsg.payload)
+
+
+class TestQueuedListener(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.listener = GatedListener()
+
+    async def fill(self, queued: QueuedListener, payloads, resource_id: int = 0x8000) -> None:
+        # The first message is taken by the consumer, which waits for the gate
+        await queued.on_receive(publish(resource_id, b"first"))
+        await asyncio.sleep(0)
+        for payload in payloads:
+            await queued.on_receive(publish(resource_id, payload))
+
+    async def test_drop_oldest(self):
+        queued = QueuedListener(self.listener, 2)
+        await self.fill(queued, [b"1", b"2", b"3", b"fail"])
+        self.assertEqual(len(queued), 2)
+        self.listener.gate.set()
+        await queued.join()
+        self.assertEqual(self.listener.payloads, [b"first", b"3"])
+        self.assertEqual((queued.metrics.received, queued.metrics.delivered), (5, 2))
+        self.assertEqual((queued.metrics.dropped, queued.metrics.failures), (2, 1))
+        await queued.close()
+
+    async def test_drop_newest(self):
+        queued = QueuedListener(self.listener, 2, OverflowPolicy.DROP_NEWEST)
+        await self.fill(queued, [b"1", b"2", b"3"])
+        self.listener.gate.set()
+        await queued.join()
+        self.assertEqual(self.listener.payloads, [b"first", b"1", b"2"])
+        self.assertEqual(queued.metrics.dropped, 1)
+        await queued.close()
+
+    async def test_block(self):
+        queued = QueuedListener(self.listener, 1, OverflowPolicy.BLOCK)
+        await self.fill(queued, [b"1"])
+        blocked = asyncio.ensure_future(queued.on_receive(publish(0x8000, b"2")))
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+        self.listener.gate.set()
+        await asyncio.wait_for(blocked, 1)
+        await queued.join()
+        self.assertEqual(self.listener.payloads, [b"first", b"1", b"2"])
+        self.assertEqual(queued.metrics.dropped, 0)
+
+        # Closing releases the blocked senders
+        self.listener.gate.clear()
+        await self.fill(queued, [b"3"])
+        blocked = asyncio.ensure_future(queued.on_receive(publish(0x8000, b"4")))
+        await asyncio.sleep(0.01)
+        await queued.close()
+        await asyncio.wait_for(blocked, 1)
+        self.assertEqual(len(queued), 0)
+        self.assertEqual(queued.metrics.dropped, 2)
+
+    async def test_coalesce_by_topic(self):
+        queued = QueuedListener(self.listener, 2, OverflowPolicy.COALESCE)
+        await self.fill(queued, [])
+        for i in range(3):
+            await queued.on_receive(publish(0x8001, b"a%d" % i))
+            await queued.on_receive(publish(0x8002, b"b%d" % i))
+        # A new topic does not fit, the oldest topic makes room
+        await queued.on_receive(publish(0x8003, b"c0"))
+        self.listener.gate.set()
+        await queued.join()
+        self.assertEqual(self.listener.payloads, [b"first", b"b2", b"c0"])
+        self.assertEqual((queued.metrics.coalesced, queued.metrics.dropped), (4, 1))
+        await queued.close()
+
+    async def test_slow_listener_does_not_block_the_sender(self):
+        queued = QueuedListener(self.listener, 10)
+        await asyncio.wait_for(self.fill(queued, [b"1"] * 100), 1)
+        self.assertEqual(queued.metrics.dropped, 90)
+        await queued.close()
+        self.assertEqual(queued.metrics.dropped, 100)
+        self.assertEqual(len(queued), 0)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            QueuedListener(None)
+        with self.assertRaises(ValueError):
+            QueuedListener(GatedListener(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
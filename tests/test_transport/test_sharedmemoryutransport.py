@@ -0,0 +1,195 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import unittest
+import uuid
+
+from uprotocol.communication.upayload import UPayload
+from uprotocol.transport.builder.umessagebuilder import UMessageBuilder
+from uprotocol.transport.sharedmemoryutransport import SharedMemoryRing, SharedMemoryUTransport
+from uprotocol.transport.ulistener import UListener
+from uprotocol.uri.factory.uri_factory import UriFactory
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+
+TOPIC = UUri(ue_id=4, ue_version_major=1, resource_id=0x8000)
+PUBLISHER = UUri(ue_id=4, ue_version_major=1)
+SUBSCRIBER = UUri(ue_id=10, ue_version_major=1)
+ECHO = UUri(ue_id=20, ue_version_major=1)
+
+
+class QueueListener(UListener):
+    def __init__(self):
+        self.messages = asyncio.Queue()
+
+    async def on_receive(self, message: UMessage) -> None:
+        await self.messages.put(message)
+
+
+class EchoListener(UListener):
+    def __init__(self, transport):
+        self.transport = transport
+
+    async def on_receive(self, message: UMessage) -> None:
+        await self.transport.send(
+            UMessageBuilder.response_for_request(message.attributes).build_from_upayload(
+                UPayload.pack_from_data_and_format(message.payload, message.attributes.payload_format)
+            )
+        )
+
+
+def run_echo(domain: str, directory: str, ready) -> None:
+    async def main():
+        transport = SharedMemoryUTransport(ECHO, domain, directory=directory)
+        methods = UUri(ue_id=ECHO.ue_id, ue_version_major=1, resource_id=UriFactory.WILDCARD_RESOURCE_ID)
+        await transport.register_listener(PUBLISHER, EchoListener(transport), methods)
+        ready.set()
+        # Serves until the parent asks to stop
+        while not os.path.exists(os.path.join(directory, "stop")):
+            await asyncio.sleep(0.01)
+        await transport.close()
+
+    asyncio.run(main())
+
+
+class TestSharedMemoryRing(unittest.TestCase):
+    def test_write_and_read_frames_across_the_end_of_the_ring(self):
+        ring = SharedMemoryRing.create("uprotocol-test-" + uuid.uuid4().hex[:8], 64)
+        try:
+            for i in range(20):
+                frames = [bytes([i]) * 10, bytes([i + 1]) * 17]
+                for frame in frames:
+                    self.assertTrue(ring.write(frame))
+                self.assertEqual(ring.read_all(), frames)
+            self.assertTrue(ring.write(b"x" * 60))
+            self.assertFalse(ring.write(b"y"))
+            self.assertEqual(ring.read_all(), [b"x" * 60])
+        finally:
+            ring.close(unlink=True)
+
+
+class TestSharedMemoryUTransport(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.domain = "test-" + uuid.uuid4().hex[:8]
+        self.transports = []
+
+    async def asyncTearDown(self):
+        for transport in self.transports:
+            await transport.close()
+        self.directory.cleanup()
+
+    def create_transport(self, source: UUri, **kwargs) -> SharedMemoryUTransport:
+        transport = SharedMemoryUTransport(
+            source, self.domain, directory=self.directory.name, discovery_interval=0, **kwargs
+        )
+        self.transports.append(transport)
+        return transport
+
+    async def test_publish_to_all_receivers(self):
+        publisher = self.create_transport(PUBLISHER)
+        subscriber = self.create_transport(SUBSCRIBER)
+        listener = QueueListener()
+        local_listener = QueueListener()
+        self.assertEqual((await subscriber.register_listener(TOPIC, listener, None)).code, UCode.OK)
+        await publisher.register_listener(TOPIC, local_listener, None)
+
+        payload = UPayload.pack(UUri(ue_id=1))
+        for _ in range(3):
+            status = await publisher.send(UMessageBuilder.publish(TOPIC).build_from_upayload(payload))
+            self.assertEqual(status.code, UCode.OK)
+        for queue in (listener.messages, local_listener.messages):
+            for _ in range(3):
+                message = await asyncio.wait_for(queue.get(), 1)
+                self.assertEqual(message.payload, payload.data)
+
+        # Unregistered listeners and messages from other sources are not dispatched
+        await subscriber.unregister_listener(TOPIC, listener, None)
+        other_topic = UUri(ue_id=4, ue_version_major=1, resource_id=0x8001)
+        await publisher.send(UMessageBuilder.publish(other_topic).build())
+        await publisher.send(UMessageBuilder.publish(TOPIC).build())
+        await asyncio.wait_for(local_listener.messages.get(), 1)
+        await asyncio.sleep(0.01)
+        self.assertTrue(listener.messages.empty())
+        self.assertTrue(local_listener.messages.empty())
+
+    async def test_send_to_sink(self):
+        publisher = self.create_transport(PUBLISHER)
+        subscriber = self.create_transport(SUBSCRIBER)
+        listener = QueueListener()
+        await subscriber.register_listener(TOPIC, listener, SUBSCRIBER)
+        status = await publisher.send(UMessageBuilder.notification(TOPIC, SUBSCRIBER).build())
+        self.assertEqual(status.code, UCode.OK)
+        message = await asyncio.wait_for(listener.messages.get(), 1)
+        self.assertEqual(message.attributes.sink, SUBSCRIBER)
+
+        status = await publisher.send(UMessageBuilder.notification(TOPIC, ECHO).build())
+        self.assertEqual(status.code, UCode.UNAVAILABLE)
+        status = await publisher.send(UMessage())
+        self.assertEqual(status.code, UCode.INVALID_ARGUMENT)
+
+    async def test_full_ring(self):
+        publisher = self.create_transport(PUBLISHER)
+        self.create_transport(SUBSCRIBER, capacity=256)
+        message = UMessageBuilder.notification(TOPIC, SUBSCRIBER).build_from_upayload(
+            UPayload.pack(UUri(authority_name="x" * 100))
+        )
+        self.assertEqual((await publisher.send(message)).code, UCode.OK)
+        # The subscriber did not register a listener yet, so it does not consume its ring
+        self.assertEqual((await publisher.send(message)).code, UCode.RESOURCE_EXHAUSTED)
+
+    async def test_same_source_and_stale_ring(self):
+        self.create_transport(PUBLISHER)
+        with self.assertRaises(ValueError):
+            SharedMemoryUTransport(PUBLISHER, self.domain, directory=self.directory.name)
+
+        # A ring left behind by a receiver that did not close is replaced
+        stale = SharedMemoryUTransport(SUBSCRIBER, self.domain, directory=self.directory.name)
+        os.close(stale.doorbell_fd)
+        os.close(stale.doorbell_writer_fd)
+        stale.ring.close()
+        self.create_transport(SUBSCRIBER)
+
+    async def test_request_response_across_processes(self):
+        context = multiprocessing.get_context("spawn")
+        ready = context.Event()
+        process = context.Process(target=run_echo, args=(self.domain, self.directory.name, ready))
+        process.start()
+        try:
+            self.assertTrue(await asyncio.get_running_loop().run_in_executor(None, ready.wait, 10))
+            client = self.create_transport(PUBLISHER)
+            listener = QueueListener()
+            method = UUri(ue_id=20, ue_version_major=1, resource_id=1)
+            await client.register_listener(method, listener, PUBLISHER)
+            request = UMessageBuilder.request(PUBLISHER, method, 1000).build_from_upayload(UPayload.pack(TOPIC))
+            self.assertEqual((await client.send(request)).code, UCode.OK)
+            response = await asyncio.wait_for(listener.messages.get(), 5)
+            self.assertEqual(response.attributes.reqid, request.attributes.id)
+            self.assertEqual(
+                UPayload.unpack_data_format(response.payload, response.attributes.payload_format, UUri), TOPIC
+            )
+        finally:
+            open(os.path.join(self.directory.name, "stop"), "w").close()
+            await asyncio.get_running_loop().run_in_executor(None, process.join, 10)
+        self.assertEqual(process.exitcode, 0)
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, "_14_1.fifo")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,263 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import unittest
+import uuid
+
+from uprotocol.communication.upayload import UPayload
+from uprotocol.transport.builder.umessagebuilder import UMessageBuilder
+from uprotocol.transport.socketutransport import LENGTH, FrameDecoder, SocketUTransport
+from uprotocol.transport.ulistener import UListener
+from uprotocol.uri.factory.uri_factory import UriFactory
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+
+TOPIC = UUri(ue_id=4, ue_version_major=1, resource_id=0x8000)
+PUBLISHER = UUri(ue_id=4, ue_version_major=1)
+SUBSCRIBER = UUri(ue_id=10, ue_version_major=1)
+ECHO = UUri(ue_id=20, ue_version_major=1)
+
+
+class QueueListener(UListener):
+    def __init__(self):
+        self.messages = asyncio.Queue()
+
+    async def on_receive(self, message: UMessage) -> None:
+        await self.messages.put(message)
+
+
+class EchoListener(UListener):
+    def __init__(self, transport):
+        self.transport = transport
+
+    async def on_receive(self, message: UMessage) -> None:
+        await self.transport.send(
+            UMessageBuilder.response_for_request(message.attributes).build_from_upayload(
+                UPayload.pack_from_data_and_format(message.payload, message.attributes.payload_format)
+            )
+        )
+
+
+def run_echo(domain: str, directory: str, host, ready) -> None:
+    async def main():
+        transport = SocketUTransport(ECHO, domain, directory=directory, host=host)
+        methods = UUri(ue_id=ECHO.ue_id, ue_version_major=1, resource_id=UriFactory.WILDCARD_RESOURCE_ID)
+        await transport.register_listener(PUBLISHER, EchoListener(transport), methods)
+        ready.set()
+        # Serves until the parent asks to stop
+        while not os.path.exists(os.path.join(directory, "stop")):
+            await asyncio.sleep(0.01)
+        await transport.close()
+
+    asyncio.run(main())
+
+
+class TestFrameDecoder(unittest.TestCase):
+    def test_frames_split_across_reads(self):
+        frames = [b"a" * 3, b"", b"b" * 300, b"c"]
+        stream = b"".join(LENGTH.pack(len(frame)) + frame for frame in frames)
+        decoder = FrameDecoder(1024)
+        self.assertEqual(decoder.feed(stream), frames)
+        decoded = []
+        for i in range(0, len(stream), 5):
+            decoded.extend(decoder.feed(stream[i : i + 5]))
+        self.assertEqual(decoded, frames)
+        self.assertEqual(len(decoder.buffer), 0)
+
+    def test_frame_too_large(self):
+        decoder = FrameDecoder(16)
+        self.assertEqual(decoder.feed(LENGTH.pack(16) + b"x"), [])
+        with self.assertRaises(ValueError):
+            FrameDecoder(16).feed(LENGTH.pack(17))
+
+
+class TestSocketUTransport(unittest.IsolatedAsyncioTestCase):
+    host = None
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.domain = "test-" + uuid.uuid4().hex[:8]
+        self.transports = []
+
+    async def asyncTearDown(self):
+        for transport in self.transports:
+            await transport.close()
+        self.directory.cleanup()
+
+    def create_transport(self, source: UUri, **kwargs) -> SocketUTransport:
+        transport = SocketUTransport(
+            source, self.domain, directory=self.directory.name, host=self.host, discovery_interval=0, **kwargs
+        )
+        self.transports.append(transport)
+        return transport
+
+    async def test_publish_to_all_receivers(self):
+        publisher = self.create_transport(PUBLISHER)
+        subscriber = self.create_transport(SUBSCRIBER)
+        listener = QueueListener()
+        local_listener = QueueListener()
+        self.assertEqual((await subscriber.register_listener(TOPIC, listener, None)).code, UCode.OK)
+        await publisher.register_listener(TOPIC, local_listener, None)
+
+        payload = UPayload.pack(UUri(ue_id=1))
+        for _ in range(3):
+            status = await publisher.send(UMessageBuilder.publish(TOPIC).build_from_upayload(payload))
+            self.assertEqual(status.code, UCode.OK)
+        for queue in (listener.messages, local_listener.messages):
+            for _ in range(3):
+                message = await asyncio.wait_for(queue.get(), 1)
+                self.assertEqual(message.payload, payload.data)
+
+        # Unregistered listeners and messages from other sources are not dispatched
+        await subscriber.unregister_listener(TOPIC, listener, None)
+        other_topic = UUri(ue_id=4, ue_version_major=1, resource_id=0x8001)
+        await publisher.send(UMessageBuilder.publish(other_topic).build())
+        await publisher.send(UMessageBuilder.publish(TOPIC).build())
+        await asyncio.wait_for(local_listener.messages.get(), 1)
+        await asyncio.sleep(0.01)
+        self.assertTrue(listener.messages.empty())
+        self.assertTrue(local_listener.messages.empty())
+
+    async def test_send_to_sink(self):
+        publisher = self.create_transport(PUBLISHER)
+        subscriber = self.create_transport(SUBSCRIBER)
+        listener = QueueListener()
+        await subscriber.register_listener(TOPIC, listener, SUBSCRIBER)
+        status = await publisher.send(UMessageBuilder.notification(TOPIC, SUBSCRIBER).build())
+        self.assertEqual(status.code, UCode.OK)
+        message = await asyncio.wait_for(listener.messages.get(), 1)
+        self.assertEqual(message.attributes.sink, SUBSCRIBER)
+
+        status = await publisher.send(UMessageBuilder.notification(TOPIC, ECHO).build())
+        self.assertEqual(status.code, UCode.UNAVAILABLE)
+        status = await publisher.send(UMessage())
+        self.assertEqual(status.code, UCode.INVALID_ARGUMENT)
+
+        # The connection to a closed receiver is dropped
+        await subscriber.close()
+        await asyncio.sleep(0.01)
+        status = await publisher.send(UMessageBuilder.notification(TOPIC, SUBSCRIBER).build())
+        self.assertEqual(status.code, UCode.UNAVAILABLE)
+        self.assertEqual(publisher.peers, {})
+
+    async def test_frames_written_in_batches(self):
+        publisher = self.create_transport(PUBLISHER)
+        subscriber = self.create_transport(SUBSCRIBER)
+        listener = QueueListener()
+        await subscriber.register_listener(TOPIC, listener, SUBSCRIBER)
+        message = UMessageBuilder.notification(TOPIC, SUBSCRIBER).build()
+        await publisher.send(message)
+        await asyncio.wait_for(listener.messages.get(), 1)
+
+        # The frames sent during a loop iteration wait for a single write
+        for _ in range(100):
+            await publisher.send(message)
+        peer = publisher.peers[subscriber.key]
+        self.assertEqual(len(peer.chunks), 200)
+        for _ in range(100):
+            await asyncio.wait_for(listener.messages.get(), 1)
+        self.assertEqual(len(peer.chunks), 0)
+
+        # Past the batch size the frames are written right away
+        publisher.batch_size = peer.batch_size = 1
+        await publisher.send(message)
+        self.assertEqual(len(peer.chunks), 0)
+        await asyncio.wait_for(listener.messages.get(), 1)
+
+    async def test_same_source(self):
+        transport = self.create_transport(PUBLISHER)
+        await transport.register_listener(TOPIC, QueueListener(), None)
+        other = self.create_transport(PUBLISHER)
+        status = await other.register_listener(TOPIC, QueueListener(), None)
+        self.assertEqual(status.code, UCode.ALREADY_EXISTS)
+        self.assertEqual(len(other.listeners), 0)
+
+    async def test_concurrent_registrations_start_once(self):
+        transport = self.create_transport(PUBLISHER)
+        statuses = await asyncio.gather(
+            transport.register_listener(TOPIC, QueueListener(), None),
+            transport.register_listener(TOPIC, QueueListener(), SUBSCRIBER),
+        )
+        self.assertEqual([status.code for status in statuses], [UCode.OK, UCode.OK])
+        self.assertEqual(len(transport.listeners), 2)
+        self.assertIsNone(transport.starting)
+        if self.host is not None:
+            with open(transport._get_path(transport.key)) as file:
+                self.assertEqual(int(file.read()), transport.server.sockets[0].getsockname()[1])
+
+    async def test_unrelated_server_is_not_a_receiver(self):
+        async def serve(reader, writer):
+            writer.write(b"HTTP/1.1 400 Bad Request\r\n\r\n")
+            writer.close()
+
+        # An unrelated server took over the address of a receiver that did not clean up
+        path = os.path.join(self.directory.name, SocketUTransport._get_key(SUBSCRIBER) + ".sock")
+        if self.host is None:
+            server = await asyncio.start_unix_server(serve, path)
+        else:
+            server = await asyncio.start_server(serve, self.host, 0)
+            path = path[: -len(".sock")] + ".port"
+            with open(path, "w") as file:
+                file.write(str(server.sockets[0].getsockname()[1]))
+        try:
+            publisher = self.create_transport(PUBLISHER)
+            status = await publisher.send(UMessageBuilder.notification(TOPIC, SUBSCRIBER).build())
+            self.assertEqual(status.code, UCode.UNAVAILABLE)
+
+            # The receiver replaces the stale address
+            subscriber = self.create_transport(SUBSCRIBER)
+            listener = QueueListener()
+            self.assertEqual((await subscriber.register_listener(TOPIC, listener, SUBSCRIBER)).code, UCode.OK)
+            status = await publisher.send(UMessageBuilder.notification(TOPIC, SUBSCRIBER).build())
+            self.assertEqual(status.code, UCode.OK)
+            await asyncio.wait_for(listener.messages.get(), 1)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    async def test_request_response_across_processes(self):
+        context = multiprocessing.get_context("spawn")
+        ready = context.Event()
+        process = context.Process(target=run_echo, args=(self.domain, self.directory.name, self.host, ready))
+        process.start()
+        try:
+            self.assertTrue(await asyncio.get_running_loop().run_in_executor(None, ready.wait, 10))
+            client = self.create_transport(PUBLISHER)
+            listener = QueueListener()
+            method = UUri(ue_id=20, ue_version_major=1, resource_id=1)
+            await client.register_listener(method, listener, PUBLISHER)
+            request = UMessageBuilder.request(PUBLISHER, method, 1000).build_from_upayload(UPayload.pack(TOPIC))
+            self.assertEqual((await client.send(request)).code, UCode.OK)
+            response = await asyncio.wait_for(listener.messages.get(), 5)
+            self.assertEqual(response.attributes.reqid, request.attributes.id)
+            self.assertEqual(
+                UPayload.unpack_data_format(response.payload, response.attributes.payload_format, UUri), TOPIC
+            )
+        finally:
+            open(os.path.join(self.directory.name, "stop"), "w").close()
+            await asyncio.get_running_loop().run_in_executor(None, process.join, 10)
+        self.assertEqual(process.exitcode, 0)
+
+
+class TestSocketUTransportOverTcp(TestSocketUTransport):
+    host = "127.0.0.1"
+
+
+if __name__ == '__main__':
+    unittest.main()
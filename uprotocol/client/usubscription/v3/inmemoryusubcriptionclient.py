@@ -12,15 +12,23 @@ terms of the Apache License Version 2.0 which is available at
 SPDX-License-Identifier: Apache-2.0
 """
 
-from typing import Dict, Optional
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, Iterable, List, Mapping, Optional
 
+from uprotocol.client.usubscription.v3.subscriptionchangedispatcher import (
+    DispatchMode,
+    SubscriptionChangeDispatcher,
+)
 from uprotocol.client.usubscription.v3.subscriptionchangehandler import SubscriptionChangeHandler
+from uprotocol.client.usubscription.v3.subscriptionsnapshotstore import SubscriptionSnapshotStore
 from uprotocol.client.usubscription.v3.usubscriptionclient import USubscriptionClient
 from uprotocol.communication.calloptions import CallOptions
 from uprotocol.communication.inmemoryrpcclient import InMemoryRpcClient
 from uprotocol.communication.notifier import Notifier
 from uprotocol.communication.rpcclient import RpcClient
 from uprotocol.communication.rpcmapper import RpcMapper
+from uprotocol.communication.rpcresult import RpcResult
 from uprotocol.communication.simplenotifier import SimpleNotifier
 from uprotocol.communication.upayload import UPayload
 from uprotocol.communication.ustatuserror import UStatusError
@@ -32,6 +40,8 @@ from uprotocol.core.usubscription.v3.usubscription_pb2 import (
     FetchSubscriptionsResponse,
     NotificationsRequest,
     NotificationsResponse,
+    SubscriberInfo,
+    Subscription,
     SubscriptionRequest,
     SubscriptionResponse,
     SubscriptionStatus,
@@ -49,17 +59,24 @@ from uprotocol.v1.umessage_pb2 import UMessage
 from uprotocol.v1.uri_pb2 import UUri
 from uprotocol.v1.ustatus_pb2 import UStatus
 
+logger = logging.getLogger(__name__)
+
 
 class MyNotificationListener(UListener):
-    def __init__(self, handlers):
+    def __init__(self, handlers, subscriptions=None, dispatcher: Optional[SubscriptionChangeDispatcher] = None):
         """
         Initializes a new instance of the MyNotificationListener class.
 
-        :param handlers: A dictionary mapping topics to their respective handlers.
+        :param handlers: A dictionary mapping topics to the list of their handlers.
                          The handlers are responsible for processing subscription
                          change notifications for their corresponding topics.
+        :param subscriptions: Optional dictionary mapping the subscribed topics to their last known
+                              SubscriptionStatus, kept up to date with the received notifications.
+        :param dispatcher: Optional dispatcher running the handlers, by default they are run inline.
         """
         self.handlers = handlers
+        self.subscriptions = subscriptions if subscriptions is not None else {}
+        self.dispatcher = dispatcher if dispatcher is not None else SubscriptionChangeDispatcher(DispatchMode.INLINE)
 
     async def on_receive(self, message: UMessage) -> None:
         """
@@ -73,15 +90,24 @@ class MyNotificationListener(UListener):
         subscription_update = UPayload.unpack_data_format(message.payload, message.attributes.payload_format, Update)
 
         if subscription_update:
-            handler = self.handlers.get(UriSerializer.serialize(subscription_update.topic))
-            # Check if we have a handler registered for the subscription change notification
+            topic_str = UriSerializer.serialize(subscription_update.topic)
+            if topic_str in self.subscriptions:
+                if subscription_update.status.state in (
+                    SubscriptionStatus.State.SUBSCRIBED,
+                    SubscriptionStatus.State.SUBSCRIBE_PENDING,
+                ):
+                    self.subscriptions[topic_str] = subscription_update.status
+                else:
+                    # The next subscribe() goes to the USubscription service again
+                    del self.subscriptions[topic_str]
+            handlers = self.handlers.get(topic_str)
+            # Check if we have handlers registered for the subscription change notification
             # for the specific topic that triggered the subscription change notification.
             # It is possible that the client did not register one initially (i.e., they don't care to receive it).
-            if handler:
-                try:
-                    handler.handle_subscription_change(subscription_update.topic, subscription_update.status)
-                except Exception:
-                    pass
+            if handlers:
+                await self.dispatcher.dispatch(
+                    topic_str, handlers, subscription_update.topic, subscription_update.status
+                )
 
 
 class InMemoryUSubscriptionClient(USubscriptionClient):
@@ -92,7 +118,12 @@ class InMemoryUSubscriptionClient(USubscriptionClient):
     """
 
     def __init__(
-        self, transport: UTransport, rpc_client: Optional[RpcClient] = None, notifier: Optional[Notifier] = None
+        self,
+        transport: UTransport,
+        rpc_client: Optional[RpcClient] = None,
+        notifier: Optional[Notifier] = None,
+        snapshot_store: Optional[SubscriptionSnapshotStore] = None,
+        dispatcher: Optional[SubscriptionChangeDispatcher] = None,
     ):
         """
         Creates a new USubscription client passing UTransport, CallOptions, and an implementation
@@ -101,6 +132,10 @@ class InMemoryUSubscriptionClient(USubscriptionClient):
         :param transport: The transport to use for sending the notifications.
         :param rpc_client: The RPC client to use for sending the RPC requests.
         :param notifier: The notifier to use for registering the notification listener.
+        :param snapshot_store: Optional store where the subscriptions are saved periodically so that they can be
+                               restored with `restore()` after a restart.
+        :param dispatcher: Optional dispatcher running the SubscriptionChangeHandlers, by default each topic is
+                           dispatched from its own task so that a slow handler does not stall the other topics.
         """
         if not transport:
             raise ValueError(UTransport.TRANSPORT_NULL_ERROR)
@@ -113,8 +148,23 @@ class InMemoryUSubscriptionClient(USubscriptionClient):
         self.transport = transport
         self.rpc_client = rpc_client
         self.notifier = notifier
-        self.handlers: Dict[str, SubscriptionChangeHandler] = {}
-        self.notification_handler: UListener = MyNotificationListener(self.handlers)
+        self.handlers: Dict[str, List[SubscriptionChangeHandler]] = {}
+        # Last known status of the topics subscribed to by this client
+        self.subscriptions: Dict[str, SubscriptionStatus] = {}
+        # Number of subscribe() calls per local listener of the topics, the listener is registered with the
+        # transport once and unregistered when its last subscription is released
+        self.listeners: Dict[str, Dict[UListener, int]] = {}
+        # Subscription requests in flight by topic, shared by the concurrent subscriptions to the topic
+        self.pending_subscriptions: Dict[str, asyncio.Future] = {}
+        self.dispatcher = dispatcher if dispatcher is not None else SubscriptionChangeDispatcher(DispatchMode.TASK)
+        self.notification_handler: UListener = MyNotificationListener(
+            self.handlers, self.subscriptions, self.dispatcher
+        )
+        self.snapshot_store = snapshot_store
+        self.snapshot_task: Optional[asyncio.Task] = None
+        # Save of a snapshot running in the executor, awaited before the final save when closing
+        self.snapshot_save: Optional[asyncio.Future] = None
+        self.reconcile_task: Optional[asyncio.Task] = None
         self.is_listener_registered = False
         service_descriptor = usubscription_pb2.DESCRIPTOR.services_by_name["uSubscription"]
         self.notification_uri = UriFactory.from_proto(service_descriptor, 0x8000)
@@ -142,16 +192,18 @@ class InMemoryUSubscriptionClient(USubscriptionClient):
         when we subscribe to remote topics that the device we are on has not yet a subscriber that has subscribed
         to said topic.
 
-        NOTE: Calling this method multiple times with different handlers will result in UCode.ALREADY_EXISTS being
-        returned.
+        NOTE: Calling this method multiple times with different handlers adds the handlers, each of them is
+        called for the changes of the topic. Once subscribed, subscribing to the topic again, for example with
+        another listener, is served from the locally known subscription status without calling the USubscription
+        service. The listeners are reference counted, a listener is unsubscribed once unsubscribe() was called as
+        many times as subscribe().
 
         :param topic: The topic to subscribe to.
         :param listener: The listener function to be called when messages are received.
         :param options: Optional CallOptions used to communicate with USubscription service.
         :param handler: Optional handler function for handling subscription state changes.
         :return: An async operation that yields a SubscriptionResponse upon success or raises an exception with
-                 the failure reason as UStatus. UCode.ALREADY_EXISTS will be returned if called multiple times
-                 with different handlers.
+                 the failure reason as UStatus.
         """
         if not topic:
             raise ValueError("Subscribe topic missing")
@@ -160,25 +212,19 @@ class InMemoryUSubscriptionClient(USubscriptionClient):
         if not options:
             raise ValueError("CallOptions missing")
 
-        if not self.is_listener_registered:
-            # Ensure listener is registered before proceeding
-            status = await self.notifier.register_notification_listener(
-                self.notification_uri, self.notification_handler
-            )
-            if status.code != UCode.OK:
-                raise UStatusError.from_code_message(status.code, "Failed to register listener for rpc client")
-            self.is_listener_registered = True
-
-        request = SubscriptionRequest(topic=topic)
-        # Send the subscription request and handle the response
+        topic_str = UriSerializer.serialize(topic)
+        status = self.subscriptions.get(topic_str)
+        if status is not None:
+            # Already subscribed by this client, no need to ask the USubscription service again
+            response = SubscriptionResponse(topic=topic, status=status)
+        else:
+            response = await self._subscribe(topic, options)
 
-        future_result = self.rpc_client.invoke_method(self.subscribe_uri, UPayload.pack(request), options)
-
-        response = await RpcMapper.map_response(future_result, SubscriptionResponse)
         if (
             response.status.state == SubscriptionStatus.State.SUBSCRIBED
             or response.status.state == SubscriptionStatus.State.SUBSCRIBE_PENDING
         ):
+            self.subscriptions[topic_str] = response.status
             # If registering the listener fails, we end up in a situation where we have
             # successfully (logically) subscribed to the topic via the USubscription service,
             # but we have not been able to register the listener with the local transport.
@@ -186,15 +232,217 @@ class InMemoryUSubscriptionClient(USubscriptionClient):
             # but are not being consumed. Apart from this inefficiency, this does not pose
             # a real problem. Since we return a failed future, the client might be inclined
             # to try again and (eventually) succeed in registering the listener as well.
-            await self.transport.register_listener(topic, listener)
+            if self._reserve_listener(topic_str, listener):
+                await self._register_listener(topic_str, topic, listener)
 
         if handler:
-            topic_str = UriSerializer.serialize(topic)
-            if topic_str in self.handlers and self.handlers[topic_str] != handler:
-                raise UStatusError.from_code_message(UCode.ALREADY_EXISTS, "Handler already registered")
-            self.handlers[topic_str] = handler
+            self._add_handler(topic_str, handler)
         return response
 
+    async def subscribe_many(
+        self,
+        topics: Iterable[UUri],
+        listener_map: Mapping[str, UListener],
+        options: CallOptions = CallOptions.DEFAULT,
+        max_in_flight: int = 32,
+    ) -> Dict[str, RpcResult]:
+        """
+        Subscribes to many topics at once, for example at boot.
+
+        The subscription requests are sent concurrently, at most `max_in_flight` at a time, topics this client
+        is already subscribed to are served from the known subscription status. Once all the responses are in,
+        the listeners of the subscribed topics are registered with the transport together.
+
+        :param topics: The topics to subscribe to.
+        :param listener_map: The listener of each topic, keyed by the serialized topic URI.
+        :param options: Optional CallOptions used to communicate with USubscription service.
+        :param max_in_flight: The maximum number of subscription requests in flight.
+        :return: Returns the RpcResult of each topic keyed by the serialized topic URI, a success with
+                 the SubscriptionResponse or a failure with the reason as UStatus.
+        """
+        if topics is None:
+            raise ValueError("Subscribe topics missing")
+        if listener_map is None:
+            raise ValueError("Listener map missing")
+        if not options:
+            raise ValueError("CallOptions missing")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be greater than 0")
+        topics = {UriSerializer.serialize(topic): topic for topic in topics}
+        for topic_str in topics:
+            if listener_map.get(topic_str) is None:
+                raise ValueError(f"Listener missing for topic {topic_str}")
+
+        results = await self._subscribe_all(topics, options, max_in_flight, True)
+
+        registrations = []
+        for (topic_str, topic), result in zip(topics.items(), results):
+            if result.is_failure() or result.success_value().status.state not in (
+                SubscriptionStatus.State.SUBSCRIBED,
+                SubscriptionStatus.State.SUBSCRIBE_PENDING,
+            ):
+                continue
+            self.subscriptions[topic_str] = result.success_value().status
+            listener = listener_map[topic_str]
+            if self._reserve_listener(topic_str, listener):
+                registrations.append(self._register_listener(topic_str, topic, listener))
+        await asyncio.gather(*registrations)
+        return dict(zip(topics, results))
+
+    async def _subscribe_all(
+        self, topics: Dict[str, UUri], options: CallOptions, max_in_flight: int, use_known_status: bool
+    ) -> List[RpcResult]:
+        await self._register_notification_listener()
+        self._start_snapshots()
+        window = asyncio.Semaphore(max_in_flight)
+
+        async def subscribe_topic(topic_str: str, topic: UUri) -> RpcResult:
+            status = self.subscriptions.get(topic_str) if use_known_status else None
+            if status is not None:
+                return RpcResult.success(SubscriptionResponse(topic=topic, status=status))
+            async with window:
+                future_result = self._invoke_subscribe(topic_str, topic, options)
+                return await RpcMapper.map_response_to_result(future_result, SubscriptionResponse)
+
+        return await asyncio.gather(*[subscribe_topic(topic_str, topic) for topic_str, topic in topics.items()])
+
+    async def restore(
+        self,
+        listener_map: Mapping[str, UListener],
+        handler_map: Optional[Mapping[str, SubscriptionChangeHandler]] = None,
+        options: CallOptions = CallOptions.DEFAULT,
+        max_in_flight: int = 32,
+    ) -> Dict[str, SubscriptionStatus]:
+        """
+        Restore the subscriptions saved in the snapshot store, typically right after a restart.
+
+        The listeners (and handlers) of the saved topics are registered immediately with their last known status,
+        without waiting for the USubscription service. The subscriptions are then reconciled with the service in
+        the background: the status of each topic is refreshed and the topics the service no longer considers
+        subscribed are released. Saved topics without a listener in the map are not restored.
+
+        :param listener_map: The listener of each topic to restore, keyed by the serialized topic URI.
+        :param handler_map: Optional SubscriptionChangeHandler of each topic, keyed by the serialized topic URI.
+        :param options: The CallOptions used to reconcile the subscriptions with the USubscription service.
+        :param max_in_flight: The maximum number of subscription requests in flight while reconciling.
+        :return: Returns the last known SubscriptionStatus of the restored topics keyed by the serialized topic URI.
+        """
+        if self.snapshot_store is None:
+            raise ValueError("Snapshot store missing")
+        if listener_map is None:
+            raise ValueError("Listener map missing")
+        handler_map = handler_map or {}
+        snapshot = await asyncio.get_running_loop().run_in_executor(None, self.snapshot_store.load)
+
+        restored: Dict[str, SubscriptionStatus] = {}
+        topics: Dict[str, UUri] = {}
+        registrations = []
+        for topic_str, status in snapshot.items():
+            listener = listener_map.get(topic_str)
+            if listener is None:
+                continue
+            topic = UriSerializer.deserialize(topic_str)
+            restored[topic_str] = self.subscriptions.setdefault(topic_str, status)
+            topics[topic_str] = topic
+            if self._reserve_listener(topic_str, listener):
+                registrations.append(self._register_listener(topic_str, topic, listener))
+            if handler_map.get(topic_str):
+                self._add_handler(topic_str, handler_map[topic_str])
+        await asyncio.gather(*registrations)
+
+        if topics:
+            self.reconcile_task = asyncio.ensure_future(self._reconcile(topics, options, max_in_flight))
+            self.reconcile_task.add_done_callback(self._log_task_failure)
+        self._start_snapshots()
+        return restored
+
+    async def _reconcile(self, topics: Dict[str, UUri], options: CallOptions, max_in_flight: int) -> None:
+        results = await self._subscribe_all(topics, options, max_in_flight, False)
+        for (topic_str, topic), result in zip(topics.items(), results):
+            if result.is_failure():
+                # The service cannot be reached, keep the last known status
+                continue
+            status = result.success_value().status
+            if status.state in (SubscriptionStatus.State.SUBSCRIBED, SubscriptionStatus.State.SUBSCRIBE_PENDING):
+                self.subscriptions[topic_str] = status
+                continue
+            self.subscriptions.pop(topic_str, None)
+            self.handlers.pop(topic_str, None)
+            for listener in self.listeners.pop(topic_str, {}):
+                await self.transport.unregister_listener(topic, listener)
+
+    def _start_snapshots(self) -> None:
+        if self.snapshot_store is not None and self.snapshot_task is None:
+            self.snapshot_task = asyncio.ensure_future(self._save_snapshots())
+            self.snapshot_task.add_done_callback(self._log_task_failure)
+
+    async def _save_snapshots(self) -> None:
+        saved = None
+        while True:
+            await asyncio.sleep(self.snapshot_store.interval / 1000)
+            snapshot = dict(self.subscriptions)
+            if snapshot != saved:
+                self.snapshot_save = asyncio.get_running_loop().run_in_executor(
+                    None, self.snapshot_store.save, snapshot
+                )
+                # Shielded so that closing can wait for the save still running in the executor
+                await asyncio.shield(self.snapshot_save)
+                saved = snapshot
+
+    @staticmethod
+    def _log_task_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Subscription background task failed", exc_info=task.exception())
+
+    async def _register_notification_listener(self) -> None:
+        if not self.is_listener_registered:
+            # Ensure listener is registered before proceeding
+            status = await self.notifier.register_notification_listener(
+                self.notification_uri, self.notification_handler
+            )
+            if status.code != UCode.OK:
+                raise UStatusError.from_code_message(status.code, "Failed to register listener for rpc client")
+            self.is_listener_registered = True
+
+    async def _subscribe(self, topic: UUri, options: CallOptions) -> SubscriptionResponse:
+        await self._register_notification_listener()
+        self._start_snapshots()
+
+        # Send the subscription request and handle the response
+        future_result = self._invoke_subscribe(UriSerializer.serialize(topic), topic, options)
+
+        return await RpcMapper.map_response(future_result, SubscriptionResponse)
+
+    def _invoke_subscribe(self, topic_str: str, topic: UUri, options: CallOptions) -> asyncio.Future:
+        # Concurrent subscriptions to a topic wait for the response of the same request, a caller being cancelled
+        # does not cancel the request of the others
+        request = self.pending_subscriptions.get(topic_str)
+        if request is None:
+            request = asyncio.ensure_future(
+                self.rpc_client.invoke_method(
+                    self.subscribe_uri, UPayload.pack(SubscriptionRequest(topic=topic)), options
+                )
+            )
+            self.pending_subscriptions[topic_str] = request
+
+            def done(_):
+                if self.pending_subscriptions.get(topic_str) is request:
+                    del self.pending_subscriptions[topic_str]
+
+            request.add_done_callback(done)
+        return asyncio.shield(request)
+
+    def get_subscription_status(self, topic: UUri) -> Optional[SubscriptionStatus]:
+        """
+        Get the last known status of a topic subscribed to by this client, without calling the
+        USubscription service.
+
+        :param topic: The topic to get the subscription status for.
+        :return: Returns the SubscriptionStatus kept up to date with the subscription change notifications,
+                 or None if this client is not subscribed to the topic.
+        """
+        return self.subscriptions.get(UriSerializer.serialize(topic))
+
     async def unsubscribe(
         self, topic: UUri, listener: UListener, options: CallOptions = CallOptions.DEFAULT
     ) -> UStatus:
@@ -217,15 +465,58 @@ class InMemoryUSubscriptionClient(USubscriptionClient):
             raise ValueError("Listener missing")
         if not options:
             raise ValueError("CallOptions missing")
+        topic_str = UriSerializer.serialize(topic)
+        listeners = self.listeners.get(topic_str)
+        if listeners and (listeners.get(listener, 0) > 1 or len(listeners.keys() - {listener}) > 0):
+            # Other subscriptions of the topic remain, only release the one of the listener
+            return await self._release_listener(topic_str, topic, listener)
+
         request = UnsubscribeRequest(topic=topic)
         future_result = self.rpc_client.invoke_method(self.unsubscribe_uri, UPayload.pack(request), options)
 
         response = await RpcMapper.map_response_to_result(future_result, UnsubscribeResponse)
         if response.is_success():
-            self.handlers.pop(UriSerializer.serialize(topic), None)
+            self.handlers.pop(topic_str, None)
+            self.subscriptions.pop(topic_str, None)
+            self.listeners.pop(topic_str, None)
             return await self.transport.unregister_listener(topic, listener)
         return response.failure_value()
 
+    def _add_handler(self, topic_str: str, handler: SubscriptionChangeHandler) -> None:
+        handlers = self.handlers.setdefault(topic_str, [])
+        if handler not in handlers:
+            handlers.append(handler)
+
+    def _reserve_listener(self, topic_str: str, listener: UListener) -> bool:
+        # The subscription is counted before the listener is registered, so that a concurrent subscription with the
+        # same listener does not register it twice. Returns True if the listener must be registered
+        listeners = self.listeners.setdefault(topic_str, {})
+        count = listeners.get(listener, 0)
+        listeners[listener] = count + 1
+        return count == 0
+
+    async def _register_listener(self, topic_str: str, topic: UUri, listener: UListener) -> UStatus:
+        status = await self.transport.register_listener(topic, listener)
+        if status.code != UCode.OK:
+            # Give back the reservation so that subscribing again retries the registration
+            listeners = self.listeners.get(topic_str, {})
+            count = listeners.pop(listener, 0)
+            if count > 1:
+                listeners[listener] = count - 1
+            elif not listeners:
+                self.listeners.pop(topic_str, None)
+        return status
+
+    async def _release_listener(self, topic_str: str, topic: UUri, listener: UListener) -> UStatus:
+        listeners = self.listeners.get(topic_str, {})
+        count = listeners.pop(listener, 0)
+        if count > 1:
+            listeners[listener] = count - 1
+            return UStatus(code=UCode.OK)
+        if not listeners:
+            self.listeners.pop(topic_str, None)
+        return await self.transport.unregister_listener(topic, listener)
+
     async def unregister_listener(self, topic: UUri, listener: UListener) -> UStatus:
         """
         Unregisters a listener and removes any registered SubscriptionChangeHandler for the topic.
@@ -242,15 +533,33 @@ class InMemoryUSubscriptionClient(USubscriptionClient):
             raise ValueError("Unsubscribe topic missing")
         if not listener:
             raise ValueError("Request listener missing")
-        status = await self.transport.unregister_listener(topic, listener)
-        self.handlers.pop(UriSerializer.serialize(topic), None)
+        topic_str = UriSerializer.serialize(topic)
+        status = await self._release_listener(topic_str, topic, listener)
+        if topic_str not in self.listeners:
+            self.handlers.pop(topic_str, None)
         return status
 
     async def close(self):
         """
         Close the InMemoryRpcClient by clearing stored requests and unregistering the listener.
         """
+        if self.reconcile_task is not None:
+            self.reconcile_task.cancel()
+            self.reconcile_task = None
+        if self.snapshot_task is not None:
+            self.snapshot_task.cancel()
+            self.snapshot_task = None
+            if self.snapshot_save is not None:
+                # A save still running would replace the final snapshot with an older one
+                await asyncio.gather(self.snapshot_save, return_exceptions=True)
+                self.snapshot_save = None
+            # Keep the subscriptions as they were when closing for the next start, a copy is saved as they are
+            # cleared below, in the executor as the periodic saves so that the loop is not blocked
+            await asyncio.get_running_loop().run_in_executor(None, self.snapshot_store.save, dict(self.subscriptions))
+        await self.dispatcher.close()
         self.handlers.clear()
+        self.subscriptions.clear()
+        self.listeners.clear()
         await self.notifier.unregister_notification_listener(self.notification_uri, self.notification_handler)
 
     async def register_for_notifications(
@@ -277,15 +586,14 @@ class InMemoryUSubscriptionClient(USubscriptionClient):
         if not options:
             raise ValueError("CallOptions missing")
 
+        # The changes are received through the notification listener, also when not subscribed to any topic
+        await self._register_notification_listener()
         request = NotificationsRequest(topic=topic)
 
         response = self.rpc_client.invoke_method(self.register_for_notification_uri, UPayload.pack(request), options)
         notifications_response = await RpcMapper.map_response(response, NotificationsResponse)
         if handler:
-            topic_str = UriSerializer.serialize(topic)
-            if topic_str in self.handlers and self.handlers[topic_str] != handler:
-                raise UStatusError.from_code_message(UCode.ALREADY_EXISTS, "Handler already registered")
-            self.handlers[topic_str] = handler
+            self._add_handler(UriSerializer.serialize(topic), handler)
 
         return notifications_response
 
@@ -314,7 +622,12 @@ class InMemoryUSubscriptionClient(USubscriptionClient):
         response = self.rpc_client.invoke_method(self.unregister_for_notification_uri, UPayload.pack(request), options)
         notifications_response = await RpcMapper.map_response(response, NotificationsResponse)
 
-        self.handlers.pop(UriSerializer.serialize(topic), None)
+        topic_str = UriSerializer.serialize(topic)
+        handlers = self.handlers.get(topic_str, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers:
+            self.handlers.pop(topic_str, None)
 
         return notifications_response
 
@@ -358,3 +671,99 @@ class InMemoryUSubscriptionClient(USubscriptionClient):
 
         result = self.rpc_client.invoke_method(self.fetch_subscriptions_uri, UPayload.pack(request), options)
         return await RpcMapper.map_response(result, FetchSubscriptionsResponse)
+
+    def iter_subscribers(
+        self, topic: UUri, options: Optional[CallOptions] = CallOptions.DEFAULT, prefetch_pages: int = 2
+    ) -> AsyncIterator[SubscriberInfo]:
+        """
+        Iterate over the subscribers of a given produced topic, page by page.
+
+        The pages are requested using the offset of the request and the `has_more_records` flag of the response,
+        up to `prefetch_pages` pages are fetched ahead of the consumption so that only a bounded number of
+        subscribers is held in memory while the next pages are already on their way.
+
+        :param topic: The topic to fetch the subscribers for.
+        :param options: The `CallOptions` to be used for each fetch request.
+        :param prefetch_pages: The maximum number of pages fetched ahead of the consumption.
+        :return: An async iterator of the `SubscriberInfo` of the subscribers, raises an exception with
+                 the failure reason if a page cannot be fetched, like `fetch_subscribers()`.
+        """
+        if topic is None:
+            raise ValueError("Topic missing")
+        if options is None:
+            raise ValueError("CallOptions missing")
+        if prefetch_pages < 1:
+            raise ValueError("prefetch_pages must be greater than 0")
+
+        async def fetch_page(offset: int):
+            request = FetchSubscribersRequest(topic=topic, offset=offset)
+            result = self.rpc_client.invoke_method(self.fetch_subscribers_uri, UPayload.pack(request), options)
+            response = await RpcMapper.map_response(result, FetchSubscribersResponse)
+            return response.subscribers, response.has_more_records
+
+        return self._iter_pages(fetch_page, 0, prefetch_pages)
+
+    def iter_subscriptions(
+        self,
+        request: FetchSubscriptionsRequest,
+        options: Optional[CallOptions] = CallOptions.DEFAULT,
+        prefetch_pages: int = 2,
+    ) -> AsyncIterator[Subscription]:
+        """
+        Iterate over the subscriptions matching a request, page by page, starting from the offset of the request.
+
+        See `iter_subscribers()` for the paging and prefetching.
+
+        :param request: The request to fetch subscriptions for.
+        :param options: The `CallOptions` to be used for each fetch request.
+        :param prefetch_pages: The maximum number of pages fetched ahead of the consumption.
+        :return: An async iterator of the `Subscription` records, raises an exception with the failure reason
+                 if a page cannot be fetched, like `fetch_subscriptions()`.
+        """
+        if request is None:
+            raise ValueError("Request missing")
+        if options is None:
+            raise ValueError("CallOptions missing")
+        if prefetch_pages < 1:
+            raise ValueError("prefetch_pages must be greater than 0")
+
+        async def fetch_page(offset: int):
+            page_request = FetchSubscriptionsRequest()
+            page_request.CopyFrom(request)
+            page_request.offset = offset
+            result = self.rpc_client.invoke_method(self.fetch_subscriptions_uri, UPayload.pack(page_request), options)
+            response = await RpcMapper.map_response(result, FetchSubscriptionsResponse)
+            return response.subscriptions, response.has_more_records
+
+        return self._iter_pages(fetch_page, request.offset, prefetch_pages)
+
+    @staticmethod
+    async def _iter_pages(fetch_page, offset: int, prefetch_pages: int):
+        pages = asyncio.Queue(prefetch_pages)
+
+        async def produce():
+            nonlocal offset
+            try:
+                while True:
+                    records, has_more_records = await fetch_page(offset)
+                    await pages.put(records)
+                    offset += len(records)
+                    # An empty page cannot move the offset forward
+                    if not has_more_records or not records:
+                        break
+                await pages.put(None)
+            except Exception as e:
+                await pages.put(e)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                page = await pages.get()
+                if page is None:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                for record in page:
+                    yield record
+        finally:
+            producer.cancel()
@@ -0,0 +1,182 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import inspect
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from uprotocol.client.usubscription.v3.subscriptionchangehandler import SubscriptionChangeHandler
+from uprotocol.core.usubscription.v3.usubscription_pb2 import SubscriptionStatus
+from uprotocol.v1.uri_pb2 import UUri
+
+
+class DispatchMode(Enum):
+    # Handlers are run on the event loop before the next notification is processed
+    INLINE = "inline"
+    # Handlers are run from a task per topic so that a slow topic does not hold back the others
+    TASK = "task"
+    # Like TASK but synchronous handlers are run in an executor so that they cannot block the event loop
+    EXECUTOR = "executor"
+
+
+@dataclass
+class DispatchMetrics:
+    """
+    Counters of the subscription change handlers of a topic, latencies are in seconds.
+    """
+
+    dispatched: int = 0
+    failures: int = 0
+    suppressed: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+
+class SubscriptionChangeDispatcher:
+    """
+    Dispatches the subscription changes of a topic to its SubscriptionChangeHandlers.
+
+    The handlers can be synchronous or coroutines. The changes of a topic are delivered in order, but unless
+    the mode is DispatchMode.INLINE, each topic is dispatched independently so that a slow handler does not
+    stall the notifications of other topics. Handler failures are counted instead of being propagated.
+
+    With a coalescing window, the changes of a topic are held for the window and only the latest one is
+    dispatched, so that a topic flapping between states, e.g. during a uSubscription failover, does not
+    churn its handlers. The changes replaced within the window are counted as suppressed.
+    """
+
+    def __init__(
+        self, mode: DispatchMode = DispatchMode.TASK, executor: Optional[Executor] = None, coalesce_window: int = 0
+    ):
+        """
+        Constructor for the SubscriptionChangeDispatcher.
+
+        :param mode: How the handlers are run, see DispatchMode.
+        :param executor: The executor used in DispatchMode.EXECUTOR, the default executor of the loop if None.
+        :param coalesce_window: The time in milliseconds the changes of a topic are coalesced for, 0 dispatches
+                                every change. Coalesced changes are dispatched from a task even in
+                                DispatchMode.INLINE.
+        """
+        if coalesce_window < 0:
+            raise ValueError("coalesce_window cannot be negative")
+        self.mode = mode
+        self.executor = executor
+        self.coalesce_window = coalesce_window
+        # Latest change of each topic waiting for the end of its coalescing window
+        self.pending: Dict[str, Tuple[List[SubscriptionChangeHandler], UUri, SubscriptionStatus]] = {}
+        self.timers: Dict[str, asyncio.TimerHandle] = {}
+        self.metrics: Dict[str, DispatchMetrics] = {}
+        # Last dispatch task of each topic, the next change of the topic waits for it to keep the order
+        self.tails: Dict[str, asyncio.Task] = {}
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def dispatch(
+        self, topic_str: str, handlers: Iterable[SubscriptionChangeHandler], topic: UUri, status: SubscriptionStatus
+    ) -> None:
+        """
+        Dispatch a subscription change to the handlers of a topic.
+
+        :param topic_str: The serialized topic URI.
+        :param handlers: The handlers of the topic.
+        :param topic: The topic that the subscription state changed for.
+        :param status: The new status of the subscription.
+        """
+        handlers = list(handlers)
+        if not handlers:
+            return
+        if self.coalesce_window > 0:
+            if topic_str in self.pending:
+                self.metrics.setdefault(topic_str, DispatchMetrics()).suppressed += 1
+            else:
+                self.timers[topic_str] = asyncio.get_running_loop().call_later(
+                    self.coalesce_window / 1000, self._flush, topic_str
+                )
+            self.pending[topic_str] = (handlers, topic, status)
+            return
+        if self.mode == DispatchMode.INLINE:
+            await self._run(topic_str, handlers, topic, status)
+            return
+        self._schedule(topic_str, handlers, topic, status)
+
+    async def drain(self) -> None:
+        """
+        Dispatch the coalesced changes without waiting for the end of their window, then wait for the
+        dispatched changes to be handled.
+        """
+        for topic_str in list(self.pending):
+            self.timers[topic_str].cancel()
+            self._flush(topic_str)
+        while self.tasks:
+            await asyncio.wait(set(self.tasks))
+
+    async def close(self) -> None:
+        """
+        Drop the coalesced changes and cancel the changes still being dispatched.
+        """
+        for timer in self.timers.values():
+            timer.cancel()
+        self.timers.clear()
+        self.pending.clear()
+        tasks = set(self.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _flush(self, topic_str: str) -> None:
+        del self.timers[topic_str]
+        self._schedule(topic_str, *self.pending.pop(topic_str))
+
+    def _schedule(self, topic_str: str, handlers, topic: UUri, status: SubscriptionStatus) -> None:
+        task = asyncio.ensure_future(self._run_after(self.tails.get(topic_str), topic_str, handlers, topic, status))
+        self.tails[topic_str] = task
+        self.tasks.add(task)
+        task.add_done_callback(lambda t: self._task_done(topic_str, t))
+
+    def _task_done(self, topic_str: str, task: asyncio.Task) -> None:
+        self.tasks.discard(task)
+        if self.tails.get(topic_str) is task:
+            del self.tails[topic_str]
+
+    async def _run_after(self, previous: Optional[asyncio.Task], topic_str, handlers, topic, status) -> None:
+        if previous is not None:
+            await asyncio.wait({previous})
+        await self._run(topic_str, handlers, topic, status)
+
+    async def _run(self, topic_str: str, handlers, topic: UUri, status: SubscriptionStatus) -> None:
+        metrics = self.metrics.setdefault(topic_str, DispatchMetrics())
+        for handler in handlers:
+            start = time.monotonic()
+            try:
+                if self.mode == DispatchMode.EXECUTOR and not inspect.iscoroutinefunction(
+                    handler.handle_subscription_change
+                ):
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        self.executor, handler.handle_subscription_change, topic, status
+                    )
+                else:
+                    result = handler.handle_subscription_change(topic, status)
+                if inspect.isawaitable(result):
+                    await result
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                metrics.failures += 1
+            latency = time.monotonic() - start
+            metrics.dispatched += 1
+            metrics.total_latency += latency
+            metrics.max_latency = max(metrics.max_latency, latency)
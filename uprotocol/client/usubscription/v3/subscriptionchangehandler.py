@@ -30,7 +30,8 @@ class SubscriptionChangeHandler(ABC):
     @abstractmethod
     def handle_subscription_change(self, topic: UUri, status: SubscriptionStatus) -> None:
         """
-        Method called to handle/process subscription state changes for a given topic.
+        Method called to handle/process subscription state changes for a given topic. The method can
+        also be implemented as a coroutine, it is then awaited before the next change of the topic is handled.
 
         :param topic: The topic that the subscription state changed for.
         :param status: The new status of the subscription.
@@ -0,0 +1,82 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import os
+from typing import Dict
+
+from google.protobuf.message import DecodeError
+
+from uprotocol.core.usubscription.v3.usubscription_pb2 import (
+    FetchSubscriptionsResponse,
+    Subscription,
+    SubscriptionStatus,
+)
+from uprotocol.uri.serializer.uriserializer import UriSerializer
+
+
+class SubscriptionSnapshotStore:
+    """
+    Local file keeping a snapshot of the subscriptions of an InMemoryUSubscriptionClient so that they can be
+    restored on restart without waiting for the USubscription service.
+
+    The snapshot is stored as a serialized FetchSubscriptionsResponse holding the topic and the last known
+    SubscriptionStatus of each subscription, and is replaced atomically on every save.
+    """
+
+    def __init__(self, path: str, interval: int = 5000):
+        """
+        Constructor for the SubscriptionSnapshotStore.
+
+        :param path: The path of the snapshot file.
+        :param interval: The time in milliseconds between two checks for changes to save.
+        """
+        if not path:
+            raise ValueError("Path missing")
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0")
+        self.path = path
+        self.interval = interval
+
+    def save(self, subscriptions: Dict[str, SubscriptionStatus]) -> None:
+        """
+        Save a snapshot of the subscriptions.
+
+        :param subscriptions: The SubscriptionStatus of the subscriptions keyed by the serialized topic URI.
+        """
+        snapshot = FetchSubscriptionsResponse(
+            subscriptions=[
+                Subscription(topic=UriSerializer.deserialize(topic_str), status=status)
+                for topic_str, status in subscriptions.items()
+            ]
+        )
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as file:
+            file.write(snapshot.SerializeToString())
+        os.replace(temp_path, self.path)
+
+    def load(self) -> Dict[str, SubscriptionStatus]:
+        """
+        Load the last saved snapshot of the subscriptions.
+
+        :return: Returns the SubscriptionStatus of the subscriptions keyed by the serialized topic URI, empty if
+                 no snapshot was saved or the snapshot cannot be read.
+        """
+        try:
+            with open(self.path, "rb") as file:
+                snapshot = FetchSubscriptionsResponse.FromString(file.read())
+        except (OSError, DecodeError):
+            return {}
+        return {
+            UriSerializer.serialize(subscription.topic): subscription.status for subscription in snapshot.subscriptions
+        }
@@ -0,0 +1,178 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Set, Tuple
+
+from uprotocol.communication.calloptions import CallOptions
+from uprotocol.communication.rpcclient import RpcClient
+from uprotocol.communication.upayload import UPayload
+from uprotocol.transport.ulistener import UListener
+from uprotocol.uri.serializer.uriserializer import UriSerializer
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters of the CachingRpcClient.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+class CachingRpcClient(RpcClient):
+    """
+    RpcClient decorator that caches the responses of read-mostly methods.
+
+    Responses of opted-in method URIs are cached per method URI, request payload and token for `ttl`
+    milliseconds, the least recently used response is evicted once `max_entries` responses are cached.
+    Failures are never cached and methods that are not opted-in are passed through to the wrapped RpcClient.
+    Cached responses can be dropped with `invalidate()`, typically from a CacheInvalidationListener
+    registered for the notifications that announce a change of the data.
+    """
+
+    def __init__(self, rpc_client: RpcClient, methods: Iterable[UUri], ttl: int = 10000, max_entries: int = 1000):
+        """
+        Constructor for the CachingRpcClient.
+
+        :param rpc_client: The RpcClient used to invoke the methods.
+        :param methods: The URIs of the read-only methods whose responses can be cached.
+        :param ttl: The time in milliseconds a response is served from the cache.
+        :param max_entries: The maximum number of cached responses.
+        """
+        if rpc_client is None:
+            raise ValueError("RpcClient missing")
+        if methods is None:
+            raise ValueError("Methods missing")
+        if ttl <= 0:
+            raise ValueError("ttl must be greater than 0")
+        if max_entries < 1:
+            raise ValueError("max_entries must be greater than 0")
+        self.rpc_client = rpc_client
+        self.methods: Set[str] = {UriSerializer.serialize(method) for method in methods}
+        self.ttl = ttl / 1000
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, bytes, int, str], Tuple[float, UPayload]]" = OrderedDict()
+        self.stats = CacheStats()
+        # Incremented by every invalidation so that a response requested before an invalidation is not cached
+        self.generation = 0
+
+    async def invoke_method(
+        self, method_uri: UUri, request_payload: UPayload, options: Optional[CallOptions] = None
+    ) -> UPayload:
+        """
+        Invoke a method, the response of an opted-in method is served from the cache if present.
+
+        :param method_uri: The method URI to be invoked.
+        :param request_payload: The request message to be sent to the server.
+        :param options: RPC method invocation call options. Defaults to None.
+        :return: Returns the response payload or raises UStatusError with the failure reason.
+        """
+        method_uri_str = UriSerializer.serialize(method_uri)
+        if method_uri_str not in self.methods:
+            return await self.rpc_client.invoke_method(method_uri, request_payload, options)
+
+        key = self._get_key(method_uri_str, request_payload, (options or CallOptions.DEFAULT).token)
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.stats.hits += 1
+                return entry[1]
+            del self.entries[key]
+            self.stats.expirations += 1
+        self.stats.misses += 1
+
+        generation = self.generation
+        response = await self.rpc_client.invoke_method(method_uri, request_payload, options)
+        if generation == self.generation:
+            self.entries[key] = (time.monotonic() + self.ttl, response)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats.evictions += 1
+        return response
+
+    def invalidate(self, method_uri: Optional[UUri] = None, request_payload: Optional[UPayload] = None) -> int:
+        """
+        Drop cached responses.
+
+        :param method_uri: The method whose responses are dropped, or None to drop all the responses.
+        :param request_payload: The request whose responses are dropped, or None to drop all the responses
+                                of the method.
+        :return: Returns the number of responses dropped.
+        """
+        self.generation += 1
+        if method_uri is None:
+            keys = list(self.entries)
+        else:
+            method_uri_str = UriSerializer.serialize(method_uri)
+            if request_payload is None:
+                keys = [key for key in self.entries if key[0] == method_uri_str]
+            else:
+                request_key = self._get_key(method_uri_str, request_payload, "")[:3]
+                keys = [key for key in self.entries if key[:3] == request_key]
+        for key in keys:
+            del self.entries[key]
+        self.stats.invalidations += len(keys)
+        return len(keys)
+
+    @staticmethod
+    def _get_key(method_uri_str: str, request_payload: Optional[UPayload], token: str) -> Tuple[str, bytes, int, str]:
+        payload = request_payload if request_payload is not None else UPayload.EMPTY
+        # The token is part of the key so that callers with different permissions never share a response
+        return method_uri_str, payload.data, payload.format, token
+
+
+class CacheInvalidationListener(UListener):
+    """
+    Listener that invalidates cached responses of a CachingRpcClient when a message is received.
+
+    Register it for the notifications (or published topics) that announce a change of the cached data,
+    for example the uSubscription Update notifications for cached fetch_subscribers() responses.
+    """
+
+    def __init__(
+        self,
+        cache: CachingRpcClient,
+        method_uri: Optional[UUri] = None,
+        request_for: Optional[Callable[[UMessage], Optional[UPayload]]] = None,
+    ):
+        """
+        Constructor for the CacheInvalidationListener.
+
+        :param cache: The CachingRpcClient to invalidate.
+        :param method_uri: The method whose responses are invalidated, or None to invalidate all the responses.
+        :param request_for: Optional function returning the request payload whose responses are made stale by
+                            a received message, all the responses of the method are invalidated if it returns None.
+        """
+        if cache is None:
+            raise ValueError("CachingRpcClient missing")
+        self.cache = cache
+        self.method_uri = method_uri
+        self.request_for = request_for
+
+    async def on_receive(self, umsg: UMessage) -> None:
+        request_payload = None
+        if self.method_uri is not None and self.request_for is not None:
+            request_payload = self.request_for(umsg)
+        self.cache.invalidate(self.method_uri, request_payload)
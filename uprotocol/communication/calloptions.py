@@ -13,7 +13,10 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 from dataclasses import dataclass, field
+from typing import Optional
 
+from uprotocol.communication.hedgingpolicy import HedgingPolicy
+from uprotocol.communication.retrypolicy import RetryPolicy
 from uprotocol.v1.uattributes_pb2 import UPriority
 
 
@@ -23,6 +26,8 @@ class CallOptions:
     timeout: int = field(default=10000)
     priority: UPriority = field(default=UPriority.UPRIORITY_CS4)
     token: str = field(default="")
+    hedging: Optional[HedgingPolicy] = field(default=None)
+    retry: Optional[RetryPolicy] = field(default=None)
 
     def __post_init__(self):
         if self.timeout is None:
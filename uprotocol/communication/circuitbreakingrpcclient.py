@@ -0,0 +1,262 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Dict, FrozenSet, Iterable, Optional
+
+from uprotocol.communication.calloptions import CallOptions
+from uprotocol.communication.rpcclient import RpcClient
+from uprotocol.communication.upayload import UPayload
+from uprotocol.communication.ustatuserror import UStatusError
+from uprotocol.uri.serializer.uriserializer import UriSerializer
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.uri_pb2 import UUri
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of a single method.
+
+    The outcome of the last `window_size` calls is recorded, a call is bad when it failed with one of the
+    failure codes or took longer than the slow call duration. Once at least `minimum_calls` were recorded
+    and the rate of bad calls reaches the threshold the circuit opens and calls are rejected. After
+    `open_duration` the circuit is half-open and lets `half_open_calls` trial calls through, the circuit
+    closes if they all succeed and opens again as soon as one of them is bad.
+
+    Each state change starts a new generation, the outcome of a call only counts in the generation the call
+    was permitted in: a call permitted while closed that completes while half-open is not a trial call.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float,
+        window_size: int,
+        minimum_calls: int,
+        open_duration: int,
+        half_open_calls: int,
+        slow_call_duration: Optional[int],
+        on_transition: Optional[Callable[[CircuitState, CircuitState], None]] = None,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.open_duration = open_duration / 1000
+        self.half_open_calls = half_open_calls
+        self.slow_call_duration = slow_call_duration / 1000 if slow_call_duration is not None else None
+        self.on_transition = on_transition
+        self.outcomes = deque(maxlen=window_size)
+        self.state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        self.trial_calls = 0
+        self.trial_successes = 0
+        # Number of state changes, the generation of the current state
+        self.transitions = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> Optional[int]:
+        """
+        Check if a call is permitted, a permitted call must be followed by a call to `on_result()` or `release()`
+        with the returned generation.
+
+        :return: Returns the generation the call is permitted in, or None if it must be rejected.
+        """
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.open_duration:
+                self.rejected += 1
+                return None
+            self._transition(CircuitState.HALF_OPEN)
+        if self.state == CircuitState.HALF_OPEN:
+            if self.trial_calls >= self.half_open_calls:
+                self.rejected += 1
+                return None
+            self.trial_calls += 1
+        return self.transitions
+
+    def release(self, generation: int) -> None:
+        """
+        Give back a permitted call that completed without an outcome, i.e. was cancelled.
+
+        :param generation: The generation returned by `try_acquire()` for the call.
+        """
+        if generation == self.transitions and self.state == CircuitState.HALF_OPEN and self.trial_calls > 0:
+            self.trial_calls -= 1
+
+    def on_result(self, generation: int, failed: bool, duration: float) -> None:
+        """
+        Record the outcome of a permitted call.
+
+        :param generation: The generation returned by `try_acquire()` for the call.
+        :param failed: True if the call failed with one of the failure codes.
+        :param duration: The duration of the call in seconds.
+        """
+        if generation != self.transitions:
+            # Late outcome of a call permitted before the last state change
+            return
+        bad = failed or (self.slow_call_duration is not None and duration >= self.slow_call_duration)
+        if self.state == CircuitState.HALF_OPEN:
+            if bad:
+                self._transition(CircuitState.OPEN)
+            else:
+                self.trial_successes += 1
+                if self.trial_successes >= self.half_open_calls:
+                    self._transition(CircuitState.CLOSED)
+            return
+        self.outcomes.append(bad)
+        if len(self.outcomes) >= self.minimum_calls:
+            if sum(self.outcomes) / len(self.outcomes) >= self.failure_rate_threshold:
+                self._transition(CircuitState.OPEN)
+
+    def _transition(self, state: CircuitState) -> None:
+        previous = self.state
+        self.state = state
+        self.transitions += 1
+        self.trial_calls = 0
+        self.trial_successes = 0
+        if state == CircuitState.OPEN:
+            self.opened_at = time.monotonic()
+        if state == CircuitState.CLOSED:
+            self.outcomes.clear()
+        if self.on_transition is not None:
+            self.on_transition(previous, state)
+
+
+class CircuitBreakingRpcClient(RpcClient):
+    """
+    RpcClient decorator with a circuit breaker per method URI.
+
+    While the circuit of a method is open, invocations fail immediately with UCode.UNAVAILABLE instead of
+    waiting for the timeout of a request to a dead service. The state of the circuits is available through
+    `get_state()` and the `breakers`, and state transitions can be observed with the `on_transition` callback.
+    """
+
+    def __init__(
+        self,
+        rpc_client: RpcClient,
+        failure_rate_threshold: float = 0.5,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        open_duration: int = 5000,
+        half_open_calls: int = 1,
+        slow_call_duration: Optional[int] = None,
+        failure_codes: Iterable[int] = (UCode.UNAVAILABLE, UCode.DEADLINE_EXCEEDED),
+        on_transition: Optional[Callable[[str, CircuitState, CircuitState], None]] = None,
+    ):
+        """
+        Constructor for the CircuitBreakingRpcClient.
+
+        :param rpc_client: The RpcClient used to invoke the methods.
+        :param failure_rate_threshold: The rate (0, 1] of bad calls in the window that opens the circuit.
+        :param window_size: The number of most recent calls the failure rate is computed on.
+        :param minimum_calls: The number of calls recorded before the failure rate is evaluated.
+        :param open_duration: The time in milliseconds the circuit stays open before trial calls are let through.
+        :param half_open_calls: The number of trial calls that must succeed to close the circuit again.
+        :param slow_call_duration: The duration in milliseconds above which a successful call counts as bad,
+                                   or None to only count failures.
+        :param failure_codes: The UCodes of the failures that count as bad calls, other failures are
+                              application errors that do not indicate an unhealthy service.
+        :param on_transition: Optional callback called with the serialized method URI, the previous and the
+                              new state whenever a circuit changes state.
+        """
+        if rpc_client is None:
+            raise ValueError("RpcClient missing")
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError("failure_rate_threshold must be in the range (0, 1]")
+        if window_size < 1 or minimum_calls < 1 or minimum_calls > window_size:
+            raise ValueError("minimum_calls must be between 1 and window_size")
+        if open_duration < 0:
+            raise ValueError("open_duration cannot be negative")
+        if half_open_calls < 1:
+            raise ValueError("half_open_calls must be greater than 0")
+        self.rpc_client = rpc_client
+        self.failure_rate_threshold = failure_rate_threshold
+        self.window_size = window_size
+        self.minimum_calls = minimum_calls
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.slow_call_duration = slow_call_duration
+        self.failure_codes: FrozenSet[int] = frozenset(failure_codes)
+        self.on_transition = on_transition
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get_state(self, method_uri: UUri) -> CircuitState:
+        """
+        Get the state of the circuit of a method.
+
+        :param method_uri: The method URI.
+        :return: Returns the state of the circuit, CircuitState.CLOSED for methods never invoked.
+        """
+        breaker = self.breakers.get(UriSerializer.serialize(method_uri))
+        return breaker.state if breaker is not None else CircuitState.CLOSED
+
+    async def invoke_method(
+        self, method_uri: UUri, request_payload: UPayload, options: Optional[CallOptions] = None
+    ) -> UPayload:
+        """
+        Invoke a method unless its circuit is open.
+
+        :param method_uri: The method URI to be invoked.
+        :param request_payload: The request message to be sent to the server.
+        :param options: RPC method invocation call options. Defaults to None.
+        :return: Returns the response payload or raises UStatusError with UCode.UNAVAILABLE if the
+                 circuit is open, or with the failure reason of the invocation.
+        """
+        breaker = self._get_breaker(method_uri)
+        generation = breaker.try_acquire()
+        if generation is None:
+            raise UStatusError.from_code_message(UCode.UNAVAILABLE, "Circuit breaker is open")
+        start = time.monotonic()
+        try:
+            response = await self.rpc_client.invoke_method(method_uri, request_payload, options)
+        except UStatusError as e:
+            breaker.on_result(generation, e.get_code() in self.failure_codes, time.monotonic() - start)
+            raise
+        except asyncio.CancelledError:
+            breaker.release(generation)
+            raise
+        except Exception:
+            # An unexpected error is a bad call, a half-open circuit must not wait for the outcome forever
+            breaker.on_result(generation, True, time.monotonic() - start)
+            raise
+        breaker.on_result(generation, False, time.monotonic() - start)
+        return response
+
+    def _get_breaker(self, method_uri: UUri) -> CircuitBreaker:
+        method_uri_str = UriSerializer.serialize(method_uri)
+        breaker = self.breakers.get(method_uri_str)
+        if breaker is None:
+            on_transition = None
+            if self.on_transition is not None:
+
+                def on_transition(previous, state):
+                    self.on_transition(method_uri_str, previous, state)
+
+            breaker = CircuitBreaker(
+                self.failure_rate_threshold,
+                self.window_size,
+                self.minimum_calls,
+                self.open_duration,
+                self.half_open_calls,
+                self.slow_call_duration,
+                on_transition,
+            )
+            self.breakers[method_uri_str] = breaker
+        return breaker
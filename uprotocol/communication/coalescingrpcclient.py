@@ -0,0 +1,85 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from uprotocol.communication.calloptions import CallOptions
+from uprotocol.communication.rpcclient import RpcClient
+from uprotocol.communication.upayload import UPayload
+from uprotocol.uri.serializer.uriserializer import UriSerializer
+from uprotocol.v1.uri_pb2 import UUri
+
+
+class CoalescingRpcClient(RpcClient):
+    """
+    RpcClient decorator that coalesces concurrent identical invocations of idempotent methods.
+
+    Invocations of an opted-in method URI with the same payload (and token) that overlap in time share a
+    single request, every caller receives the same response or the same failure. Methods that are not
+    opted-in are passed through to the wrapped RpcClient.
+
+    NOTE: Only opt-in methods that are read-only, the side effects of a coalesced request happen only once.
+    """
+
+    def __init__(self, rpc_client: RpcClient, methods: Iterable[UUri]):
+        """
+        Constructor for the CoalescingRpcClient.
+
+        :param rpc_client: The RpcClient used to invoke the methods.
+        :param methods: The URIs of the idempotent methods whose invocations can be coalesced.
+        """
+        if rpc_client is None:
+            raise ValueError("RpcClient missing")
+        if methods is None:
+            raise ValueError("Methods missing")
+        self.rpc_client = rpc_client
+        self.methods: Set[str] = {UriSerializer.serialize(method) for method in methods}
+        self.in_flight: Dict[Tuple[str, bytes, int, str], asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def invoke_method(
+        self, method_uri: UUri, request_payload: UPayload, options: Optional[CallOptions] = None
+    ) -> UPayload:
+        """
+        Invoke a method, joining an identical invocation that is already in flight if the method is opted-in.
+
+        :param method_uri: The method URI to be invoked.
+        :param request_payload: The request message to be sent to the server.
+        :param options: RPC method invocation call options. Defaults to None.
+        :return: Returns the response payload or raises UStatusError with the failure reason.
+        """
+        method_uri_str = UriSerializer.serialize(method_uri)
+        if method_uri_str not in self.methods:
+            return await self.rpc_client.invoke_method(method_uri, request_payload, options)
+
+        payload = request_payload if request_payload is not None else UPayload.EMPTY
+        # The token is part of the key so that callers with different permissions never share a response
+        key = (method_uri_str, payload.data, payload.format, (options or CallOptions.DEFAULT).token)
+        future = self.in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self.rpc_client.invoke_method(method_uri, request_payload, options))
+            self.in_flight[key] = future
+            future.add_done_callback(lambda fut: self._complete(key, fut))
+        else:
+            self.coalesced += 1
+        # Shielded so that a caller giving up does not cancel the request shared with the others
+        return await asyncio.shield(future)
+
+    def _complete(self, key: Tuple[str, bytes, int, str], future: asyncio.Future) -> None:
+        if self.in_flight.get(key) is future:
+            del self.in_flight[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved in case all the callers gave up
+            future.exception()
@@ -0,0 +1,65 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+from uprotocol.v1.uri_pb2 import UUri
+
+
+@dataclass(frozen=True)
+class HedgingPolicy:
+    """
+    Hedging policy of an RPC invocation, passed in the CallOptions.
+
+    When no response arrived after the hedging delay, a duplicate request (with a new ID) is sent to the
+    alternate method URI or authority and the first successful response wins. The delay is either fixed
+    or, when a percentile is configured, the given percentile of the latencies observed for the method
+    once `min_samples` responses were received.
+
+    :param delay: The delay in milliseconds before sending the hedged request.
+    :param percentile: The percentile (0-100] of the observed latencies to use as delay, or None for a fixed delay.
+    :param min_samples: The number of observed latencies required before the percentile is used.
+    :param alternate_authority: The authority to send the hedged request to, defaults to the one of the method.
+    :param alternate_method_uri: The method URI to send the hedged request to, takes precedence over the authority.
+    """
+
+    delay: int = field(default=100)
+    percentile: Optional[float] = field(default=None)
+    min_samples: int = field(default=20)
+    alternate_authority: Optional[str] = field(default=None)
+    alternate_method_uri: Optional[UUri] = field(default=None, hash=False)
+
+    def __post_init__(self):
+        if self.delay is None or self.delay < 0:
+            raise ValueError("delay must be a positive number")
+        if self.percentile is not None and not 0 < self.percentile <= 100:
+            raise ValueError("percentile must be in the range (0, 100]")
+        if self.min_samples < 1:
+            raise ValueError("min_samples must be greater than 0")
+
+    def get_hedge_uri(self, method_uri: UUri) -> UUri:
+        """
+        Get the method URI the hedged request is sent to.
+
+        :param method_uri: The method URI of the original request.
+        :return: Returns the alternate method URI.
+        """
+        if self.alternate_method_uri is not None:
+            return self.alternate_method_uri
+        hedge_uri = UUri()
+        hedge_uri.CopyFrom(method_uri)
+        if self.alternate_authority is not None:
+            hedge_uri.authority_name = self.alternate_authority
+        return hedge_uri
@@ -13,26 +13,36 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 import asyncio
-from typing import Dict, Optional
+import dataclasses
+import math
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Optional
 
 from uprotocol.communication.calloptions import CallOptions
+from uprotocol.communication.hedgingpolicy import HedgingPolicy
+from uprotocol.communication.payloadcompressor import PayloadCompressor
+from uprotocol.communication.retrypolicy import RetryBudget
 from uprotocol.communication.rpcclient import RpcClient
+from uprotocol.communication.streamcredit import StreamCredit
 from uprotocol.communication.upayload import UPayload
 from uprotocol.communication.ustatuserror import UStatusError
 from uprotocol.transport.builder.umessagebuilder import UMessageBuilder
 from uprotocol.transport.ulistener import UListener
 from uprotocol.transport.utransport import UTransport
 from uprotocol.uri.factory.uri_factory import UriFactory
+from uprotocol.uri.serializer.uriserializer import UriSerializer
 from uprotocol.uuid.serializer.uuidserializer import UuidSerializer
-from uprotocol.v1.uattributes_pb2 import UMessageType
+from uprotocol.v1.uattributes_pb2 import UAttributes, UMessageType
 from uprotocol.v1.ucode_pb2 import UCode
 from uprotocol.v1.umessage_pb2 import UMessage
 from uprotocol.v1.uri_pb2 import UUri
 
 
 class HandleResponsesListener(UListener):
-    def __init__(self, requests):
+    def __init__(self, requests, streams=None):
         self.requests = requests
+        self.streams = streams if streams is not None else {}
 
     async def on_receive(self, umsg: UMessage) -> None:
         """
@@ -45,7 +55,16 @@ class HandleResponsesListener(UListener):
             return
 
         response_attributes = umsg.attributes
-        future = self.requests.pop(UuidSerializer.serialize(response_attributes.reqid), None)
+        request_id = UuidSerializer.serialize(response_attributes.reqid)
+
+        # Streamed responses are queued for the consumer without waiting, the transport is shared with the
+        # other invocations, the stream is bounded by the credits granted to the server instead
+        stream = self.streams.get(request_id)
+        if stream is not None:
+            stream.put_nowait(umsg)
+            return
+
+        future = self.requests.pop(request_id, None)
 
         if not future:
             return
@@ -72,20 +91,65 @@ class InMemoryRpcClient(RpcClient):
     requests and register listeners that handle the RPC responses.
     """
 
-    def __init__(self, transport: UTransport):
+    # Number of latencies kept per method to compute the hedging delay percentile
+    LATENCY_SAMPLES = 100
+
+    def __init__(
+        self,
+        transport: UTransport,
+        compressor: Optional[PayloadCompressor] = None,
+        retry_budget: Optional[RetryBudget] = None,
+    ):
         """
         Constructor for the InMemoryRpcClient.
 
         :param transport: The transport to use for sending the RPC requests.
+        :param compressor: Optional compressor applied to request payloads above its size threshold.
+        :param retry_budget: The budget bounding the retries of all the invocations made with a RetryPolicy,
+                             defaults to a RetryBudget with the default capacity and refill rate.
         """
         if not transport:
             raise ValueError(UTransport.TRANSPORT_NULL_ERROR)
         elif not isinstance(transport, UTransport):
             raise ValueError(UTransport.TRANSPORT_NOT_INSTANCE_ERROR)
         self.transport = transport
+        self.compressor = compressor
         self.requests: Dict[str, asyncio.Future] = {}
-        self.response_handler: UListener = HandleResponsesListener(self.requests)
+        self.streams: Dict[str, asyncio.Queue] = {}
+        self.response_handler: UListener = HandleResponsesListener(self.requests, self.streams)
         self.is_listener_registered = False
+        self.registration: Optional[asyncio.Future] = None
+        self.source: Optional[UUri] = None
+        self.closing = False
+        self.pending = 0
+        self.drained: Optional[asyncio.Event] = None
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.retry_budget = retry_budget if retry_budget is not None else RetryBudget()
+
+    async def start(self) -> None:
+        """
+        Register the listener of the responses ahead of the first invocation so that it does not pay
+        the registration latency. Concurrent calls, including first invocations, share a single registration.
+        Calling this method is optional, invocations start the client if needed.
+
+        :return: Returns once the listener is registered or raises UStatusError if the registration failed,
+                 or with UCode.UNAVAILABLE if the client was closed with aclose().
+        """
+        if self.closing:
+            raise UStatusError.from_code_message(UCode.UNAVAILABLE, "RpcClient is closing")
+        if self.is_listener_registered:
+            return
+        if self.registration is None:
+            self.registration = asyncio.ensure_future(self._register_response_listener())
+        # Shielded so that a caller giving up does not cancel the registration shared with the others
+        await asyncio.shield(self.registration)
+
+    async def __aenter__(self) -> "InMemoryRpcClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
 
     def cleanup_request(self, request_id):
         request_id = UuidSerializer.serialize(request_id)
@@ -107,23 +171,47 @@ class InMemoryRpcClient(RpcClient):
         :return: Returns the asyncio Future with the response payload or raises an exception
                  with the failure reason as UStatus.
         """
-        if not self.is_listener_registered:
-            # Ensure listener is registered before proceeding
-            status = await self.transport.register_listener(
-                UriFactory.ANY, self.response_handler, self.transport.get_source()
-            )
-            if status.code != UCode.OK:
-                raise UStatusError.from_code_message(status.code, "Failed to register listener for rpc client")
-            self.is_listener_registered = True
-        options = options or CallOptions.DEFAULT
-        builder = UMessageBuilder.request(self.transport.get_source(), method_uri, options.timeout)
-        request = None
-        response_future = asyncio.Future()
+        if self.closing:
+            raise UStatusError.from_code_message(UCode.UNAVAILABLE, "RpcClient is closing")
+        self.pending += 1
+        try:
+            if not self.is_listener_registered:
+                await self.start()
+            options = options or CallOptions.DEFAULT
+            if options.retry is not None:
+                return await self._invoke_with_retry(method_uri, request_payload, options)
+            return await self._invoke_attempt(method_uri, request_payload, options)
+        finally:
+            self._complete_pending()
 
-        if options.token:
-            builder.with_token(options.token)
+    async def _invoke_with_retry(self, method_uri: UUri, request_payload: UPayload, options: CallOptions) -> UPayload:
+        retry = options.retry
+        # The timeout of the call options is the budget for all the attempts
+        deadline = time.monotonic() + options.timeout / 1000
+        attempt = 1
+        while True:
+            remaining = int((deadline - time.monotonic()) * 1000)
+            timeout = remaining if retry.attempt_timeout is None else min(remaining, retry.attempt_timeout)
+            attempt_options = dataclasses.replace(options, timeout=max(1, timeout), retry=None)
+            try:
+                return await self._invoke_attempt(method_uri, request_payload, attempt_options)
+            except UStatusError as e:
+                if attempt >= retry.max_attempts or e.get_code() not in retry.retryable_codes:
+                    raise
+                backoff = retry.get_backoff(attempt) / 1000
+                if time.monotonic() + backoff >= deadline or not self.retry_budget.try_acquire():
+                    raise
+            await asyncio.sleep(backoff)
+            attempt += 1
+
+    async def _invoke_attempt(self, method_uri: UUri, request_payload: UPayload, options: CallOptions) -> UPayload:
+        if options.hedging is not None:
+            return await self._invoke_hedged(method_uri, request_payload, options)
+        return await self._invoke(method_uri, request_payload, options)
 
-        request = builder.build_from_upayload(request_payload)
+    async def _invoke(self, method_uri: UUri, request_payload: UPayload, options: CallOptions) -> UPayload:
+        request = self._build_request(method_uri, request_payload, options)
+        response_future = asyncio.Future()
 
         response_future.add_done_callback(lambda fut: self.cleanup_request(request.attributes.id))
 
@@ -156,11 +244,217 @@ class InMemoryRpcClient(RpcClient):
             # Clean up request from self.requests
             self.cleanup_request(request.attributes.id)
 
-    def close(self):
+    async def _invoke_hedged(self, method_uri: UUri, request_payload: UPayload, options: CallOptions) -> UPayload:
+        hedging = options.hedging
+        method_uri_str = UriSerializer.serialize(method_uri)
+        delay = self._get_hedging_delay(method_uri_str, hedging)
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self._invoke(method_uri, request_payload, options))
+        done, _ = await asyncio.wait({primary}, timeout=delay / 1000)
+        if done or delay >= options.timeout:
+            response = await primary
+            self._record_latency(method_uri_str, time.monotonic() - start)
+            return response
+
+        hedge_options = dataclasses.replace(options, timeout=options.timeout - delay, hedging=None)
+        hedge = asyncio.ensure_future(self._invoke(hedging.get_hedge_uri(method_uri), request_payload, hedge_options))
+        pending = {primary, hedge}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # The first successful response wins, a failure is only reported once both requests failed
+                for task in done:
+                    if task.exception() is None:
+                        # When the hedge wins the elapsed time is a lower bound of the primary latency
+                        self._record_latency(method_uri_str, time.monotonic() - start)
+                        return task.result()
+                if not pending:
+                    return primary.result()
+        finally:
+            # Cancelling the losing request removes its future from the pending requests
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def _get_hedging_delay(self, method_uri_str: str, hedging: HedgingPolicy) -> int:
+        latencies = self.latencies.get(method_uri_str)
+        if hedging.percentile is None or latencies is None or len(latencies) < hedging.min_samples:
+            return hedging.delay
+        ordered = sorted(latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * hedging.percentile / 100))
+        # Rounded up to whole milliseconds, the delay is subtracted from the timeout that becomes the ttl of the hedge
+        return int(math.ceil(ordered[index] * 1000))
+
+    def _record_latency(self, method_uri_str: str, latency: float) -> None:
+        latencies = self.latencies.get(method_uri_str)
+        if latencies is None:
+            latencies = self.latencies[method_uri_str] = deque(maxlen=self.LATENCY_SAMPLES)
+        latencies.append(latency)
+
+    async def invoke_streaming(
+        self,
+        method_uri: UUri,
+        request_payload: UPayload,
+        options: Optional[CallOptions] = None,
+        max_buffered_chunks: int = 16,
+    ) -> AsyncIterator[UPayload]:
+        """
+        Invoke a method whose server streams the response back in multiple chunks.
+
+        All response messages correlated to the request ID are yielded in order, the response carrying
+        a commstatus marks the end of the stream (see StreamingRequestHandler). The chunks are sent from
+        the stream resource of the entity (see StreamCredit), a response sent from the method itself is
+        the single response of a method that is not streamed and ends the stream. The timeout of the call
+        options applies to the wait for each chunk rather than to the whole stream.
+
+        :param method_uri: The method URI to be invoked.
+        :param request_payload: The request message to be sent to the server.
+        :param options: RPC method invocation call options. Defaults to None.
+        :param max_buffered_chunks: Maximum number of chunks the server sends ahead of the consumer, granted
+                                    to the server with StreamCredits. The responses are never held back in
+                                    the transport, a server ignoring the credits is not limited.
+        :return: Returns an async iterator of the response payloads, raises UStatusError with the failure
+                 reason if the invocation fails.
         """
-        Close the InMemoryRpcClient by clearing stored requests and unregistering the listener.
+        if max_buffered_chunks < 1:
+            raise ValueError("max_buffered_chunks must be at least 1")
+        if self.closing:
+            raise UStatusError.from_code_message(UCode.UNAVAILABLE, "RpcClient is closing")
+        self.pending += 1
+        stream = None
+        streaming = False
+        try:
+            if not self.is_listener_registered:
+                await self.start()
+            options = options or CallOptions.DEFAULT
+            request = self._build_request(method_uri, request_payload, options)
+            request_id = UuidSerializer.serialize(request.attributes.id)
+            if request_id in self.requests or request_id in self.streams:
+                raise UStatusError.from_code_message(code=UCode.ALREADY_EXISTS, message="Duplicated request found")
+            stream = asyncio.Queue()
+            self.streams[request_id] = stream
+            ttl = request.attributes.ttl / 1000  # Convert TTL from milliseconds to seconds
+
+            status = await self.transport.send(request)
+            if status.code != UCode.OK:
+                raise UStatusError(status)
+            streaming = True
+            await self._send_credit(method_uri, StreamCredit(request_id, 0, max_buffered_chunks), options)
+            consumed = credited = 0
+
+            while True:
+                try:
+                    response_message = await asyncio.wait_for(stream.get(), timeout=ttl)
+                except asyncio.TimeoutError:
+                    raise UStatusError.from_code_message(code=UCode.DEADLINE_EXCEEDED, message="Request timed out")
+                response_attributes = response_message.attributes
+                if (
+                    response_attributes.source.resource_id == StreamCredit.RESOURCE_ID
+                    and not response_attributes.HasField("commstatus")
+                ):
+                    consumed += 1
+                    # Crediting once half of the window is consumed keeps the server producing meanwhile
+                    if consumed - credited >= max(1, max_buffered_chunks // 2):
+                        credited = consumed
+                        await self._send_credit(
+                            method_uri, StreamCredit(request_id, consumed, max_buffered_chunks), options
+                        )
+                    yield UPayload.pack_from_data_and_format(
+                        response_message.payload, response_attributes.payload_format
+                    )
+                    continue
+                # The end of the stream, or the response of a server that does not stream the method
+                streaming = False
+                code = response_attributes.commstatus
+                if code != UCode.OK:
+                    raise UStatusError.from_code_message(code=code, message=f"Communication error [{UCode.Name(code)}]")
+                if response_message.payload:
+                    yield UPayload.pack_from_data_and_format(
+                        response_message.payload, response_attributes.payload_format
+                    )
+                return
+        finally:
+            if stream is not None and self.streams.get(request_id) is stream:
+                del self.streams[request_id]
+            if streaming and not self.closing:
+                # The consumer stopped before the end of the stream, a credit without window cancels it
+                try:
+                    await self._send_credit(method_uri, StreamCredit(request_id, 0, 0), options)
+                except Exception:
+                    pass
+            self._complete_pending()
+
+    async def _send_credit(self, method_uri: UUri, credit: StreamCredit, options: CallOptions) -> None:
+        builder = UMessageBuilder.request(self.source, StreamCredit.get_stream_uri(method_uri), options.timeout)
+        if options.token:
+            builder.with_token(options.token)
+        # A lost credit is made up for by the next one
+        await self.transport.send(builder.build_from_upayload(credit.to_payload()))
+
+    async def _register_response_listener(self):
+        try:
+            # The source is resolved once, requests are built from it
+            source = self.transport.get_source()
+            status = await self.transport.register_listener(UriFactory.ANY, self.response_handler, source)
+            if status.code != UCode.OK:
+                raise UStatusError.from_code_message(status.code, "Failed to register listener for rpc client")
+        except BaseException:
+            # Let a later call try again
+            self.registration = None
+            raise
+        self.source = source
+        self.is_listener_registered = True
+
+    def _build_request(self, method_uri: UUri, request_payload: UPayload, options: CallOptions) -> UMessage:
+        builder = UMessageBuilder.request(self.source, method_uri, options.timeout)
+        if options.token:
+            builder.with_token(options.token)
+        return builder.build_from_upayload(UPayload.compress(request_payload, self.compressor))
+
+    async def aclose(self, drain_timeout: int = 5000) -> None:
+        """
+        Close the InMemoryRpcClient gracefully. New invocations fail with UCode.UNAVAILABLE, invocations in
+        flight are given up to the drain timeout to complete, those still in flight afterwards fail with
+        UCode.UNAVAILABLE, then the listener is unregistered. Closing is terminal, the client cannot be started
+        again, a new client is created instead.
+
+        :param drain_timeout: The time in milliseconds to wait for the invocations in flight.
         """
+        self.closing = True
+        if self.pending:
+            self.drained = asyncio.Event()
+            try:
+                await asyncio.wait_for(self.drained.wait(), timeout=drain_timeout / 1000)
+            except asyncio.TimeoutError:
+                pass
+        self._fail_pending()
+        self.is_listener_registered = False
+        self.registration = None
+        await self.transport.unregister_listener(UriFactory.ANY, self.response_handler, self.transport.get_source())
+
+    def _complete_pending(self) -> None:
+        self.pending -= 1
+        if self.pending == 0 and self.drained is not None:
+            self.drained.set()
+
+    def _fail_pending(self) -> None:
+        # Complete the invocations in flight rather than leaving their callers waiting for the timeout
+        for future in self.requests.values():
+            if not future.done():
+                future.set_exception(UStatusError.from_code_message(UCode.UNAVAILABLE, "RpcClient closed"))
         self.requests.clear()
+        closed = UMessage(attributes=UAttributes(commstatus=UCode.UNAVAILABLE))
+        for stream in self.streams.values():
+            stream.put_nowait(closed)
+        self.streams.clear()
+
+    def close(self):
+        """
+        Close the InMemoryRpcClient by failing stored requests and unregistering the listener.
+        """
+        self._fail_pending()
+        self.is_listener_registered = False
+        self.registration = None
         asyncio.ensure_future(
             self.transport.unregister_listener(UriFactory.ANY, self.response_handler, self.transport.get_source())
         )
@@ -12,14 +12,23 @@ terms of the Apache License Version 2.0 which is available at
 SPDX-License-Identifier: Apache-2.0
 """
 
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple, Union
+
 from uprotocol.communication.requesthandler import RequestHandler
 from uprotocol.communication.rpcserver import RpcServer
+from uprotocol.communication.streamcredit import StreamCredit
+from uprotocol.communication.streamingrequesthandler import StreamingRequestHandler
 from uprotocol.communication.ustatuserror import UStatusError
 from uprotocol.transport.builder.umessagebuilder import UMessageBuilder
 from uprotocol.transport.ulistener import UListener
 from uprotocol.transport.utransport import UTransport
 from uprotocol.uri.factory.uri_factory import UriFactory
 from uprotocol.uri.serializer.uriserializer import UriSerializer
+from uprotocol.uuid.factory.uuidutils import UUIDUtils
+from uprotocol.uuid.serializer.uuidserializer import UuidSerializer
 from uprotocol.v1.uattributes_pb2 import (
     UMessageType,
 )
@@ -29,10 +38,42 @@ from uprotocol.v1.uri_pb2 import UUri
 from uprotocol.v1.ustatus_pb2 import UStatus
 
 
+class StreamFlow:
+    """
+    Credits granted by the client of a streamed response, see StreamCredit.
+    """
+
+    def __init__(self, client: str):
+        self.client = client
+        self.sent = 0
+        # No limit until the client grants credits
+        self.limit: Optional[int] = None
+        self.credited = asyncio.Event()
+        self.cancelled = False
+
+    def grant(self, credit: StreamCredit) -> None:
+        if credit.is_cancel():
+            self.cancelled = True
+        else:
+            self.limit = credit.limit if self.limit is None else max(self.limit, credit.limit)
+        self.credited.set()
+
+
 class HandleRequestListener(UListener):
-    def __init__(self, transport: UTransport, request_handlers):
+    # Time in milliseconds a response is kept for requests without a ttl
+    DEFAULT_RESPONSE_TTL = 10000
+
+    def __init__(self, transport: UTransport, request_handlers, max_cached_responses: int = 0):
         self.transport = transport
         self.request_handlers = request_handlers
+        self.streams: Set[asyncio.Task] = set()
+        # Flow control of the streamed responses by serialized request ID
+        self.flows: Dict[str, StreamFlow] = {}
+        self.max_cached_responses = max_cached_responses
+        # Responses by request ID with their expiry time, None for streamed responses
+        self.responses: "OrderedDict[Tuple[int, int], Tuple[float, Optional[UMessage]]]" = OrderedDict()
+        self.replayed = 0
+        self.closing = False
 
     async def on_receive(self, request: UMessage) -> None:
         """
@@ -46,11 +87,54 @@ class HandleRequestListener(UListener):
 
         request_attributes = request.attributes
 
+        sink = request_attributes.sink
+        if sink.resource_id == StreamCredit.RESOURCE_ID:
+            # Credits are not requests, those of unknown or ended streams are dropped
+            credit = StreamCredit.from_payload(request.payload, request_attributes.payload_format)
+            flow = self.flows.get(credit.stream_id) if credit is not None else None
+            if flow is not None and flow.client == UriSerializer.serialize(request_attributes.source):
+                flow.grant(credit)
+            return
+
         # Check if the request is for one that we have registered a handler for, if not ignore it
-        handler = self.request_handlers.get(UriSerializer().serialize(request_attributes.sink))
+        handlers = self.request_handlers.get((sink.authority_name, sink.ue_id, sink.ue_version_major))
+        handler = handlers.get(sink.resource_id) if handlers is not None else None
         if handler is None:
             return
 
+        if self.max_cached_responses > 0:
+            request_id = (request_attributes.id.msb, request_attributes.id.lsb)
+            entry = self.responses.get(request_id)
+            if entry is not None and entry[0] > time.monotonic():
+                # Redelivered request, replay the response without running the handler again
+                self.replayed += 1
+                if entry[1] is not None:
+                    await self.transport.send(entry[1])
+                return
+
+        if self.closing:
+            # Let the client fail fast and retry elsewhere instead of waiting for the timeout
+            await self.transport.send(
+                UMessageBuilder.response_for_request(request_attributes).with_commstatus(UCode.UNAVAILABLE).build()
+            )
+            return
+
+        if isinstance(handler, StreamingRequestHandler):
+            if self.max_cached_responses > 0:
+                # Streamed responses are not replayed, a redelivered request is only dropped
+                self._cache_response(request_attributes, None)
+            # Stream the response from a task so that the transport can keep dispatching messages,
+            # including the responses that are being streamed, while the handler produces chunks
+            # The flow is known before the task starts so that the first credit of the client is not missed
+            request_id = UuidSerializer.serialize(request_attributes.id)
+            flow = StreamFlow(UriSerializer.serialize(request_attributes.source))
+            self.flows[request_id] = flow
+            task = asyncio.ensure_future(self._stream_response(handler, request, flow))
+            self.streams.add(task)
+            task.add_done_callback(self.streams.discard)
+            task.add_done_callback(lambda _: self.flows.pop(request_id, None))
+            return
+
         response_builder = UMessageBuilder.response_for_request(request_attributes)
 
         try:
@@ -61,24 +145,101 @@ class HandleRequestListener(UListener):
             if isinstance(e, UStatusError):
                 code = e.get_code()
             response_builder.with_commstatus(code)
-        await self.transport.send(response_builder.build_from_upayload(response_payload))
+        response = response_builder.build_from_upayload(response_payload)
+        if self.max_cached_responses > 0:
+            self._cache_response(request_attributes, response)
+        await self.transport.send(response)
+
+    def _cache_response(self, request_attributes, response: Optional[UMessage]) -> None:
+        now = time.monotonic()
+        remaining = UUIDUtils.get_remaining_time(request_attributes.id, request_attributes.ttl)
+        if remaining is None:
+            # Either the request has no ttl or it already expired and will not be redelivered
+            remaining = 0 if request_attributes.ttl > 0 else self.DEFAULT_RESPONSE_TTL
+        request_id = (request_attributes.id.msb, request_attributes.id.lsb)
+        self.responses[request_id] = (now + remaining / 1000, response)
+        self.responses.move_to_end(request_id)
+        # Drop the expired responses from the front, then the oldest ones beyond the bound
+        while self.responses:
+            expiry = next(iter(self.responses.values()))[0]
+            if expiry > now and len(self.responses) <= self.max_cached_responses:
+                break
+            self.responses.popitem(last=False)
+
+    async def _stream_response(self, handler: StreamingRequestHandler, request: UMessage, flow: StreamFlow) -> None:
+        code = UCode.OK
+        # The chunks and the end of the stream are sent from the stream resource so that the client tells them
+        # from the single response of a method that is not streamed
+        stream_uri = StreamCredit.get_stream_uri(request.attributes.sink)
+        # The client waits for each chunk for the ttl of the request, so does the server for credits
+        ttl = request.attributes.ttl / 1000 if request.attributes.ttl else None
+        try:
+            async for response_payload in handler.handle_request(request):
+                response = self._build_stream_response(stream_uri, request).build_from_upayload(response_payload)
+                while flow.limit is not None and flow.sent >= flow.limit and not flow.cancelled:
+                    flow.credited.clear()
+                    try:
+                        await asyncio.wait_for(flow.credited.wait(), ttl)
+                    except asyncio.TimeoutError:
+                        raise UStatusError.from_code_message(UCode.DEADLINE_EXCEEDED, "No credit from the client")
+                if flow.cancelled:
+                    raise UStatusError.from_code_message(UCode.CANCELLED, "Stream cancelled by the client")
+                status = await self.transport.send(response)
+                if status.code != UCode.OK:
+                    # The client cannot be reached anymore, stop producing chunks
+                    return
+                flow.sent += 1
+        except asyncio.CancelledError:
+            # The server is closing, end the stream so that the client does not wait for the timeout
+            await self.transport.send(
+                self._build_stream_response(stream_uri, request).with_commstatus(UCode.UNAVAILABLE).build()
+            )
+            raise
+        except Exception as e:
+            code = e.get_code() if isinstance(e, UStatusError) else UCode.INTERNAL
+        await self.transport.send(self._build_stream_response(stream_uri, request).with_commstatus(code).build())
+
+    @staticmethod
+    def _build_stream_response(stream_uri: UUri, request: UMessage) -> UMessageBuilder:
+        return UMessageBuilder.response(stream_uri, request.attributes.source, request.attributes.id).with_priority(
+            request.attributes.priority
+        )
 
 
 class InMemoryRpcServer(RpcServer):
-    def __init__(self, transport):
+    def __init__(self, transport, max_cached_responses: int = 0):
+        """
+        Constructor for the InMemoryRpcServer.
+
+        :param transport: The transport to use for receiving requests and sending responses.
+        :param max_cached_responses: The maximum number of responses kept by request ID so that a request
+                                     redelivered by an at-least-once transport is answered with the original
+                                     response instead of running the handler again. Responses are kept until
+                                     the request ttl expires, defaults to 0 which disables the cache.
+        """
         if not transport:
             raise ValueError(UTransport.TRANSPORT_NULL_ERROR)
         elif not isinstance(transport, UTransport):
             raise ValueError(UTransport.TRANSPORT_NOT_INSTANCE_ERROR)
+        if max_cached_responses < 0:
+            raise ValueError("max_cached_responses cannot be negative")
         self.transport = transport
-        self.request_handlers = {}
-        self.request_handler = HandleRequestListener(self.transport, self.request_handlers)
+        # Handlers by resource ID by entity (authority name, entity ID, major version)
+        self.request_handlers: Dict[
+            Tuple[str, int, int], Dict[int, Union[RequestHandler, StreamingRequestHandler]]
+        ] = {}
+        # Status of the listener registrations in progress by entity, awaited by the other methods of the entity
+        self.pending_registrations: Dict[Tuple[str, int, int], asyncio.Future] = {}
+        self.request_handler = HandleRequestListener(self.transport, self.request_handlers, max_cached_responses)
 
-    async def register_request_handler(self, method_uri: UUri, handler: RequestHandler) -> UStatus:
+    async def register_request_handler(
+        self, method_uri: UUri, handler: Union[RequestHandler, StreamingRequestHandler]
+    ) -> UStatus:
         """
         Register a handler that will be invoked when requests come in from clients for the given method.
 
-        Note: Only one handler is allowed to be registered per method URI.
+        Note: Only one handler is allowed to be registered per method URI, the method ID
+        StreamCredit.RESOURCE_ID is reserved for the streamed responses.
 
         :param method_uri: The URI for the method to register the listener for.
         :param handler: The handler that will process the request for the client.
@@ -87,25 +248,45 @@ class InMemoryRpcServer(RpcServer):
 
         if method_uri is None or handler is None:
             return UStatus(code=UCode.INVALID_ARGUMENT, message="Method URI or handler missing")
+        if method_uri.resource_id == StreamCredit.RESOURCE_ID:
+            return UStatus(code=UCode.INVALID_ARGUMENT, message="Method ID reserved for the streamed responses")
 
-        try:
-            method_uri_str = UriSerializer().serialize(method_uri)
-            if method_uri_str in self.request_handlers:
-                current_handler = self.request_handlers[method_uri_str]
-                if current_handler is not None:
-                    raise UStatusError.from_code_message(UCode.ALREADY_EXISTS, "Handler already registered")
-
-            result = await self.transport.register_listener(UriFactory.ANY, self.request_handler, method_uri)
-            if result.code != UCode.OK:
-                raise UStatusError.from_code_message(result.code, result.message)
+        entity = (method_uri.authority_name, method_uri.ue_id, method_uri.ue_version_major)
+        registration = self.pending_registrations.get(entity)
+        if registration is not None:
+            # The listener of the entity is being registered for another method, the handler is only added
+            # once the listener is registered and shares its failure otherwise
+            status = await asyncio.shield(registration)
+            if status.code != UCode.OK:
+                return status
 
-            self.request_handlers[method_uri_str] = handler
+        handlers = self.request_handlers.get(entity)
+        if handlers is not None:
+            if handlers.get(method_uri.resource_id) is not None:
+                return UStatus(code=UCode.ALREADY_EXISTS, message="Handler already registered")
+            handlers[method_uri.resource_id] = handler
             return UStatus(code=UCode.OK)
 
-        except UStatusError as e:
-            return UStatus(code=e.get_code(), message=e.get_message())
+        # The first method of the entity registers the listener for all the methods of the entity
+        handlers = {method_uri.resource_id: handler}
+        self.request_handlers[entity] = handlers
+        registration = asyncio.get_running_loop().create_future()
+        self.pending_registrations[entity] = registration
+        status = UStatus(code=UCode.UNAVAILABLE, message="Listener registration interrupted")
+        try:
+            status = await self.transport.register_listener(
+                UriFactory.ANY, self.request_handler, self._get_entity_filter(method_uri)
+            )
+            return status
+        finally:
+            del self.pending_registrations[entity]
+            if status.code != UCode.OK and self.request_handlers.get(entity) is handlers:
+                del self.request_handlers[entity]
+            registration.set_result(status)
 
-    async def unregister_request_handler(self, method_uri: UUri, handler: RequestHandler) -> UStatus:
+    async def unregister_request_handler(
+        self, method_uri: UUri, handler: Union[RequestHandler, StreamingRequestHandler]
+    ) -> UStatus:
         """
         Unregister a handler that will be invoked when requests come in from clients for the given method.
 
@@ -116,10 +297,53 @@ class InMemoryRpcServer(RpcServer):
         if method_uri is None or handler is None:
             return UStatus(code=UCode.INVALID_ARGUMENT, message="Method URI or handler missing")
 
-        method_uri_str = UriSerializer().serialize(method_uri)
+        entity = (method_uri.authority_name, method_uri.ue_id, method_uri.ue_version_major)
+        registration = self.pending_registrations.get(entity)
+        if registration is not None:
+            # The listener of the entity is being registered, unregistering it meanwhile would leave it registered
+            # without handlers, and the handler is dropped if the registration fails
+            await asyncio.shield(registration)
+        handlers = self.request_handlers.get(entity)
 
-        if self.request_handlers.get(method_uri_str) == handler:
-            del self.request_handlers[method_uri_str]
-            return await self.transport.unregister_listener(UriFactory.ANY, self.request_handler, method_uri)
+        if handlers is not None and handlers.get(method_uri.resource_id) == handler:
+            del handlers[method_uri.resource_id]
+            if handlers:
+                return UStatus(code=UCode.OK)
+            # The last method of the entity unregisters the listener
+            del self.request_handlers[entity]
+            return await self.transport.unregister_listener(
+                UriFactory.ANY, self.request_handler, self._get_entity_filter(method_uri)
+            )
 
         return UStatus(code=UCode.NOT_FOUND)
+
+    async def aclose(self, drain_timeout: int = 5000) -> None:
+        """
+        Close the InMemoryRpcServer gracefully. New requests are answered with UCode.UNAVAILABLE, the streamed
+        responses in progress are given up to the drain timeout to complete before being cancelled, then the
+        listeners are unregistered.
+
+        :param drain_timeout: The time in milliseconds to wait for the streamed responses in progress.
+        """
+        self.request_handler.closing = True
+        streams = set(self.request_handler.streams)
+        if streams:
+            _, pending = await asyncio.wait(streams, timeout=drain_timeout / 1000)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        for (authority_name, ue_id, ue_version_major), handlers in list(self.request_handlers.items()):
+            entity_filter = self._get_entity_filter(
+                UUri(authority_name=authority_name, ue_id=ue_id, ue_version_major=ue_version_major)
+            )
+            await self.transport.unregister_listener(UriFactory.ANY, self.request_handler, entity_filter)
+        self.request_handlers.clear()
+
+    @staticmethod
+    def _get_entity_filter(method_uri: UUri) -> UUri:
+        return UUri(
+            authority_name=method_uri.authority_name,
+            ue_id=method_uri.ue_id,
+            ue_version_major=method_uri.ue_version_major,
+            resource_id=UriFactory.WILDCARD_RESOURCE_ID,
+        )
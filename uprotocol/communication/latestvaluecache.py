@@ -0,0 +1,115 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+from uprotocol.transport.ulistener import UListener
+from uprotocol.transport.utransport import UTransport
+from uprotocol.uri.serializer.uriserializer import UriSerializer
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+from uprotocol.v1.ustatus_pb2 import UStatus
+
+
+class LatestValueCache(UListener):
+    """
+    Cache of the latest message published on each topic, for high-rate topics, like a vehicle speed signal,
+    where readers only need the current value.
+
+    The cache registers itself with the transport for topic filters, which may contain wildcards, and keeps the
+    newest message of each topic matching them, keyed by the serialized topic URI. Any number of readers can then
+    share this single registration, either polling with `get()` or waiting for the next value with `changed()`,
+    instead of each being called for every message.
+    """
+
+    def __init__(self, transport: UTransport, topic_filters: Iterable[UUri]):
+        """
+        Constructor for the LatestValueCache.
+
+        :param transport: The transport to receive the published messages from.
+        :param topic_filters: The source filters of the topics to cache.
+        """
+        if transport is None:
+            raise ValueError(UTransport.TRANSPORT_NULL_ERROR)
+        if not isinstance(transport, UTransport):
+            raise ValueError(UTransport.TRANSPORT_NOT_INSTANCE_ERROR)
+        if topic_filters is None:
+            raise ValueError("Topic filters missing")
+        self.transport = transport
+        self.topic_filters: List[UUri] = list(topic_filters)
+        self.registered: List[UUri] = []
+        self.values: Dict[str, UMessage] = {}
+        # Waiters of the next message of a topic, replaced once a message is received
+        self.waiters: Dict[str, asyncio.Event] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    async def start(self) -> UStatus:
+        """
+        Register the cache with the transport for all the topic filters.
+
+        :return: Returns the status of the first registration that failed, the cache is then not registered
+                 for any topic filter.
+        """
+        for topic_filter in self.topic_filters:
+            if any(topic_filter == registered for registered in self.registered):
+                continue
+            status = await self.transport.register_listener(topic_filter, self, None)
+            if status.code != UCode.OK:
+                await self.close()
+                return status
+            self.registered.append(topic_filter)
+        return UStatus(code=UCode.OK)
+
+    async def close(self) -> None:
+        """
+        Unregister the cache from the transport, the cached messages are kept.
+        """
+        registered, self.registered = self.registered, []
+        for topic_filter in registered:
+            await self.transport.unregister_listener(topic_filter, self, None)
+
+    async def on_receive(self, umsg: UMessage) -> None:
+        key = UriSerializer.serialize(umsg.attributes.source)
+        self.values[key] = umsg
+        waiter = self.waiters.pop(key, None)
+        if waiter is not None:
+            waiter.set()
+
+    def get(self, topic: UUri) -> Optional[UMessage]:
+        """
+        Get the latest message of a topic, the message is shared by all the readers and must not be modified.
+
+        :param topic: The URI of the topic.
+        :return: Returns the latest message or None if no message was received for the topic.
+        """
+        return self.values.get(UriSerializer.serialize(topic))
+
+    async def changed(self, topic: UUri) -> UMessage:
+        """
+        Wait for the next message of a topic.
+
+        :param topic: The URI of the topic.
+        :return: Returns the latest message of the topic once a message is received after the call.
+        """
+        key = UriSerializer.serialize(topic)
+        waiter = self.waiters.get(key)
+        if waiter is None:
+            waiter = asyncio.Event()
+            self.waiters[key] = waiter
+        await waiter.wait()
+        return self.values[key]
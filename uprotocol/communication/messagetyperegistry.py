@@ -0,0 +1,91 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from typing import Dict, Optional, Type
+
+import google.protobuf.descriptor as descriptor
+import google.protobuf.descriptor_pool as descriptor_pool
+import google.protobuf.message as message
+import google.protobuf.message_factory as message_factory
+
+
+class MessageTypeRegistry:
+    """
+    Registry that maps google.protobuf.Any type URLs to message classes so that payloads can be
+    decoded without the caller having to know the expected message class.
+
+    Message classes can be registered explicitly or from file descriptors, type URLs that were not
+    registered are resolved once from the descriptor pool and the class reference is cached so that
+    subsequent lookups are a single dictionary access.
+    """
+
+    TYPE_URL_PREFIX = "type.googleapis.com/"
+    DEFAULT = None
+
+    def __init__(self, pool: Optional[descriptor_pool.DescriptorPool] = None):
+        """
+        Constructor for the MessageTypeRegistry.
+
+        :param pool: The descriptor pool used to resolve unregistered type URLs, defaults to the
+                     default descriptor pool where all generated messages are registered.
+        """
+        self.pool = pool if pool is not None else descriptor_pool.Default()
+        self.types: Dict[str, Type[message.Message]] = {}
+
+    def register(self, clazz: Type[message.Message]) -> None:
+        """
+        Register a message class under the type URL of its descriptor.
+
+        :param clazz: The generated message class to register.
+        """
+        if clazz is None:
+            raise ValueError("Message class missing")
+        self.types[self.TYPE_URL_PREFIX + clazz.DESCRIPTOR.full_name] = clazz
+
+    def register_file(self, file: descriptor.FileDescriptor) -> None:
+        """
+        Register all the messages, including nested ones, declared in a proto file.
+
+        :param file: The file descriptor, i.e. the DESCRIPTOR of a generated _pb2 module.
+        """
+        if file is None:
+            raise ValueError("File descriptor missing")
+        pending = list(file.message_types_by_name.values())
+        while pending:
+            message_descriptor = pending.pop()
+            self.register(message_factory.GetMessageClass(message_descriptor))
+            pending.extend(message_descriptor.nested_types)
+
+    def get(self, type_url: str) -> Optional[Type[message.Message]]:
+        """
+        Get the message class for a type URL.
+
+        :param type_url: The type URL as found in google.protobuf.Any.
+        :return: Returns the message class or None if the type is unknown.
+        """
+        try:
+            return self.types[type_url]
+        except KeyError:
+            pass
+        try:
+            message_descriptor = self.pool.FindMessageTypeByName(type_url.split("/")[-1])
+        except KeyError:
+            # Not cached, the module declaring the type might not have been imported yet
+            return None
+        clazz = message_factory.GetMessageClass(message_descriptor)
+        self.types[type_url] = clazz
+        return clazz
+
+
+MessageTypeRegistry.DEFAULT = MessageTypeRegistry()
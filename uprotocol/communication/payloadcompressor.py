@@ -0,0 +1,161 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import lzma
+import zlib
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Optional, Tuple
+
+from uprotocol.communication.ustatuserror import UStatusError
+from uprotocol.v1.uattributes_pb2 import UPayloadFormat
+from uprotocol.v1.ucode_pb2 import UCode
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Errors raised by the decompressors on corrupted data
+DECOMPRESSION_ERRORS = (zlib.error, lzma.LZMAError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+class CompressionAlgorithm(Enum):
+    """
+    Compression algorithms supported by the PayloadCompressor. The value is the identifier
+    written in the compressed payload header.
+    """
+
+    ZLIB = 1
+    LZMA = 2
+    ZSTD = 3
+
+
+@dataclass(frozen=True)
+class PayloadCompressor:
+    """
+    Compresses payload data that is larger than a configurable threshold before it is sent.
+
+    UPayloadFormat has no compressed variants so the format of the payload is left untouched and the
+    compressed data is wrapped in a small header instead: a zero byte followed by the algorithm identifier.
+    A serialized protobuf message can never start with a zero byte (field number 0 is invalid), which is why
+    only UPAYLOAD_FORMAT_PROTOBUF and UPAYLOAD_FORMAT_PROTOBUF_WRAPPED_IN_ANY payloads are compressed, and
+    why a receiver can tell them apart.
+
+    The header is an extension of the wire format that other uProtocol implementations do not know, they fail
+    to parse the compressed payloads. Compression is therefore opt-in on both ends: senders compress with a
+    PayloadCompressor, receivers decompress with UPayload.decompress() before unpacking, and the peers exchanging
+    compressed payloads must agree on it.
+    """
+
+    HEADER_MARKER = 0x00
+    # Bounds the memory a received payload can expand to by default
+    MAX_DECOMPRESSED_SIZE = 16 * 1024 * 1024
+    COMPRESSIBLE_FORMATS = (
+        UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF,
+        UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF_WRAPPED_IN_ANY,
+    )
+
+    algorithm: CompressionAlgorithm = field(default=CompressionAlgorithm.ZLIB)
+    threshold: int = field(default=1024)
+    level: Optional[int] = field(default=None)
+
+    def __post_init__(self):
+        if self.algorithm is None:
+            raise ValueError("algorithm cannot be None")
+        if self.threshold is None or self.threshold < 0:
+            raise ValueError("threshold must be a non-negative number")
+        if self.algorithm == CompressionAlgorithm.ZSTD and zstandard is None:
+            raise ValueError("zstandard module is not installed")
+
+    def compress(self, data: bytes, format: UPayloadFormat) -> bytes:
+        """
+        Compress the payload data if it is of a compressible format, its size is at or above the
+        threshold, and compressing it actually makes it smaller.
+
+        :param data: The serialized payload data.
+        :param format: The format of the payload data.
+        :return: Returns the compressed data with its header, or the original data.
+        """
+        if not data or len(data) < self.threshold or format not in self.COMPRESSIBLE_FORMATS:
+            return data
+        compressed = bytes((self.HEADER_MARKER, self.algorithm.value)) + self._compress(data)
+        return compressed if len(compressed) < len(data) else data
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.algorithm == CompressionAlgorithm.ZLIB:
+            return zlib.compress(data) if self.level is None else zlib.compress(data, self.level)
+        if self.algorithm == CompressionAlgorithm.LZMA:
+            return lzma.compress(data) if self.level is None else lzma.compress(data, preset=self.level)
+        compressor = zstandard.ZstdCompressor() if self.level is None else zstandard.ZstdCompressor(level=self.level)
+        return compressor.compress(data)
+
+    @staticmethod
+    def is_compressed(data: bytes) -> bool:
+        """
+        Check if the payload data starts with the compressed payload header.
+
+        :param data: The payload data.
+        :return: Returns True if the data was compressed by a PayloadCompressor.
+        """
+        return data is not None and len(data) > 1 and data[0] == PayloadCompressor.HEADER_MARKER
+
+    @staticmethod
+    def decompress(data: bytes, max_size: Optional[int] = None) -> bytes:
+        """
+        Decompress payload data that was compressed by a PayloadCompressor, data that is not
+        compressed is returned as is.
+
+        :param data: The payload data.
+        :param max_size: The maximum size in bytes of the decompressed data, defaults to MAX_DECOMPRESSED_SIZE.
+        :return: Returns the decompressed data.
+        :raises ValueError: If the compression algorithm is unknown or not installed, or the data is corrupted
+                            or truncated.
+        :raises UStatusError: With UCode.RESOURCE_EXHAUSTED if the decompressed data exceeds the maximum size.
+        """
+        if not PayloadCompressor.is_compressed(data):
+            return data
+        max_size = PayloadCompressor.MAX_DECOMPRESSED_SIZE if max_size is None else max_size
+        algorithm = CompressionAlgorithm(data[1])
+        try:
+            decompressed, complete = PayloadCompressor._decompress(algorithm, data[2:], max_size)
+        except DECOMPRESSION_ERRORS as e:
+            raise ValueError("Compressed payload is corrupted") from e
+        if len(decompressed) > max_size:
+            raise UStatusError.from_code_message(
+                UCode.RESOURCE_EXHAUSTED, f"Decompressed payload exceeds {max_size} bytes"
+            )
+        if not complete:
+            raise ValueError("Compressed payload is truncated")
+        return decompressed
+
+    @staticmethod
+    def _decompress(algorithm: CompressionAlgorithm, body: bytes, max_size: int) -> Tuple[bytes, bool]:
+        # One byte more than the maximum is requested to tell an exact fit from an overflow
+        if algorithm == CompressionAlgorithm.ZSTD:
+            if zstandard is None:
+                raise ValueError("zstandard module is not installed")
+            # The streaming reader does not trust the content size declared in the frame header
+            with zstandard.ZstdDecompressor().stream_reader(body) as reader:
+                decompressed = reader.read(max_size + 1)
+            if len(decompressed) > max_size:
+                return decompressed, False
+            # The reader stops at the end of the data whether the frame is complete or not, the decompression
+            # object tells them apart and its output is bounded by the size just read
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+            decompressor.decompress(body)
+            return decompressed, decompressor.eof
+        decompressor = zlib.decompressobj() if algorithm == CompressionAlgorithm.ZLIB else lzma.LZMADecompressor()
+        decompressed = decompressor.decompress(body, max_size + 1)
+        return decompressed, decompressor.eof
@@ -0,0 +1,111 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import FrozenSet, Optional
+
+from uprotocol.v1.ucode_pb2 import UCode
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Retry policy of an RPC invocation, passed in the CallOptions.
+
+    Failed attempts whose code is retryable are retried with an exponential backoff until `max_attempts`
+    is reached or the timeout of the call options, which is the budget for all the attempts, would expire.
+
+    :param max_attempts: The maximum number of attempts, including the first one.
+    :param initial_backoff: The backoff in milliseconds before the first retry.
+    :param max_backoff: The upper bound of the backoff in milliseconds.
+    :param multiplier: The factor applied to the backoff after every retry.
+    :param jitter: The fraction [0, 1] of the backoff that is randomized to spread the retries of many clients.
+    :param attempt_timeout: The timeout in milliseconds of a single attempt, or None to give each attempt
+                            the remaining time of the call options timeout.
+    :param retryable_codes: The UCodes of the failures that are retried.
+    """
+
+    max_attempts: int = field(default=3)
+    initial_backoff: int = field(default=100)
+    max_backoff: int = field(default=2000)
+    multiplier: float = field(default=2.0)
+    jitter: float = field(default=0.2)
+    attempt_timeout: Optional[int] = field(default=None)
+    retryable_codes: FrozenSet[int] = field(default=frozenset({UCode.UNAVAILABLE, UCode.DEADLINE_EXCEEDED}))
+
+    def __post_init__(self):
+        if self.max_attempts < 1:
+            raise ValueError("max_attempts must be greater than 0")
+        if self.initial_backoff < 0 or self.max_backoff < self.initial_backoff:
+            raise ValueError("backoff must be a positive number and initial_backoff not above max_backoff")
+        if self.multiplier < 1:
+            raise ValueError("multiplier cannot be less than 1")
+        if not 0 <= self.jitter <= 1:
+            raise ValueError("jitter must be in the range [0, 1]")
+        if self.attempt_timeout is not None and self.attempt_timeout < 1:
+            raise ValueError("attempt_timeout must be greater than 0")
+        if self.retryable_codes is None:
+            raise ValueError("retryable_codes cannot be None")
+
+    def get_backoff(self, attempt: int) -> float:
+        """
+        Get the backoff before the next attempt.
+
+        :param attempt: The number of the attempt that just failed, starting at 1.
+        :return: Returns the backoff in milliseconds.
+        """
+        backoff = min(self.max_backoff, self.initial_backoff * self.multiplier ** (attempt - 1))
+        return backoff * (1 - self.jitter * random.random())
+
+
+class RetryBudget:
+    """
+    Token bucket that bounds the aggregate number of retries of an RPC client, every retry takes a token
+    and tokens are refilled at a constant rate. Once the bucket is empty failures are no longer retried,
+    which keeps a client from multiplying its load on a service that is already failing.
+    """
+
+    def __init__(self, max_tokens: float = 10, tokens_per_second: float = 5):
+        """
+        Constructor for the RetryBudget.
+
+        :param max_tokens: The capacity of the bucket, i.e. the maximum burst of retries.
+        :param tokens_per_second: The refill rate of the bucket, i.e. the sustained rate of retries.
+        """
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be at least 1")
+        if tokens_per_second < 0:
+            raise ValueError("tokens_per_second cannot be negative")
+        self.max_tokens = max_tokens
+        self.tokens_per_second = tokens_per_second
+        self.tokens = float(max_tokens)
+        self.last_refill = time.monotonic()
+        self.exhausted = 0
+
+    def try_acquire(self) -> bool:
+        """
+        Take a token for a retry.
+
+        :return: Returns True if the retry is allowed, False if the budget is exhausted.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self.last_refill) * self.tokens_per_second)
+        self.last_refill = now
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        return True
@@ -15,6 +15,7 @@ SPDX-License-Identifier: Apache-2.0
 from typing import Optional
 
 from uprotocol.communication.calloptions import CallOptions
+from uprotocol.communication.payloadcompressor import PayloadCompressor
 from uprotocol.communication.publisher import Publisher
 from uprotocol.communication.upayload import UPayload
 from uprotocol.transport.builder.umessagebuilder import UMessageBuilder
@@ -24,17 +25,19 @@ from uprotocol.v1.ustatus_pb2 import UStatus
 
 
 class SimplePublisher(Publisher):
-    def __init__(self, transport: UTransport):
+    def __init__(self, transport: UTransport, compressor: Optional[PayloadCompressor] = None):
         """
         Constructor for SimplePublisher.
 
         :param transport: The transport instance to use for sending notifications.
+        :param compressor: Optional compressor applied to payloads above its size threshold.
         """
         if transport is None:
             raise ValueError(UTransport.TRANSPORT_NULL_ERROR)
         elif not isinstance(transport, UTransport):
             raise ValueError(UTransport.TRANSPORT_NOT_INSTANCE_ERROR)
         self.transport = transport
+        self.compressor = compressor
 
     async def publish(
         self, topic: UUri, options: Optional[CallOptions] = None, payload: Optional[UPayload] = None
@@ -55,4 +58,4 @@ class SimplePublisher(Publisher):
             builder.with_priority(options.priority)
             builder.with_ttl(options.timeout)
             builder.with_token(options.token)
-        return await self.transport.send(builder.build_from_upayload(payload))
+        return await self.transport.send(builder.build_from_upayload(UPayload.compress(payload, self.compressor)))
@@ -0,0 +1,100 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import google.protobuf.any_pb2 as any_pb2
+from google.protobuf.struct_pb2 import Struct
+
+from uprotocol.communication.upayload import UPayload
+from uprotocol.v1.uattributes_pb2 import UPayloadFormat
+from uprotocol.v1.uri_pb2 import UUri
+
+
+@dataclass(frozen=True)
+class StreamCredit:
+    """
+    Flow control of a streamed response, sent by the client as a request to the stream resource of the entity
+    of the streamed method.
+
+    The stream resource is a method ID reserved by each entity for its streamed responses: the credits are sent
+    to it and the server sends the chunks of the stream and their end from it. Servers that do not stream have
+    no handler for it and ignore the credits, and a client can tell the single response of a method that is not
+    streamed from the chunks of a stream.
+
+    The server may send chunks of the stream up to `consumed + window`, i.e. `window` chunks ahead of the
+    consumer. Credits are absolute rather than incremental so that a lost or reordered credit is made up for
+    by the next one. A server that never receives a credit for a stream does not limit it. A credit with a
+    window of 0 cancels the stream, the client stopped consuming it.
+    """
+
+    # Method ID reserved by each entity for the credits and the responses of its streams
+    RESOURCE_ID = 0x7FFF
+
+    # Serialized ID of the request of the stream
+    stream_id: str
+    # Number of chunks taken by the consumer
+    consumed: int
+    # Number of chunks the client buffers ahead of the consumer
+    window: int
+
+    def is_cancel(self) -> bool:
+        return self.window == 0
+
+    @property
+    def limit(self) -> int:
+        return self.consumed + self.window
+
+    @staticmethod
+    def get_stream_uri(method_uri: UUri) -> UUri:
+        """
+        Get the URI of the stream resource of the entity of a method.
+
+        :param method_uri: The URI of the streamed method.
+        :return: Returns the URI of the stream resource.
+        """
+        return UUri(
+            authority_name=method_uri.authority_name,
+            ue_id=method_uri.ue_id,
+            ue_version_major=method_uri.ue_version_major,
+            resource_id=StreamCredit.RESOURCE_ID,
+        )
+
+    def to_payload(self) -> UPayload:
+        credit = Struct()
+        credit.update({"stream": self.stream_id, "consumed": self.consumed, "window": self.window})
+        return UPayload.pack_to_any(credit)
+
+    @staticmethod
+    def from_payload(data: bytes, format: UPayloadFormat) -> Optional["StreamCredit"]:
+        """
+        Read a credit from the payload of a request.
+
+        :param data: The payload data of the request.
+        :param format: The payload format of the request.
+        :return: Returns the credit or None if the payload is not a stream credit.
+        """
+        if format != UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF_WRAPPED_IN_ANY or not data:
+            return None
+        try:
+            any_message = any_pb2.Any()
+            any_message.ParseFromString(data)
+            if not any_message.Is(Struct.DESCRIPTOR):
+                return None
+            credit = Struct()
+            any_message.Unpack(credit)
+            return StreamCredit(str(credit["stream"]), int(credit["consumed"]), int(credit["window"]))
+        except Exception:
+            return None
@@ -0,0 +1,42 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+from uprotocol.communication.upayload import UPayload
+from uprotocol.v1.umessage_pb2 import UMessage
+
+
+class StreamingRequestHandler(ABC):
+    """
+    StreamingRequestHandler is used by the RpcServer to handle incoming requests whose response is
+    streamed back to the client in multiple chunks.
+
+    Every payload yielded by the `handle_request` async generator is sent as its own response message,
+    the end of the stream is then signaled with a last response that carries the commstatus (UCode.OK
+    or the code of the UStatusError raised by the handler). Memory use is therefore bounded by the size
+    of a chunk rather than by the size of the whole result.
+    """
+
+    @abstractmethod
+    def handle_request(self, message: UMessage) -> AsyncIterator[UPayload]:
+        """
+        Async generator called to handle/process request messages.
+
+        :param message: The request message received.
+        :return: An async iterator of the response payloads.
+        :raises UStatusError: If the service encounters an error processing the request.
+        """
+        pass
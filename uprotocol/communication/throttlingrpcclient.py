@@ -0,0 +1,155 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import dataclasses
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from uprotocol.communication.calloptions import CallOptions
+from uprotocol.communication.rpcclient import RpcClient
+from uprotocol.communication.upayload import UPayload
+from uprotocol.communication.ustatuserror import UStatusError
+from uprotocol.uri.serializer.uriserializer import UriSerializer
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.uri_pb2 import UUri
+
+
+@dataclass
+class ThrottlingMetrics:
+    """
+    Counters of the ThrottlingRpcClient, wait times are in seconds.
+    """
+
+    in_flight: int = 0
+    queued: int = 0
+    rejected: int = 0
+    queue_timeouts: int = 0
+    queue_waits: int = 0
+    total_queue_wait: float = 0.0
+    max_queue_wait: float = 0.0
+
+
+class ThrottlingRpcClient(RpcClient):
+    """
+    RpcClient decorator that bounds the number of requests in flight, globally and per method URI.
+
+    Invocations beyond the window wait in a queue until a request completes, the time spent queued
+    is taken from the timeout of the call options. Once `max_queued` invocations are waiting, further
+    invocations fail fast with UCode.RESOURCE_EXHAUSTED so that an overload degrades gracefully instead
+    of piling up requests that would all time out.
+    """
+
+    def __init__(
+        self,
+        rpc_client: RpcClient,
+        max_in_flight: int = 1000,
+        max_in_flight_per_method: Optional[int] = None,
+        max_queued: int = 1000,
+    ):
+        """
+        Constructor for the ThrottlingRpcClient.
+
+        :param rpc_client: The RpcClient used to invoke the methods.
+        :param max_in_flight: Maximum number of requests in flight across all methods.
+        :param max_in_flight_per_method: Maximum number of requests in flight per method URI, unbounded if None.
+        :param max_queued: Maximum number of invocations waiting for the window, 0 disables queueing.
+        """
+        if rpc_client is None:
+            raise ValueError("RpcClient missing")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be greater than 0")
+        if max_in_flight_per_method is not None and max_in_flight_per_method < 1:
+            raise ValueError("max_in_flight_per_method must be greater than 0")
+        if max_queued < 0:
+            raise ValueError("max_queued cannot be negative")
+        self.rpc_client = rpc_client
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_per_method = max_in_flight_per_method
+        self.max_queued = max_queued
+        self.metrics = ThrottlingMetrics()
+        # Semaphores are created on first use so that they belong to the running event loop
+        self.window: Optional[asyncio.Semaphore] = None
+        self.method_windows: Dict[str, asyncio.Semaphore] = {}
+
+    async def invoke_method(
+        self, method_uri: UUri, request_payload: UPayload, options: Optional[CallOptions] = None
+    ) -> UPayload:
+        """
+        Invoke a method once the number of requests in flight is below the configured limits.
+
+        :param method_uri: The method URI to be invoked.
+        :param request_payload: The request message to be sent to the server.
+        :param options: RPC method invocation call options. Defaults to None.
+        :return: Returns the response payload or raises UStatusError with UCode.RESOURCE_EXHAUSTED
+                 if too many invocations are already queued, UCode.DEADLINE_EXCEEDED if the timeout
+                 expired while queued, or the failure reason of the invocation.
+        """
+        options = options or CallOptions.DEFAULT
+        method_window = self._get_method_window(method_uri)
+
+        if self.window.locked() or (method_window is not None and method_window.locked()):
+            if self.metrics.queued >= self.max_queued:
+                self.metrics.rejected += 1
+                raise UStatusError.from_code_message(UCode.RESOURCE_EXHAUSTED, "Too many requests in flight")
+            start = time.monotonic()
+            self.metrics.queued += 1
+            try:
+                await asyncio.wait_for(self._acquire(method_window), timeout=options.timeout / 1000)
+            except asyncio.TimeoutError:
+                self.metrics.queue_timeouts += 1
+                raise UStatusError.from_code_message(UCode.DEADLINE_EXCEEDED, "Request timed out while queued")
+            finally:
+                self.metrics.queued -= 1
+            waited = time.monotonic() - start
+            self.metrics.queue_waits += 1
+            self.metrics.total_queue_wait += waited
+            self.metrics.max_queue_wait = max(self.metrics.max_queue_wait, waited)
+            options = dataclasses.replace(options, timeout=max(1, options.timeout - int(waited * 1000)))
+        else:
+            await self._acquire(method_window)
+
+        self.metrics.in_flight += 1
+        try:
+            return await self.rpc_client.invoke_method(method_uri, request_payload, options)
+        finally:
+            self.metrics.in_flight -= 1
+            self.window.release()
+            if method_window is not None:
+                method_window.release()
+
+    def _get_method_window(self, method_uri: UUri) -> Optional[asyncio.Semaphore]:
+        if self.window is None:
+            self.window = asyncio.Semaphore(self.max_in_flight)
+        if self.max_in_flight_per_method is None:
+            return None
+        method_uri_str = UriSerializer.serialize(method_uri)
+        method_window = self.method_windows.get(method_uri_str)
+        if method_window is None:
+            method_window = asyncio.Semaphore(self.max_in_flight_per_method)
+            self.method_windows[method_uri_str] = method_window
+        return method_window
+
+    async def _acquire(self, method_window: Optional[asyncio.Semaphore]) -> None:
+        # The method window is acquired first so that a request waiting on a busy method
+        # does not hold a slot of the global window
+        if method_window is not None:
+            await method_window.acquire()
+        try:
+            await self.window.acquire()
+        except BaseException:
+            if method_window is not None:
+                method_window.release()
+            raise
@@ -12,12 +12,14 @@ terms of the Apache License Version 2.0 which is available at
 SPDX-License-Identifier: Apache-2.0
 """
 
-from typing import Optional
+import asyncio
+from typing import AsyncIterator, Optional
 
 from uprotocol.communication.calloptions import CallOptions
 from uprotocol.communication.inmemoryrpcclient import InMemoryRpcClient
 from uprotocol.communication.inmemoryrpcserver import InMemoryRpcServer
 from uprotocol.communication.notifier import Notifier
+from uprotocol.communication.payloadcompressor import PayloadCompressor
 from uprotocol.communication.publisher import Publisher
 from uprotocol.communication.rpcclient import RpcClient
 from uprotocol.communication.rpcserver import RpcServer
@@ -47,7 +49,7 @@ class UClient(RpcServer, Notifier, Publisher, RpcClient):
         subscriber (InMemorySubscriber): Manages topic subscriptions.
     """
 
-    def __init__(self, transport: UTransport):
+    def __init__(self, transport: UTransport, compressor: Optional[PayloadCompressor] = None):
         self.transport = transport
         if transport is None:
             raise ValueError(UTransport.TRANSPORT_NULL_ERROR)
@@ -55,9 +57,9 @@ class UClient(RpcServer, Notifier, Publisher, RpcClient):
             raise ValueError(UTransport.TRANSPORT_NOT_INSTANCE_ERROR)
 
         self.rpc_server = InMemoryRpcServer(self.transport)
-        self.publisher = SimplePublisher(self.transport)
+        self.publisher = SimplePublisher(self.transport, compressor)
         self.notifier = SimpleNotifier(self.transport)
-        self.rpc_client = InMemoryRpcClient(self.transport)
+        self.rpc_client = InMemoryRpcClient(self.transport, compressor)
 
     async def notify(
         self, topic: UUri, destination: UUri, options: Optional[CallOptions] = None, payload: Optional[UPayload] = None
@@ -145,6 +147,48 @@ class UClient(RpcServer, Notifier, Publisher, RpcClient):
         """
         return await self.rpc_client.invoke_method(method_uri, request_payload, options)
 
+    def invoke_streaming(
+        self,
+        method_uri: UUri,
+        request_payload: UPayload,
+        options: Optional[CallOptions] = None,
+        max_buffered_chunks: int = 16,
+    ) -> AsyncIterator[UPayload]:
+        """
+        Invoke a method whose server streams the response back in multiple chunks.
+
+        :param method_uri: The method URI to be invoked.
+        :param request_payload: The request message to be sent to the server.
+        :param options: RPC method invocation call options. Defaults to None.
+        :param max_buffered_chunks: Maximum number of chunks the server sends ahead of the consumer.
+        :return: Returns an async iterator of the response payloads, raises UStatusError with the failure
+                 reason if the invocation fails.
+        """
+        return self.rpc_client.invoke_streaming(method_uri, request_payload, options, max_buffered_chunks)
+
+    async def start(self) -> None:
+        """
+        Register the listener of the RPC responses ahead of the first invocation, see InMemoryRpcClient.start().
+        """
+        await self.rpc_client.start()
+
+    async def __aenter__(self) -> "UClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def aclose(self, drain_timeout: int = 5000) -> None:
+        """
+        Close the UClient gracefully. New invocations and new incoming requests are rejected with
+        UCode.UNAVAILABLE, the client invocations and server streamed responses in flight are given up to
+        the drain timeout to complete, then the listeners of the client and the server are unregistered.
+
+        :param drain_timeout: The time in milliseconds to wait for the requests in flight.
+        """
+        await asyncio.gather(self.rpc_server.aclose(drain_timeout), self.rpc_client.aclose(drain_timeout))
+
     def close(self):
         if self.rpc_client:
             self.rpc_client.close()
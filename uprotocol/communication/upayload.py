@@ -18,6 +18,8 @@ from typing import Optional, Type
 import google.protobuf.any_pb2 as any_pb2
 import google.protobuf.message as message
 
+from uprotocol.communication.messagetyperegistry import MessageTypeRegistry
+from uprotocol.communication.payloadcompressor import PayloadCompressor
 from uprotocol.v1.uattributes_pb2 import (
     UPayloadFormat,
 )
@@ -54,6 +56,31 @@ class UPayload:
     def pack_from_data_and_format(data: bytes, format: UPayloadFormat) -> 'UPayload':
         return UPayload(data, format)
 
+    @staticmethod
+    def compress(payload: Optional['UPayload'], compressor: Optional[PayloadCompressor]) -> Optional['UPayload']:
+        if payload is None or compressor is None:
+            return payload
+        data = compressor.compress(payload.data, payload.format)
+        return payload if data is payload.data else UPayload(data, payload.format)
+
+    @staticmethod
+    def decompress(payload: Optional['UPayload'], max_size: Optional[int] = None) -> Optional['UPayload']:
+        """
+        Decompress a payload compressed by a PayloadCompressor, other payloads are returned as is. Compressed
+        payloads are only understood by the receivers that decompress them, see PayloadCompressor.
+
+        :param payload: The received payload.
+        :param max_size: The maximum size in bytes of the decompressed data, defaults to
+                         PayloadCompressor.MAX_DECOMPRESSED_SIZE.
+        :return: Returns the decompressed payload.
+        :raises ValueError: If the compressed data is corrupted or truncated.
+        :raises UStatusError: With UCode.RESOURCE_EXHAUSTED if the decompressed data exceeds the maximum size.
+        """
+        if payload is None or payload.format not in PayloadCompressor.COMPRESSIBLE_FORMATS:
+            return payload
+        data = PayloadCompressor.decompress(payload.data, max_size)
+        return payload if data is payload.data else UPayload(data, payload.format)
+
     @staticmethod
     def unpack(payload: Optional['UPayload'], clazz: Type[message.Message]) -> Optional[message.Message]:
         if payload is None:
@@ -83,6 +110,36 @@ class UPayload:
         except Exception:
             return None
 
+    @staticmethod
+    def unpack_auto(
+        payload: Optional['UPayload'], registry: Optional[MessageTypeRegistry] = None
+    ) -> Optional[message.Message]:
+        """
+        Unpack a UPAYLOAD_FORMAT_PROTOBUF_WRAPPED_IN_ANY payload without knowing the message class,
+        the class is resolved from the type URL of the Any message through the registry.
+
+        :param payload: The payload to unpack.
+        :param registry: The registry used to resolve the message class, defaults to MessageTypeRegistry.DEFAULT.
+        :return: Returns the unpacked message or None if the payload is empty, not wrapped in Any,
+                 or of an unknown type.
+        """
+        if payload is None or not payload.data:
+            return None
+        if payload.format != UPayloadFormat.UPAYLOAD_FORMAT_PROTOBUF_WRAPPED_IN_ANY:
+            return None
+        registry = registry if registry is not None else MessageTypeRegistry.DEFAULT
+        try:
+            any_message = any_pb2.Any()
+            any_message.ParseFromString(payload.data)
+            clazz = registry.get(any_message.type_url)
+            if clazz is None:
+                return None
+            message = clazz()
+            message.ParseFromString(any_message.value)
+            return message
+        except Exception:
+            return None
+
 
 # Initialize EMPTY outside the class definition
 UPayload.EMPTY = UPayload(data=bytes(), format=UPayloadFormat.UPAYLOAD_FORMAT_UNSPECIFIED)
@@ -0,0 +1,294 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from google.protobuf.message import Message
+
+from uprotocol.communication.inmemoryrpcserver import InMemoryRpcServer
+from uprotocol.communication.notifier import Notifier
+from uprotocol.communication.requesthandler import RequestHandler
+from uprotocol.communication.rpcserver import RpcServer
+from uprotocol.communication.simplenotifier import SimpleNotifier
+from uprotocol.communication.upayload import UPayload
+from uprotocol.communication.ustatuserror import UStatusError
+from uprotocol.core.usubscription.v3 import usubscription_pb2
+from uprotocol.core.usubscription.v3.usubscription_pb2 import (
+    FetchSubscribersRequest,
+    FetchSubscribersResponse,
+    FetchSubscriptionsRequest,
+    FetchSubscriptionsResponse,
+    NotificationsRequest,
+    NotificationsResponse,
+    SubscriberInfo,
+    Subscription,
+    SubscriptionRequest,
+    SubscriptionResponse,
+    SubscriptionStatus,
+    UnsubscribeRequest,
+    UnsubscribeResponse,
+    Update,
+)
+from uprotocol.service.usubscription.v3.subscriptionindex import SubscriptionIndex
+from uprotocol.transport.utransport import UTransport
+from uprotocol.uri.factory.uri_factory import UriFactory
+from uprotocol.uri.serializer.uriserializer import UriSerializer
+from uprotocol.uri.validator.urivalidator import UriValidator
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+from uprotocol.v1.ustatus_pb2 import UStatus
+
+
+class USubscriptionRequestHandler(RequestHandler):
+    """
+    RequestHandler that unpacks the request of a uSubscription method, calls the method with the request and
+    the source of the request message, and packs the response.
+    """
+
+    def __init__(self, request_class: Type[Message], method: Callable[[Message, UUri], Message]):
+        self.request_class = request_class
+        self.method = method
+
+    def handle_request(self, message: UMessage) -> UPayload:
+        request = UPayload.unpack_data_format(message.payload, message.attributes.payload_format, self.request_class)
+        if request is None:
+            raise UStatusError.from_code_message(UCode.INVALID_ARGUMENT, "Invalid request payload")
+        return UPayload.pack(self.method(request, message.attributes.source))
+
+
+class InMemoryUSubscriptionService:
+    """
+    Reference implementation of the uSubscription service that keeps the subscriptions in memory, for single ECU
+    deployments and tests that do not have an external uSubscription service.
+
+    The subscriptions are indexed by topic and by subscriber so that subscribing, unsubscribing and reading a page
+    of the subscribers of a topic or of the subscriptions of a subscriber do not depend on the number of
+    subscriptions. Subscription changes are sent as Update notifications to the subscriber and to the entities
+    registered for the notifications of the topic.
+
+    There is no remote uSubscription service to forward subscriptions to, subscriptions are therefore SUBSCRIBED
+    right away, whatever the authority of the topic.
+    """
+
+    def __init__(
+        self,
+        transport: UTransport,
+        rpc_server: Optional[RpcServer] = None,
+        notifier: Optional[Notifier] = None,
+        page_size: int = 100,
+    ):
+        """
+        Constructor for the InMemoryUSubscriptionService.
+
+        :param transport: The transport to use for receiving the requests and sending the notifications.
+        :param rpc_server: The RPC server to use for handling the requests.
+        :param notifier: The notifier to use for sending the subscription change notifications.
+        :param page_size: The maximum number of records in a response of FetchSubscribers and FetchSubscriptions.
+        """
+        if not transport:
+            raise ValueError(UTransport.TRANSPORT_NULL_ERROR)
+        if not isinstance(transport, UTransport):
+            raise ValueError(UTransport.TRANSPORT_NOT_INSTANCE_ERROR)
+        if page_size < 1:
+            raise ValueError("page_size must be greater than 0")
+        self.transport = transport
+        self.rpc_server = rpc_server if rpc_server else InMemoryRpcServer(transport)
+        self.notifier = notifier if notifier else SimpleNotifier(transport)
+        self.page_size = page_size
+        # Subscriptions by serialized subscriber URI, by serialized topic URI
+        self.topics: Dict[str, SubscriptionIndex[Subscription]] = {}
+        # Subscriptions by serialized topic URI, by serialized subscriber URI
+        self.subscribers: Dict[str, SubscriptionIndex[Subscription]] = {}
+        # Entities registered for the subscription changes of a topic, by serialized topic URI
+        self.observers: Dict[str, Dict[str, UUri]] = {}
+        # Notifications are sent in order from a single task, created by start() on the running event loop
+        self.notifications: Optional[asyncio.Queue] = None
+        self.notification_task: Optional[asyncio.Task] = None
+        service_descriptor = usubscription_pb2.DESCRIPTOR.services_by_name["uSubscription"]
+        self.notification_uri = UriFactory.from_proto(service_descriptor, 0x8000)
+        self.methods: List[Tuple[UUri, RequestHandler]] = [
+            (
+                UriFactory.from_proto(service_descriptor, 1),
+                USubscriptionRequestHandler(SubscriptionRequest, self._subscribe),
+            ),
+            (
+                UriFactory.from_proto(service_descriptor, 2),
+                USubscriptionRequestHandler(UnsubscribeRequest, self._unsubscribe),
+            ),
+            (
+                UriFactory.from_proto(service_descriptor, 3),
+                USubscriptionRequestHandler(FetchSubscriptionsRequest, self._fetch_subscriptions),
+            ),
+            (
+                UriFactory.from_proto(service_descriptor, 6),
+                USubscriptionRequestHandler(NotificationsRequest, self._register_for_notifications),
+            ),
+            (
+                UriFactory.from_proto(service_descriptor, 7),
+                USubscriptionRequestHandler(NotificationsRequest, self._unregister_for_notifications),
+            ),
+            (
+                UriFactory.from_proto(service_descriptor, 8),
+                USubscriptionRequestHandler(FetchSubscribersRequest, self._fetch_subscribers),
+            ),
+        ]
+
+    async def start(self) -> UStatus:
+        """
+        Register the handlers of the uSubscription methods.
+
+        :return: Returns the status of registering the request handlers.
+        """
+        if self.notification_task is None:
+            self.notifications = asyncio.Queue()
+            self.notification_task = asyncio.ensure_future(self._send_notifications())
+        for method_uri, handler in self.methods:
+            status = await self.rpc_server.register_request_handler(method_uri, handler)
+            if status.code != UCode.OK:
+                return status
+        return UStatus(code=UCode.OK)
+
+    async def close(self) -> None:
+        """
+        Unregister the handlers of the uSubscription methods and stop sending notifications once the pending
+        ones were sent.
+        """
+        for method_uri, handler in self.methods:
+            await self.rpc_server.unregister_request_handler(method_uri, handler)
+        if self.notification_task is not None:
+            await self.notifications.join()
+            self.notification_task.cancel()
+            await asyncio.gather(self.notification_task, return_exceptions=True)
+            self.notification_task = None
+
+    def _subscribe(self, request: SubscriptionRequest, source: UUri) -> SubscriptionResponse:
+        topic_str = self._validate_topic(request.topic)
+        subscriber = self._get_subscriber(request.subscriber, source)
+        subscriber_str = UriSerializer.serialize(subscriber.uri)
+        subscriptions = self.topics.setdefault(topic_str, SubscriptionIndex())
+        subscription = subscriptions.get(subscriber_str)
+        if subscription is None:
+            subscription = Subscription(
+                topic=request.topic,
+                subscriber=subscriber,
+                status=SubscriptionStatus(state=SubscriptionStatus.State.SUBSCRIBED),
+                attributes=request.attributes,
+            )
+            subscriptions.add(subscriber_str, subscription)
+            self.subscribers.setdefault(subscriber_str, SubscriptionIndex()).add(topic_str, subscription)
+            self._notify(topic_str, subscription, subscription.status)
+        return SubscriptionResponse(topic=request.topic, status=subscription.status)
+
+    def _unsubscribe(self, request: UnsubscribeRequest, source: UUri) -> UnsubscribeResponse:
+        topic_str = self._validate_topic(request.topic)
+        subscriber = self._get_subscriber(request.subscriber, source)
+        subscriber_str = UriSerializer.serialize(subscriber.uri)
+        subscriptions = self.topics.get(topic_str)
+        subscription = subscriptions.remove(subscriber_str) if subscriptions is not None else None
+        if subscription is not None:
+            if not subscriptions:
+                del self.topics[topic_str]
+            topics = self.subscribers[subscriber_str]
+            topics.remove(topic_str)
+            if not topics:
+                del self.subscribers[subscriber_str]
+            self._notify(topic_str, subscription, SubscriptionStatus(state=SubscriptionStatus.State.UNSUBSCRIBED))
+        return UnsubscribeResponse()
+
+    def _fetch_subscribers(self, request: FetchSubscribersRequest, source: UUri) -> FetchSubscribersResponse:
+        topic_str = self._validate_topic(request.topic)
+        subscriptions = self.topics.get(topic_str)
+        if subscriptions is None:
+            return FetchSubscribersResponse(has_more_records=False)
+        page, has_more_records = subscriptions.page(request.offset, self.page_size)
+        return FetchSubscribersResponse(
+            subscribers=[subscription.subscriber for subscription in page], has_more_records=has_more_records
+        )
+
+    def _fetch_subscriptions(self, request: FetchSubscriptionsRequest, source: UUri) -> FetchSubscriptionsResponse:
+        if request.HasField("topic"):
+            subscriptions = self.topics.get(self._validate_topic(request.topic))
+        elif request.HasField("subscriber"):
+            subscriptions = self.subscribers.get(UriSerializer.serialize(request.subscriber.uri))
+        else:
+            raise UStatusError.from_code_message(UCode.INVALID_ARGUMENT, "Topic or subscriber missing")
+        if subscriptions is None:
+            return FetchSubscriptionsResponse(has_more_records=False)
+        page, has_more_records = subscriptions.page(request.offset, self.page_size)
+        return FetchSubscriptionsResponse(subscriptions=page, has_more_records=has_more_records)
+
+    def _register_for_notifications(self, request: NotificationsRequest, source: UUri) -> NotificationsResponse:
+        topic_str = self._validate_topic(request.topic)
+        observer = self._get_observer(request.subscriber, source)
+        if observer.ue_id != request.topic.ue_id:
+            raise UStatusError.from_code_message(UCode.PERMISSION_DENIED, "Only the producer of a topic can register")
+        self.observers.setdefault(topic_str, {})[UriSerializer.serialize(observer)] = observer
+        return NotificationsResponse()
+
+    def _unregister_for_notifications(self, request: NotificationsRequest, source: UUri) -> NotificationsResponse:
+        topic_str = self._validate_topic(request.topic)
+        observer = self._get_observer(request.subscriber, source)
+        observers = self.observers.get(topic_str)
+        if observers is not None:
+            observers.pop(UriSerializer.serialize(observer), None)
+            if not observers:
+                del self.observers[topic_str]
+        return NotificationsResponse()
+
+    def _notify(self, topic_str: str, subscription: Subscription, status: SubscriptionStatus) -> None:
+        if self.notifications is None:
+            return
+        update = Update(
+            topic=subscription.topic,
+            subscriber=subscription.subscriber,
+            status=status,
+            attributes=subscription.attributes,
+        )
+        destinations = {UriSerializer.serialize(subscription.subscriber.uri): subscription.subscriber.uri}
+        destinations.update(self.observers.get(topic_str, {}))
+        for destination in destinations.values():
+            self.notifications.put_nowait((destination, update))
+
+    async def _send_notifications(self) -> None:
+        while True:
+            destination, update = await self.notifications.get()
+            try:
+                await self.notifier.notify(self.notification_uri, destination, payload=UPayload.pack(update))
+            except Exception:
+                # A subscriber that cannot be notified must not stop the notifications of the others
+                pass
+            finally:
+                self.notifications.task_done()
+
+    @staticmethod
+    def _validate_topic(topic: UUri) -> str:
+        if not UriValidator.is_topic(topic) or UriValidator.has_wildcard(topic):
+            raise UStatusError.from_code_message(UCode.INVALID_ARGUMENT, "Invalid topic")
+        return UriSerializer.serialize(topic)
+
+    @staticmethod
+    def _get_subscriber(subscriber: SubscriberInfo, source: UUri) -> SubscriberInfo:
+        if UriValidator.is_empty(subscriber.uri):
+            # The subscriber defaults to the entity that sent the request
+            return SubscriberInfo(uri=source, details=subscriber.details)
+        return subscriber
+
+    @staticmethod
+    def _get_observer(subscriber: SubscriberInfo, source: UUri) -> UUri:
+        # The observer is the entity that sent the request, naming another one would register it in its place
+        if not UriValidator.is_empty(subscriber.uri) and subscriber.uri != source:
+            raise UStatusError.from_code_message(UCode.PERMISSION_DENIED, "Cannot register for another entity")
+        return source
@@ -0,0 +1,93 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from typing import Dict, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SubscriptionIndex(Generic[T]):
+    """
+    Set of values keyed by a string that supports O(1) insertion, lookup and removal as well as reading a page
+    at an offset in O(page size).
+
+    The values are kept in a list with the position of each key, a removed value is replaced by the last one.
+    Pages are therefore stable as long as the index is only added to, like with any offset based pagination
+    a removal while paging can make a value move to an already read page.
+    """
+
+    def __init__(self):
+        self.positions: Dict[str, int] = {}
+        self.keys: List[str] = []
+        self.values: List[T] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.positions
+
+    def get(self, key: str) -> Optional[T]:
+        """
+        Get the value of a key.
+
+        :param key: The key of the value.
+        :return: Returns the value or None if the key is unknown.
+        """
+        position = self.positions.get(key)
+        return self.values[position] if position is not None else None
+
+    def add(self, key: str, value: T) -> bool:
+        """
+        Add a value unless its key is already known.
+
+        :param key: The key of the value.
+        :param value: The value to add.
+        :return: Returns True if the value was added, False if the key was already known.
+        """
+        if key in self.positions:
+            return False
+        self.positions[key] = len(self.values)
+        self.keys.append(key)
+        self.values.append(value)
+        return True
+
+    def remove(self, key: str) -> Optional[T]:
+        """
+        Remove the value of a key.
+
+        :param key: The key of the value.
+        :return: Returns the removed value or None if the key is unknown.
+        """
+        position = self.positions.pop(key, None)
+        if position is None:
+            return None
+        value = self.values[position]
+        last_key = self.keys.pop()
+        last_value = self.values.pop()
+        if position < len(self.values):
+            self.keys[position] = last_key
+            self.values[position] = last_value
+            self.positions[last_key] = position
+        return value
+
+    def page(self, offset: int, limit: int) -> Tuple[List[T], bool]:
+        """
+        Read a page of values.
+
+        :param offset: The position of the first value of the page.
+        :param limit: The maximum number of values in the page.
+        :return: Returns the values of the page and whether there are more values after the page.
+        """
+        return self.values[offset : offset + limit], offset + limit < len(self.values)
@@ -0,0 +1,187 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import os
+import re
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from google.protobuf.message import DecodeError
+
+from uprotocol.transport.listenerregistry import ListenerRegistry
+from uprotocol.transport.ulistener import UListener
+from uprotocol.transport.utransport import UTransport
+from uprotocol.transport.validator.uattributesvalidator import UAttributesValidator
+from uprotocol.uri.factory.uri_factory import UriFactory
+from uprotocol.uri.validator.urivalidator import UriValidator
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+from uprotocol.v1.ustatus_pb2 import UStatus
+
+
+class DomainUTransport(UTransport, ABC):
+    """
+    Base of the UTransports for uEs running as processes of the same host, exchanging messages without a broker.
+
+    The transports of a domain find each other through files named after their entity in a directory shared by
+    the domain. Messages with a sink are written to the receiver of the sink entity, published messages to all the
+    receivers of the domain and filtered by the listeners of each receiver. Subclasses provide the channel to the
+    receivers: starting to receive, writing a frame to a receiver and the peers holding the open channels.
+    """
+
+    def __init__(
+        self,
+        source: UUri,
+        domain: str,
+        directory: Optional[str],
+        suffix: str,
+        discovery_interval: int,
+        max_frame_size: Optional[int] = None,
+    ):
+        """
+        Constructor for the DomainUTransport.
+
+        :param source: The URI of the uE using the transport, its entity identifies the receiver.
+        :param domain: The name of the group of transports that exchange messages.
+        :param directory: The directory where the files of the domain are created, defaults to a directory
+                          named after the domain in the temporary directory.
+        :param suffix: The suffix of the file of each receiver in the directory.
+        :param discovery_interval: The time in milliseconds the list of receivers of published messages is cached.
+        :param max_frame_size: The size in bytes of the largest message sent, or None for no limit.
+        """
+        if source is None or UriValidator.is_empty(source):
+            raise ValueError("Source missing")
+        if not re.fullmatch(r"[A-Za-z0-9._-]+", domain):
+            raise ValueError("Invalid domain")
+        self.source = source
+        self.domain = domain
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "uprotocol-" + domain)
+        self.suffix = suffix
+        self.discovery_interval = discovery_interval / 1000
+        self.max_frame_size = max_frame_size
+        self.listeners = ListenerRegistry()
+        # Open channels to the receivers by key, each with a close() method
+        self.peers: Dict[str, Any] = {}
+        self.receivers: List[str] = []
+        self.discovered_at = float("-inf")
+        self.key = self._get_key(source)
+        os.makedirs(self.directory, exist_ok=True)
+
+    async def send(self, message: UMessage) -> UStatus:
+        """
+        Send a message to the receiver of its sink, or to all the receivers of the domain for a published message.
+
+        :param message: The message to send.
+        :return: Returns UCode.UNAVAILABLE if the sink is not receiving.
+        """
+        if message is None:
+            return UStatus(code=UCode.INVALID_ARGUMENT, message="Message missing")
+        validation = UAttributesValidator.get_validator(message.attributes).validate(message.attributes)
+        if validation.is_failure():
+            return validation.to_status()
+        frame = message.SerializeToString()
+        if self.max_frame_size is not None and len(frame) > self.max_frame_size:
+            return UStatus(code=UCode.INVALID_ARGUMENT, message="Message exceeds the maximum frame size")
+        if message.attributes.HasField("sink") and not UriValidator.is_empty(message.attributes.sink):
+            return await self._write(self._get_key(message.attributes.sink), frame)
+        status = UStatus(code=UCode.OK)
+        for key in self._discover():
+            result = await self._write(key, frame)
+            # Receivers that went away in the meantime do not fail a publication
+            if result.code not in (UCode.OK, UCode.UNAVAILABLE):
+                status = result
+        return status
+
+    async def register_listener(
+        self, source_filter: UUri, listener: UListener, sink_filter: UUri = UriFactory.ANY
+    ) -> UStatus:
+        if source_filter is None or listener is None:
+            return UStatus(code=UCode.INVALID_ARGUMENT, message="Source filter or listener missing")
+        status = await self._start()
+        if status.code != UCode.OK:
+            return status
+        self.listeners.register(source_filter, listener, sink_filter)
+        return status
+
+    async def unregister_listener(
+        self, source_filter: UUri, listener: UListener, sink_filter: UUri = UriFactory.ANY
+    ) -> UStatus:
+        if self.listeners.unregister(source_filter, listener, sink_filter):
+            return UStatus(code=UCode.OK)
+        return UStatus(code=UCode.NOT_FOUND)
+
+    def get_source(self) -> UUri:
+        return self.source
+
+    async def close(self) -> None:
+        """
+        Unregister all the listeners and close the channels to the other receivers.
+        """
+        self.listeners.clear()
+        for peer in self.peers.values():
+            peer.close()
+        self.peers.clear()
+
+    @abstractmethod
+    async def _start(self) -> UStatus:
+        """
+        Start receiving the messages addressed to the transport, called for each registered listener.
+        """
+        pass
+
+    @abstractmethod
+    async def _write(self, key: str, frame: bytes) -> UStatus:
+        """
+        Write a serialized message to a receiver.
+
+        :param key: The key of the receiver.
+        :param frame: The serialized message.
+        :return: Returns UCode.UNAVAILABLE if the receiver is not receiving.
+        """
+        pass
+
+    async def _dispatch(self, frame: bytes) -> None:
+        try:
+            message = UMessage.FromString(frame)
+        except DecodeError:
+            return
+        await self.listeners.dispatch(message)
+
+    def _drop_peer(self, key: str) -> None:
+        peer = self.peers.pop(key, None)
+        if peer is not None:
+            peer.close()
+
+    def _discover(self) -> List[str]:
+        now = time.monotonic()
+        if now - self.discovered_at >= self.discovery_interval:
+            self.receivers = [
+                name[: -len(self.suffix)] for name in os.listdir(self.directory) if name.endswith(self.suffix)
+            ]
+            for key in list(self.peers):
+                if key not in self.receivers:
+                    self._drop_peer(key)
+            self.discovered_at = now
+        return self.receivers
+
+    def _get_path(self, key: str, suffix: Optional[str] = None) -> str:
+        return os.path.join(self.directory, key + (suffix or self.suffix))
+
+    @staticmethod
+    def _get_key(uri: UUri) -> str:
+        authority = re.sub(r"[^A-Za-z0-9._-]", "_", uri.authority_name)
+        return f"{authority}_{uri.ue_id:x}_{uri.ue_version_major:x}"
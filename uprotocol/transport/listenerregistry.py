@@ -0,0 +1,137 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from uprotocol.transport.ulistener import UListener
+from uprotocol.uri.serializer.uriserializer import UriSerializer
+from uprotocol.uri.validator.urivalidator import UriValidator
+from uprotocol.v1.uattributes_pb2 import UAttributes
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+
+
+class ListenerRegistry:
+    """
+    Listeners registered with a transport by source and sink filters, for transports that dispatch the
+    received messages themselves.
+
+    A message matches a registration if its source matches the source filter and its sink matches the sink
+    filter, following the UriValidator.matches() wildcard semantics. A None sink filter only matches messages
+    without a sink, i.e. published messages.
+    """
+
+    def __init__(self):
+        # Listeners by source and sink filters, keyed by the serialized filters
+        self.registrations: Dict[Tuple[str, Optional[str]], Tuple[UUri, Optional[UUri], List[UListener]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(listeners) for _, _, listeners in self.registrations.values())
+
+    def register(self, source_filter: UUri, listener: UListener, sink_filter: Optional[UUri]) -> bool:
+        """
+        Register a listener for source and sink filters.
+
+        :param source_filter: The source address pattern of the messages to receive.
+        :param listener: The listener to call with the matching messages.
+        :param sink_filter: The sink address pattern of the messages to receive or None for messages without sink.
+        :return: Returns True if the listener was registered, False if it was already registered for the filters.
+        """
+        key = self._get_key(source_filter, sink_filter)
+        registration = self.registrations.get(key)
+        if registration is None:
+            registration = (source_filter, sink_filter, [])
+            self.registrations[key] = registration
+        if listener in registration[2]:
+            return False
+        registration[2].append(listener)
+        return True
+
+    def unregister(self, source_filter: UUri, listener: UListener, sink_filter: Optional[UUri]) -> bool:
+        """
+        Unregister a listener from source and sink filters.
+
+        :param source_filter: The source address pattern the listener was registered with.
+        :param listener: The listener to unregister.
+        :param sink_filter: The sink address pattern the listener was registered with.
+        :return: Returns True if the listener was unregistered, False if it was not registered for the filters.
+        """
+        key = self._get_key(source_filter, sink_filter)
+        registration = self.registrations.get(key)
+        if registration is None or listener not in registration[2]:
+            return False
+        registration[2].remove(listener)
+        if not registration[2]:
+            del self.registrations[key]
+        return True
+
+    def match(self, attributes: UAttributes) -> List[UListener]:
+        """
+        Get the listeners of the registrations matching the source and sink of a message, a listener registered
+        with several matching filters is returned once.
+
+        :param attributes: The attributes of the message.
+        :return: Returns the matching listeners in registration order.
+        """
+        has_sink = attributes.HasField("sink")
+        listeners: List[UListener] = []
+        for source_filter, sink_filter, registered in self.registrations.values():
+            if not UriValidator.matches(source_filter, attributes.source):
+                continue
+            if sink_filter is None:
+                if has_sink:
+                    continue
+            elif not UriValidator.matches(sink_filter, attributes.sink):
+                continue
+            for listener in registered:
+                if listener not in listeners:
+                    listeners.append(listener)
+        return listeners
+
+    async def dispatch(self, message: UMessage) -> None:
+        """
+        Call the listeners matching a message one after the other.
+
+        :param message: The received message.
+        """
+        for listener in self.match(message.attributes):
+            await self.deliver(listener, message)
+
+    @staticmethod
+    async def deliver(listener: UListener, message: UMessage) -> bool:
+        """
+        Call a listener with a message, a listener raising an exception does not fail the caller.
+
+        :param listener: The listener to call.
+        :param message: The message to deliver.
+        :return: Returns False if the listener raised an exception.
+        """
+        try:
+            await listener.on_receive(message)
+            return True
+        except Exception:
+            # A failing listener must not prevent the delivery to the other listeners nor of the next messages
+            return False
+
+    def clear(self) -> None:
+        """
+        Unregister all the listeners.
+        """
+        self.registrations.clear()
+
+    @staticmethod
+    def _get_key(source_filter: UUri, sink_filter: Optional[UUri]) -> Tuple[str, Optional[str]]:
+        return UriSerializer.serialize(source_filter), None if sink_filter is None else UriSerializer.serialize(
+            sink_filter
+        )
@@ -0,0 +1,146 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+from enum import Enum
+from typing import List, Optional, Tuple
+
+from uprotocol.transport.listenerregistry import ListenerRegistry
+from uprotocol.transport.ulistener import UListener
+from uprotocol.transport.utransport import UTransport
+from uprotocol.transport.validator.uattributesvalidator import UAttributesValidator
+from uprotocol.uri.factory.uri_factory import UriFactory
+from uprotocol.uri.validator.urivalidator import UriValidator
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.umessage_pb2 import UMessage
+from uprotocol.v1.uri_pb2 import UUri
+from uprotocol.v1.ustatus_pb2 import UStatus
+
+
+class FanOutPolicy(Enum):
+    # Listeners are called one after the other, in registration order
+    SEQUENTIAL = "sequential"
+    # Listeners are called concurrently, the send completes once all of them returned
+    CONCURRENT = "concurrent"
+
+
+class LocalBroker:
+    """
+    Broker of the LocalUTransports of a process, delivers each message to the matching listeners of all the
+    transports connected to it.
+
+    A message is not copied: the very same UMessage object is passed to every matching listener, so fanning out
+    to N listeners costs one serialization-free dispatch rather than N copies. Listeners must therefore treat
+    the message as immutable; a listener that needs to modify it must work on its own copy (CopyFrom). With
+    verify_immutable, the broker checks that the message is unchanged after each listener, which is meant for
+    tests and debugging as it serializes the message once per listener.
+    """
+
+    def __init__(self, policy: FanOutPolicy = FanOutPolicy.SEQUENTIAL, verify_immutable: bool = False):
+        """
+        Constructor for the LocalBroker.
+
+        :param policy: Whether the listeners of a message are called sequentially or concurrently.
+        :param verify_immutable: True to fail the send of a message that a listener modified.
+        """
+        self.policy = policy
+        self.verify_immutable = verify_immutable
+        self.listeners = ListenerRegistry()
+
+    async def publish(self, message: UMessage) -> UStatus:
+        """
+        Deliver a message to the matching listeners.
+
+        :param message: The message to deliver, shared by all the listeners.
+        :return: Returns UCode.INTERNAL if verify_immutable is set and a listener modified the message.
+        """
+        listeners = self.listeners.match(message.attributes)
+        if not listeners:
+            return UStatus(code=UCode.OK)
+        expected = message.SerializeToString() if self.verify_immutable else None
+        if self.policy == FanOutPolicy.CONCURRENT and len(listeners) > 1:
+            mutated = await asyncio.gather(*(self._deliver(listener, message, expected) for listener in listeners))
+        else:
+            mutated = [await self._deliver(listener, message, expected) for listener in listeners]
+        culprits = [listener for listener, changed in zip(listeners, mutated) if changed]
+        if culprits:
+            return UStatus(code=UCode.INTERNAL, message=f"Message modified by listener {culprits[0]!r}")
+        return UStatus(code=UCode.OK)
+
+    @staticmethod
+    async def _deliver(listener: UListener, message: UMessage, expected: Optional[bytes]) -> bool:
+        await ListenerRegistry.deliver(listener, message)
+        # With concurrent listeners, the one found to have modified the message is the first to return after
+        # the modification
+        return expected is not None and message.SerializeToString() != expected
+
+
+class LocalUTransport(UTransport):
+    """
+    UTransport for uEs running in the same process, exchanging messages through a LocalBroker without
+    serialization nor copies, see LocalBroker for the contract of the listeners.
+    """
+
+    def __init__(self, broker: LocalBroker, source: UUri):
+        """
+        Constructor for the LocalUTransport.
+
+        :param broker: The broker shared by the transports of the process.
+        :param source: The URI of the uE using the transport.
+        """
+        if broker is None:
+            raise ValueError("Broker missing")
+        if source is None or UriValidator.is_empty(source):
+            raise ValueError("Source missing")
+        self.broker = broker
+        self.source = source
+        self.registrations: List[Tuple[UUri, UListener, Optional[UUri]]] = []
+
+    async def send(self, message: UMessage) -> UStatus:
+        if message is None:
+            return UStatus(code=UCode.INVALID_ARGUMENT, message="Message missing")
+        validation = UAttributesValidator.get_validator(message.attributes).validate(message.attributes)
+        if validation.is_failure():
+            return validation.to_status()
+        return await self.broker.publish(message)
+
+    async def register_listener(
+        self, source_filter: UUri, listener: UListener, sink_filter: UUri = UriFactory.ANY
+    ) -> UStatus:
+        if source_filter is None or listener is None:
+            return UStatus(code=UCode.INVALID_ARGUMENT, message="Source filter or listener missing")
+        if self.broker.listeners.register(source_filter, listener, sink_filter):
+            self.registrations.append((source_filter, listener, sink_filter))
+        return UStatus(code=UCode.OK)
+
+    async def unregister_listener(
+        self, source_filter: UUri, listener: UListener, sink_filter: UUri = UriFactory.ANY
+    ) -> UStatus:
+        registration = (source_filter, listener, sink_filter)
+        if registration not in self.registrations:
+            return UStatus(code=UCode.NOT_FOUND)
+        self.registrations.remove(registration)
+        self.broker.listeners.unregister(source_filter, listener, sink_filter)
+        return UStatus(code=UCode.OK)
+
+    def get_source(self) -> UUri:
+        return self.source
+
+    async def close(self) -> None:
+        """
+        Unregister the listeners of the transport from the broker.
+        """
+        for source_filter, listener, sink_filter in self.registrations:
+            self.broker.listeners.unregister(source_filter, listener, sink_filter)
+        self.registrations.clear()
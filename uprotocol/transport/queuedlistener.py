@@ -0,0 +1,166 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import itertools
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Hashable, Optional
+
+from uprotocol.transport.ulistener import UListener
+from uprotocol.uri.serializer.uriserializer import UriSerializer
+from uprotocol.v1.umessage_pb2 import UMessage
+
+
+class OverflowPolicy(Enum):
+    # The oldest queued message is dropped to make room for the new one
+    DROP_OLDEST = "drop_oldest"
+    # The new message is dropped
+    DROP_NEWEST = "drop_newest"
+    # The transport waits for room in the queue, which holds back the messages of the other listeners
+    BLOCK = "block"
+    # A queued message is replaced by a newer message from the same source, i.e. the same topic for published
+    # messages, so only the latest value of each topic is kept. The oldest message is dropped when a new
+    # topic does not fit
+    COALESCE = "coalesce"
+
+
+@dataclass
+class QueueMetrics:
+    """
+    Counters of a QueuedListener.
+    """
+
+    received: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    failures: int = 0
+
+
+class QueuedListener(UListener):
+    """
+    UListener adapter that queues the received messages and delivers them to the wrapped listener from a
+    dedicated task, so that a slow listener does not hold back the transport and the other listeners.
+
+    The queue is bounded, the overflow policy decides what happens to the messages that do not fit. The adapter
+    is registered with the transport in place of the wrapped listener, see UTransport.register_listener().
+    """
+
+    def __init__(self, listener: UListener, maxsize: int = 100, policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST):
+        """
+        Constructor for the QueuedListener.
+
+        :param listener: The listener to deliver the messages to.
+        :param maxsize: The maximum number of queued messages.
+        :param policy: What to do with a message received while the queue is full.
+        """
+        if listener is None:
+            raise ValueError("Listener missing")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.listener = listener
+        self.maxsize = maxsize
+        self.policy = policy
+        self.metrics = QueueMetrics()
+        # Messages keyed by their topic when coalescing, by a sequence number otherwise
+        self.queue: "OrderedDict[Hashable, UMessage]" = OrderedDict()
+        self.sequence = itertools.count()
+        self.consumer: Optional[asyncio.Task] = None
+        # Created on first use so that the listener can be built outside of the event loop
+        self.not_empty: Optional[asyncio.Event] = None
+        self.not_full: Optional[asyncio.Event] = None
+        self.idle: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    async def on_receive(self, umsg: UMessage) -> None:
+        """
+        Queue a message for the wrapped listener, returns immediately unless the policy is OverflowPolicy.BLOCK
+        and the queue is full.
+
+        :param umsg: The received message.
+        """
+        self._start()
+        self.metrics.received += 1
+        key = UriSerializer.serialize(umsg.attributes.source) if self.policy == OverflowPolicy.COALESCE else None
+        if key is not None and key in self.queue:
+            self.queue[key] = umsg
+            self.metrics.coalesced += 1
+            return
+        if len(self.queue) >= self.maxsize:
+            if self.policy == OverflowPolicy.DROP_NEWEST:
+                self.metrics.dropped += 1
+                return
+            if self.policy == OverflowPolicy.BLOCK:
+                while len(self.queue) >= self.maxsize:
+                    self.not_full.clear()
+                    await self.not_full.wait()
+                    if self.consumer is None:
+                        # Closed while waiting
+                        self.metrics.dropped += 1
+                        return
+            else:
+                self.queue.popitem(last=False)
+                self.metrics.dropped += 1
+        self.queue[next(self.sequence) if key is None else key] = umsg
+        self.idle.clear()
+        self.not_empty.set()
+
+    async def join(self) -> None:
+        """
+        Wait until the queued messages are delivered.
+        """
+        if self.consumer is not None:
+            await self.idle.wait()
+
+    async def close(self) -> None:
+        """
+        Stop the delivery, the queued messages are dropped.
+        """
+        if self.consumer is not None:
+            self.consumer.cancel()
+            await asyncio.gather(self.consumer, return_exceptions=True)
+            self.consumer = None
+        self.metrics.dropped += len(self.queue)
+        self.queue.clear()
+        if self.not_full is not None:
+            # Releases the senders blocked on the full queue
+            self.not_full.set()
+
+    def _start(self) -> None:
+        if self.consumer is not None:
+            return
+        self.not_empty = asyncio.Event()
+        self.not_full = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.consumer = asyncio.ensure_future(self._consume())
+
+    async def _consume(self) -> None:
+        while True:
+            if not self.queue:
+                self.idle.set()
+                self.not_empty.clear()
+                await self.not_empty.wait()
+                continue
+            _, message = self.queue.popitem(last=False)
+            self.not_full.set()
+            try:
+                await self.listener.on_receive(message)
+                self.metrics.delivered += 1
+            except Exception:
+                self.metrics.failures += 1
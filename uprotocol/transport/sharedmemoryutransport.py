@@ -0,0 +1,315 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import contextlib
+import errno
+import fcntl
+import os
+import struct
+import sys
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional
+
+from uprotocol.transport.domainutransport import DomainUTransport
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.uri_pb2 import UUri
+from uprotocol.v1.ustatus_pb2 import UStatus
+
+
+@contextlib.contextmanager
+def _untracked():
+    # Before Python 3.13 every process opening a segment registers it with the resource tracker, which unlinks
+    # it when that process exits. The rings are owned by their receiver, so tracking is disabled altogether
+    if sys.version_info >= (3, 13):
+        yield
+        return
+    register, unregister = resource_tracker.register, resource_tracker.unregister
+    resource_tracker.register = resource_tracker.unregister = lambda name, rtype: None
+    try:
+        yield
+    finally:
+        resource_tracker.register, resource_tracker.unregister = register, unregister
+
+
+class SharedMemoryRing:
+    """
+    Ring buffer of length-prefixed frames in a shared memory segment.
+
+    The header holds the capacity and the monotonic head (write) and tail (read) positions. There is a single
+    consumer, the owner of the ring, producers must be serialized by the caller, see SharedMemoryUTransport.
+    """
+
+    HEADER = struct.Struct("<QQQ")
+    LENGTH = struct.Struct("<I")
+
+    def __init__(self, memory: shared_memory.SharedMemory):
+        self.memory = memory
+        self.buf = memory.buf
+        self.capacity = self.HEADER.unpack_from(self.buf, 0)[0]
+
+    @classmethod
+    def create(cls, name: str, capacity: int) -> "SharedMemoryRing":
+        """
+        Create a ring, the caller owns it and must unlink it.
+
+        :param name: The name of the shared memory segment.
+        :param capacity: The number of bytes available for the frames.
+        :return: Returns the created ring.
+        """
+        kwargs = {"track": False} if sys.version_info >= (3, 13) else {}
+        with _untracked():
+            memory = shared_memory.SharedMemory(name, create=True, size=cls.HEADER.size + capacity, **kwargs)
+        cls.HEADER.pack_into(memory.buf, 0, capacity, 0, 0)
+        return cls(memory)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedMemoryRing":
+        """
+        Attach to the ring of another receiver.
+
+        :param name: The name of the shared memory segment.
+        :return: Returns the attached ring, raises FileNotFoundError if there is no such ring.
+        """
+        kwargs = {"track": False} if sys.version_info >= (3, 13) else {}
+        with _untracked():
+            return cls(shared_memory.SharedMemory(name, **kwargs))
+
+    def write(self, frame: bytes) -> bool:
+        """
+        Append a frame, the producers must hold the lock of the ring.
+
+        :param frame: The frame to append.
+        :return: Returns False if there is not enough free space for the frame.
+        """
+        _, head, tail = self.HEADER.unpack_from(self.buf, 0)
+        size = self.LENGTH.size + len(frame)
+        if size > self.capacity - (head - tail):
+            return False
+        self._copy_in(head, self.LENGTH.pack(len(frame)))
+        self._copy_in(head + self.LENGTH.size, frame)
+        # The frame is written before the head is moved past it
+        struct.pack_into("<Q", self.buf, 8, head + size)
+        return True
+
+    def read_all(self) -> List[bytes]:
+        """
+        Consume all the frames of the ring, only the owner of the ring may consume it.
+
+        :return: Returns the frames in the order they were written.
+        """
+        _, head, tail = self.HEADER.unpack_from(self.buf, 0)
+        frames = []
+        while tail < head:
+            length = self.LENGTH.unpack(self._copy_out(tail, self.LENGTH.size))[0]
+            frames.append(self._copy_out(tail + self.LENGTH.size, length))
+            tail += self.LENGTH.size + length
+        struct.pack_into("<Q", self.buf, 16, tail)
+        return frames
+
+    def close(self, unlink: bool = False) -> None:
+        """
+        Detach from the ring.
+
+        :param unlink: True to also destroy the shared memory segment.
+        """
+        self.buf = None
+        self.memory.close()
+        if unlink:
+            with _untracked():
+                self.memory.unlink()
+
+    def _copy_in(self, position: int, data: bytes) -> None:
+        offset = position % self.capacity
+        first = min(len(data), self.capacity - offset)
+        start = self.HEADER.size + offset
+        self.buf[start : start + first] = data[:first]
+        if first < len(data):
+            self.buf[self.HEADER.size : self.HEADER.size + len(data) - first] = data[first:]
+
+    def _copy_out(self, position: int, length: int) -> bytes:
+        offset = position % self.capacity
+        first = min(length, self.capacity - offset)
+        start = self.HEADER.size + offset
+        data = bytes(self.buf[start : start + first])
+        if first < length:
+            data += bytes(self.buf[self.HEADER.size : self.HEADER.size + length - first])
+        return data
+
+
+class SharedMemoryPeer:
+    """
+    Connection of a sender to the ring of a receiver.
+    """
+
+    def __init__(self, ring: SharedMemoryRing, lock_fd: int, doorbell_fd: int):
+        self.ring = ring
+        self.lock_fd = lock_fd
+        self.doorbell_fd = doorbell_fd
+
+    def close(self) -> None:
+        self.ring.close()
+        os.close(self.lock_fd)
+        os.close(self.doorbell_fd)
+
+
+class SharedMemoryUTransport(DomainUTransport):
+    """
+    UTransport for uEs running as processes of the same host, exchanging messages through shared memory
+    without a broker. POSIX only, it relies on named pipes and flock.
+
+    Each transport owns a ring buffer (multiprocessing.shared_memory) where the other transports of the domain
+    write the serialized UMessages addressed to it, as length-prefixed frames. Writers of a ring are serialized
+    with a file lock and ring a doorbell, a named pipe, that wakes up the event loop of the receiver.
+
+    Messages are addressed to the rings as described in DomainUTransport, a receiver is found through its doorbell.
+    """
+
+    def __init__(
+        self,
+        source: UUri,
+        domain: str = "uprotocol",
+        capacity: int = 1 << 20,
+        directory: Optional[str] = None,
+        discovery_interval: int = 1000,
+    ):
+        """
+        Constructor for the SharedMemoryUTransport, creates the ring of the transport.
+
+        :param source: The URI of the uE using the transport, its entity identifies the ring.
+        :param domain: The name of the group of transports that exchange messages.
+        :param capacity: The size in bytes of the ring, bounds the messages waiting to be received.
+        :param directory: The directory where the doorbells and locks of the domain are created, defaults to
+                          a directory named after the domain in the temporary directory.
+        :param discovery_interval: The time in milliseconds the list of receivers of published messages is cached.
+        """
+        if capacity < 64:
+            raise ValueError("capacity must be at least 64 bytes")
+        super().__init__(source, domain, directory, ".fifo", discovery_interval)
+        self.capacity = capacity
+        self.peers: Dict[str, SharedMemoryPeer] = {}
+        self.receive_task: Optional[asyncio.Task] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._remove_stale_ring()
+        self.ring = SharedMemoryRing.create(self._get_ring_name(self.key), capacity)
+        doorbell = self._get_path(self.key)
+        os.mkfifo(doorbell)
+        # The ring keeps a writer open on its own doorbell so that reading it never sees an end of file
+        self.doorbell_fd = os.open(doorbell, os.O_RDONLY | os.O_NONBLOCK)
+        self.doorbell_writer_fd = os.open(doorbell, os.O_WRONLY | os.O_NONBLOCK)
+
+    async def close(self) -> None:
+        """
+        Unregister all the listeners, detach from the rings of the other receivers and destroy the ring.
+        """
+        if self.receive_task is not None:
+            self.loop.remove_reader(self.doorbell_fd)
+            self.receive_task.cancel()
+            await asyncio.gather(self.receive_task, return_exceptions=True)
+            self.receive_task = None
+        await super().close()
+        if self.ring is not None:
+            for suffix in (self.suffix, ".lock"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(self._get_path(self.key, suffix))
+            os.close(self.doorbell_fd)
+            os.close(self.doorbell_writer_fd)
+            self.ring.close(unlink=True)
+            self.ring = None
+
+    async def _start(self) -> UStatus:
+        if self.receive_task is not None:
+            return UStatus(code=UCode.OK)
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        self.loop.add_reader(self.doorbell_fd, self._on_doorbell)
+        self.receive_task = asyncio.ensure_future(self._receive())
+        # Frames written before the first listener was registered
+        self.wakeup.set()
+        return UStatus(code=UCode.OK)
+
+    def _on_doorbell(self) -> None:
+        try:
+            while os.read(self.doorbell_fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        self.wakeup.set()
+
+    async def _receive(self) -> None:
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            for frame in self.ring.read_all():
+                await self._dispatch(frame)
+
+    async def _write(self, key: str, frame: bytes) -> UStatus:
+        peer = self._get_peer(key)
+        if peer is None:
+            return UStatus(code=UCode.UNAVAILABLE, message="Receiver not running")
+        fcntl.flock(peer.lock_fd, fcntl.LOCK_EX)
+        try:
+            written = peer.ring.write(frame)
+        finally:
+            fcntl.flock(peer.lock_fd, fcntl.LOCK_UN)
+        if not written:
+            return UStatus(code=UCode.RESOURCE_EXHAUSTED, message="Receiver ring is full")
+        try:
+            os.write(peer.doorbell_fd, b"\0")
+        except BlockingIOError:
+            # The doorbell is already full of wakeups that the receiver did not consume yet
+            pass
+        except BrokenPipeError:
+            self._drop_peer(key)
+            return UStatus(code=UCode.UNAVAILABLE, message="Receiver not running")
+        return UStatus(code=UCode.OK)
+
+    def _get_peer(self, key: str) -> Optional[SharedMemoryPeer]:
+        peer = self.peers.get(key)
+        if peer is not None:
+            return peer
+        try:
+            doorbell_fd = os.open(self._get_path(key), os.O_WRONLY | os.O_NONBLOCK)
+        except OSError:
+            # Either there is no such receiver or it died without cleaning up (ENXIO, no reader)
+            return None
+        try:
+            ring = SharedMemoryRing.attach(self._get_ring_name(key))
+        except FileNotFoundError:
+            os.close(doorbell_fd)
+            return None
+        lock_fd = os.open(self._get_path(key, ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        peer = SharedMemoryPeer(ring, lock_fd, doorbell_fd)
+        self.peers[key] = peer
+        return peer
+
+    def _remove_stale_ring(self) -> None:
+        doorbell = self._get_path(self.key)
+        try:
+            os.close(os.open(doorbell, os.O_WRONLY | os.O_NONBLOCK))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            if e.errno != errno.ENXIO:
+                raise
+            # Left behind by a receiver that did not close, nobody reads the doorbell anymore
+            os.unlink(doorbell)
+        else:
+            raise ValueError("A transport with the same source is already running in the domain")
+        with contextlib.suppress(FileNotFoundError):
+            SharedMemoryRing.attach(self._get_ring_name(self.key)).close(unlink=True)
+
+    def _get_ring_name(self, key: str) -> str:
+        return self.domain + "-" + key
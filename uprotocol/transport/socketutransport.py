@@ -0,0 +1,310 @@
+"""
+SPDX-FileCopyrightText: 2024 Contributors to the Eclipse Foundation
+
+See the NOTICE file(s) distributed with this work for additional
+information regarding copyright ownership.
+
+This program and the accompanying materials are made available under the
+terms of the Apache License Version 2.0 which is available at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import asyncio
+import contextlib
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from uprotocol.transport.domainutransport import DomainUTransport
+from uprotocol.v1.ucode_pb2 import UCode
+from uprotocol.v1.uri_pb2 import UUri
+from uprotocol.v1.ustatus_pb2 import UStatus
+
+LENGTH = struct.Struct("!I")
+
+
+class FrameDecoder:
+    """
+    Splits a stream of bytes into length-prefixed frames, a read can hold any number of frames and end in the
+    middle of one.
+    """
+
+    def __init__(self, max_frame_size: int):
+        self.max_frame_size = max_frame_size
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        Append the bytes read from the stream.
+
+        :param data: The bytes read.
+        :return: Returns the frames completed by the bytes, raises ValueError if a frame exceeds the maximum size.
+        """
+        self.buffer += data
+        frames = []
+        offset = 0
+        end = len(self.buffer)
+        view = memoryview(self.buffer)
+        try:
+            while end - offset >= LENGTH.size:
+                length = LENGTH.unpack_from(view, offset)[0]
+                if length > self.max_frame_size:
+                    raise ValueError("Frame exceeds the maximum size")
+                if end - offset - LENGTH.size < length:
+                    break
+                offset += LENGTH.size
+                frames.append(bytes(view[offset : offset + length]))
+                offset += length
+        finally:
+            view.release()
+        if offset:
+            del self.buffer[:offset]
+        return frames
+
+
+class SocketPeer:
+    """
+    Connection of a sender to a receiver, the frames sent during an iteration of the event loop are written
+    to the socket at once.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter, batch_size: int):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.chunks: List[bytes] = []
+        self.pending = 0
+        self.watcher: Optional[asyncio.Future] = None
+
+    def write(self, frame: bytes) -> bool:
+        """
+        Queue a frame for the next flush.
+
+        :param frame: The serialized message.
+        :return: Returns True if enough bytes are queued for the caller to flush them and wait for the socket.
+        """
+        if not self.chunks:
+            asyncio.get_running_loop().call_soon(self.flush)
+        self.chunks.append(LENGTH.pack(len(frame)))
+        self.chunks.append(frame)
+        self.pending += LENGTH.size + len(frame)
+        return self.pending >= self.batch_size
+
+    def flush(self) -> None:
+        if not self.chunks:
+            return
+        chunks, self.chunks, self.pending = self.chunks, [], 0
+        if not self.writer.is_closing():
+            self.writer.writelines(chunks)
+
+    def is_closing(self) -> bool:
+        return self.writer.is_closing()
+
+    def close(self) -> None:
+        self.flush()
+        self.writer.close()
+        if self.watcher is not None:
+            self.watcher.cancel()
+
+
+class SocketUTransport(DomainUTransport):
+    """
+    UTransport for uEs running as processes of the same host, exchanging messages over Unix domain sockets, or
+    TCP sockets on the loopback interface, without a broker.
+
+    Each transport listens on its own socket once a listener is registered, the other transports of the domain
+    connect to it to send the messages addressed to it as length-prefixed serialized UMessages. The sockets
+    (or the files holding the TCP ports) are found in a directory shared by the domain.
+
+    Messages are addressed to the sockets as described in DomainUTransport.
+
+    A receiver greets each connection with its key, so that a sender does not mistake an unrelated server for
+    a receiver, for example one that reused the TCP port of a receiver that died without removing its file.
+    """
+
+    # Time in seconds a sender waits for the greeting of a receiver
+    GREETING_TIMEOUT = 1.0
+
+    def __init__(
+        self,
+        source: UUri,
+        domain: str = "uprotocol",
+        directory: Optional[str] = None,
+        host: Optional[str] = None,
+        discovery_interval: int = 1000,
+        batch_size: int = 1 << 16,
+        max_frame_size: int = 1 << 24,
+    ):
+        """
+        Constructor for the SocketUTransport.
+
+        :param source: The URI of the uE using the transport, its entity identifies the socket.
+        :param domain: The name of the group of transports that exchange messages.
+        :param directory: The directory where the sockets of the domain are created, defaults to a directory
+                          named after the domain in the temporary directory.
+        :param host: The loopback address to listen on with TCP, Unix domain sockets are used if None.
+        :param discovery_interval: The time in milliseconds the list of receivers of published messages is cached.
+        :param batch_size: The number of bytes queued for a receiver after which they are written without
+                           waiting for the end of the loop iteration and the sender waits for the socket.
+        :param max_frame_size: The size in bytes of the largest message accepted.
+        """
+        super().__init__(
+            source, domain, directory, ".sock" if host is None else ".port", discovery_interval, max_frame_size
+        )
+        self.host = host
+        self.batch_size = batch_size
+        self.peers: Dict[str, SocketPeer] = {}
+        self.connecting: Dict[str, asyncio.Future] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.starting: Optional[asyncio.Future] = None
+        self.connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def close(self) -> None:
+        """
+        Unregister all the listeners, stop listening and close the connections to the other receivers.
+        """
+        if self.starting is not None:
+            self.starting.cancel()
+        for connecting in self.connecting.values():
+            connecting.cancel()
+        self.connecting.clear()
+        await super().close()
+        if self.server is not None:
+            self.server.close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self._get_path(self.key))
+            connections = list(self.connections.items())
+            for writer, _ in connections:
+                writer.close()
+            await asyncio.gather(*(task for _, task in connections), return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _start(self) -> UStatus:
+        if self.server is not None:
+            return UStatus(code=UCode.OK)
+        starting = self.starting
+        if starting is None:
+            # Concurrent registrations share a single start, a second one would find the socket of the first
+            # one or leak another server
+            starting = self.starting = asyncio.ensure_future(self._listen())
+
+            def started(_):
+                if self.starting is starting:
+                    self.starting = None
+
+            starting.add_done_callback(started)
+        return await asyncio.shield(starting)
+
+    async def _listen(self) -> UStatus:
+        path = self._get_path(self.key)
+        if os.path.exists(path):
+            connection = await self._connect(self.key)
+            if connection is not None:
+                connection[1].close()
+                return UStatus(code=UCode.ALREADY_EXISTS, message="A transport with the same source is running")
+            # Left behind by a receiver that did not close, possibly with a port now used by another server
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+        if self.host is None:
+            self.server = await asyncio.start_unix_server(self._serve, path)
+        else:
+            self.server = await asyncio.start_server(self._serve, self.host, 0)
+            port = self.server.sockets[0].getsockname()[1]
+            # The port file is replaced at once so that no sender reads a partial port
+            with open(path + ".tmp", "w") as file:
+                file.write(str(port))
+            os.replace(path + ".tmp", path)
+        return UStatus(code=UCode.OK)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections[writer] = asyncio.current_task()
+        writer.write(self._get_greeting(self.key))
+        decoder = FrameDecoder(self.max_frame_size)
+        try:
+            while True:
+                data = await reader.read(self.batch_size)
+                if not data:
+                    break
+                for frame in decoder.feed(data):
+                    await self._dispatch(frame)
+        except (ValueError, ConnectionError):
+            # The sender does not follow the framing or went away, its connection is dropped
+            pass
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
+
+    async def _write(self, key: str, frame: bytes) -> UStatus:
+        peer = await self._get_peer(key)
+        if peer is None:
+            return UStatus(code=UCode.UNAVAILABLE, message="Receiver not listening")
+        if peer.write(frame):
+            peer.flush()
+            try:
+                await peer.writer.drain()
+            except ConnectionError:
+                self._drop_peer(key)
+                return UStatus(code=UCode.UNAVAILABLE, message="Receiver not listening")
+        return UStatus(code=UCode.OK)
+
+    async def _get_peer(self, key: str) -> Optional[SocketPeer]:
+        peer = self.peers.get(key)
+        if peer is not None:
+            if not peer.is_closing():
+                return peer
+            self._drop_peer(key)
+        connecting = self.connecting.get(key)
+        if connecting is None:
+            # Concurrent senders to a receiver share a single connection attempt
+            connecting = asyncio.ensure_future(self._open_peer(key))
+            self.connecting[key] = connecting
+            connecting.add_done_callback(lambda _: self.connecting.pop(key, None))
+        return await asyncio.shield(connecting)
+
+    async def _open_peer(self, key: str) -> Optional[SocketPeer]:
+        connection = await self._connect(key)
+        if connection is None:
+            return None
+        reader, writer = connection
+        peer = SocketPeer(writer, self.batch_size)
+        peer.watcher = asyncio.ensure_future(self._watch(key, peer, reader))
+        self.peers[key] = peer
+        return peer
+
+    async def _watch(self, key: str, peer: SocketPeer, reader: asyncio.StreamReader) -> None:
+        # Receivers only write their greeting, the end of the stream means that the receiver closed the connection
+        with contextlib.suppress(ConnectionError):
+            await reader.read()
+        if self.peers.get(key) is peer:
+            self._drop_peer(key)
+
+    async def _connect(self, key: str) -> Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+        path = self._get_path(key)
+        try:
+            if self.host is None:
+                reader, writer = await asyncio.open_unix_connection(path)
+            else:
+                with open(path) as file:
+                    port = int(file.read())
+                reader, writer = await asyncio.open_connection(self.host, port)
+        except (OSError, ValueError):
+            # Either there is no such receiver or it died without cleaning up
+            return None
+        greeting = self._get_greeting(key)
+        try:
+            received = await asyncio.wait_for(reader.readexactly(len(greeting)), self.GREETING_TIMEOUT)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            received = None
+        if received != greeting:
+            # Not the receiver of the key
+            writer.close()
+            return None
+        return reader, writer
+
+    @staticmethod
+    def _get_greeting(key: str) -> bytes:
+        data = key.encode()
+        return LENGTH.pack(len(data)) + data
@@ -30,13 +30,16 @@ class UListener(ABC):
 
         `on_receive()` is expected to return almost immediately. If it does not, it could potentially
         block further message receipt. For long-running operations, consider passing off received
-        data to a different async function to handle it and return.
+        data to a different async function to handle it and return, or wrap the listener in a QueuedListener.
 
         Note for `UTransport` implementers:
 
         Because `on_receive()` is an async function, you may choose to either `await` it in the current context
         or spawn it onto a new task and await it there to allow the current context to continue immediately.
 
+        The same UMessage may be passed to several listeners, as done by the LocalUTransport, listeners must not
+        modify it.
+
         @param umsg: UMessage to be sent.
         """
         pass